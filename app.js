@@ -37,6 +37,13 @@
     return streak;
   }
 
+  // groups carry a preview of their members; memberCount is the total
+  function memberCountOf(group) {
+    if (Number.isFinite(group.memberCount)) return group.memberCount;
+    if (Array.isArray(group.members)) return group.members.length;
+    return Array.isArray(group.memberNames) ? group.memberNames.length : 0;
+  }
+
   // build a per-group leaderboard
   function buildLeaderboard(group, period = 'weekly') {
     const memberIndex = new Map(group.members.map(m => [m.id, m]));
@@ -98,6 +105,15 @@
     return `data:image/svg+xml;utf8,${encodeURIComponent(svg)}`;
   }
 
+  // <picture> with the server's WebP/JPEG variants when they exist (srcset = {webp, jpeg}), else a plain <img>.
+  function pictureHTML(src, srcset, sizes, attrs) {
+    if (!srcset || !srcset.jpeg) return `<img src="${src}" ${attrs} />`;
+    return `<picture>
+      <source type="image/webp" srcset="${srcset.webp}" sizes="${sizes}" />
+      <img src="${src}" srcset="${srcset.jpeg}" sizes="${sizes}" ${attrs} />
+    </picture>`;
+  }
+
   // Auth Modal -------------------------------------------------------------
   function openAuthModal() {
     const signedIn = currentUser && currentUser.id !== 'anon';
@@ -282,9 +298,74 @@
     return data;
   }
 
-  async function fetchComments(postId) {
-    const res = await getJSON(`/posts/${postId}/comments/`);
-    return res?.results || [];
+  // Resumable upload: chunks are retried, and after a failure the upload resumes
+  // from the server's `received` offset instead of starting over.
+  async function uploadChunked(file, fields, onProgress) {
+    const session = await postJSON('/uploads/', {
+      ...fields, filename: file.name, size: file.size, content_type: file.type,
+    });
+    const url = `${API_BASE}/uploads/${session.id}/`;
+    const chunkSize = session.chunk_size || 1024 * 1024;
+    let received = session.received || 0;
+    let failures = 0;
+    while (received < file.size) {
+      const end = Math.min(received + chunkSize, file.size);
+      try {
+        const res = await fetch(url, {
+          method: 'PUT',
+          headers: {
+            'Content-Type': 'application/octet-stream',
+            'Content-Range': `bytes ${received}-${end - 1}/${file.size}`,
+          },
+          body: file.slice(received, end),
+          credentials: 'include',
+        });
+        const data = await res.json().catch(() => ({}));
+        if (res.ok) {
+          received = data.received;
+          failures = 0;
+          onProgress?.(received / file.size);
+          continue;
+        }
+        if (res.status < 500 && res.status !== 416) {
+          throw Object.assign(new Error(data?.detail || 'Upload failed'), { data, fatal: true });
+        }
+      } catch (e) {
+        if (e.fatal) throw e;
+      }
+      if (++failures > 5) throw new Error('Upload failed; check your connection and try again.');
+      await new Promise((resolve) => setTimeout(resolve, 500 * 2 ** failures));
+      received = (await getJSON(`/uploads/${session.id}/`)).received;
+    }
+    const key = crypto.randomUUID ? crypto.randomUUID() : `${session.id}-${Date.now()}`;
+    for (let attempt = 0; ; attempt++) {
+      try {
+        const res = await fetch(`${url}finalize/`, {
+          method: 'POST',
+          headers: { 'Idempotency-Key': key },
+          credentials: 'include',
+        });
+        const data = await res.json().catch(() => ({}));
+        if (res.ok) return data;
+        if (res.status < 500 || attempt >= 3) {
+          throw Object.assign(new Error(data?.detail || 'Upload failed'), { data, fatal: true });
+        }
+      } catch (e) {
+        if (e.fatal || attempt >= 3) throw e;
+      }
+      await new Promise((resolve) => setTimeout(resolve, 1000 * 2 ** attempt));
+    }
+  }
+
+  // One page of comment threads; pass { parent, after } to load more replies of a comment.
+  async function fetchComments(postId, params = {}) {
+    const qs = new URLSearchParams(Object.entries(params).filter(([, v]) => v != null && v !== '')).toString();
+    const res = await getJSON(`/posts/${postId}/comments/${qs ? `?${qs}` : ''}`);
+    return {
+      results: res?.results || [],
+      nextAfter: res?.has_more ? res.next_after : null,
+      total: typeof res?.comment_count === 'number' ? res.comment_count : null,
+    };
   }
 
   async function createComment(postId, text, parentId = null) {
@@ -295,6 +376,11 @@
   let currentUser = { id: 'anon', name: 'Guest', initials: 'GU' };
   let groups = [];
   let selectedGroupId = null;
+  let syncToken = null;
+  const SYNC_INTERVAL_MS = 30000;
+  let eventSource = null;
+  // Comments already counted, since both /sync/ and the event stream report them.
+  const seenCommentIds = new Set();
 
   async function initAuth() {
     try {
@@ -305,8 +391,35 @@
     }
   }
 
+  function mapPost(p) {
+    return {
+      id: p.id,
+      userId: p.author_id ? String(p.author_id) : (p.author || p.user_name || 'unknown'),
+      userName: p.user_name || p.author || 'Unknown',
+      imageUrl: p.image_url || svgPlaceholder('IMG'),
+      imageSrcset: p.image_srcset || null,
+      caption: p.caption || '',
+      date: p.date || todayISO(),
+      comments: Array.isArray(p.comments) ? p.comments : [],
+      commentCount: Number(p.comment_count || (p.comments?.length || 0)),
+      latestComment: Array.isArray(p.comments) && p.comments.length ? p.comments[0].text : '',
+    };
+  }
+
   async function loadGroups() {
-    const resp = await getJSON('/groups/');
+    // One round trip: user, groups and today's posts per group.
+    let boot = null;
+    try { boot = await getJSON('/bootstrap/'); } catch (_) { boot = null; }
+    if (boot) {
+      syncToken = boot.sync_token ?? null;
+    } else {
+      // Take the token before loading so nothing that changes meanwhile is missed.
+      try { syncToken = (await getJSON('/sync/'))?.token ?? null; } catch (_) { syncToken = null; }
+    }
+    if (boot?.user) {
+      currentUser = { id: String(boot.user.id), name: boot.user.name || boot.user.username, initials: boot.user.initials || 'ME', streak: boot.user.streak || null };
+    }
+    const resp = boot ? { results: boot.groups } : await getJSON('/groups/');
     const apiGroups = resp?.results || [];
     groups = apiGroups.map((g, idx) => {
       const memberNames = Array.isArray(g.member_usernames) ? g.member_usernames : [];
@@ -332,40 +445,113 @@
         color: g.color || '#6b9bff',
         description: g.description || '',
         cover: g.cover_url || '',
+        coverSrcset: g.cover_srcset || null,
         members,
         memberNames,
         memberCount,
         isPrivate: !g.is_public,
         isCreator: Boolean(g.is_creator),
         isMember: g.is_member !== false,
-        posts: [],
+        posts: Array.isArray(g.posts) ? g.posts.map(mapPost) : [],
         expanded: idx === 0,
       };
     });
     if (!selectedGroupId && groups.length) {
       selectedGroupId = groups[0].id;
     }
-    // Load posts for each group
+    // Group membership may have changed; resubscribe to the current set.
+    connectEvents();
+    if (boot) return;
+    // Fallback: load posts for each group
     await Promise.all(groups.map(async (g) => {
       try {
         const res = await getJSON(`/posts/?group_id=${encodeURIComponent(g.id)}`);
-        g.posts = (res?.results || []).map((p) => ({
-          id: p.id,
-          userId: p.author_id ? String(p.author_id) : (p.author || p.user_name || 'unknown'),
-          userName: p.user_name || p.author || 'Unknown',
-          imageUrl: p.image_url || svgPlaceholder('IMG'),
-          caption: p.caption || '',
-          date: p.date || todayISO(),
-          comments: Array.isArray(p.comments) ? p.comments : [],
-          commentCount: Number(p.comment_count || (p.comments?.length || 0)),
-          latestComment: Array.isArray(p.comments) && p.comments.length ? p.comments[0].text : '',
-        }));
+        g.posts = (res?.results || []).map(mapPost);
       } catch (e) {
         g.posts = [];
       }
     }));
   }
 
+  // --- Delta sync ----------------------------------------------------------
+  // Apply one post/comment change from /sync/ to the loaded groups; returns true if anything changed.
+  function applyChange(change) {
+    if (change.kind === 'post') {
+      const group = groups.find(g => String(g.id) === String(change.group_id));
+      if (!group) return false;
+      const idx = group.posts.findIndex(p => String(p.id) === String(change.id));
+      if (change.action === 'delete') {
+        if (idx === -1) return false;
+        group.posts.splice(idx, 1);
+        return true;
+      }
+      // Only today's posts are shown.
+      if (change.data?.date && change.data.date !== todayISO()) return false;
+      const mapped = mapPost(change.data);
+      if (idx === -1) group.posts.unshift(mapped); else group.posts[idx] = { ...group.posts[idx], ...mapped };
+      return true;
+    }
+    if (change.kind === 'comment') {
+      const postId = change.data?.post_id;
+      for (const group of groups) {
+        const post = group.posts.find(p => String(p.id) === String(postId));
+        if (!post) continue;
+        if (seenCommentIds.has(String(change.id))) return false;
+        seenCommentIds.add(String(change.id));
+        if (change.action === 'upsert' && !post.comments.some(c => String(c.id) === String(change.id))) {
+          post.commentCount = (post.commentCount || 0) + 1;
+          if (!change.data.parent) post.latestComment = change.data.text;
+          return true;
+        }
+      }
+    }
+    return false;
+  }
+
+  async function pollChanges() {
+    if (!syncToken || document.hidden || !currentUser || currentUser.id === 'anon') return;
+    let reload = false;
+    let changed = false;
+    try {
+      let page;
+      do {
+        page = await getJSON(`/sync/?since=${encodeURIComponent(syncToken)}`);
+        if (page.reset) { reload = true; break; }
+        for (const change of page.changes || []) {
+          // Group and membership changes reshape the page; reload it rather than patching.
+          if (change.kind === 'group' || change.kind === 'membership') reload = true;
+          else if (applyChange(change)) changed = true;
+        }
+        syncToken = page.token;
+      } while (page.has_more && !reload);
+    } catch (_) {
+      return;
+    }
+    if (reload) {
+      try { await loadGroups(); changed = true; } catch (_) { return; }
+    }
+    // Leave an open dialog alone; the state is already updated for the next render.
+    if (changed && !$('#modal-root').classList.contains('is-open')) render();
+  }
+
+  setInterval(pollChanges, SYNC_INTERVAL_MS);
+
+  // Live posts/comments over server-sent events. Only the ASGI server streams them;
+  // elsewhere the request fails, EventSource gives up and polling carries on.
+  function connectEvents() {
+    if (eventSource) { eventSource.close(); eventSource = null; }
+    if (!window.EventSource || !currentUser || currentUser.id === 'anon') return;
+    eventSource = new EventSource(`${API_BASE}/events/`, { withCredentials: true });
+    const onEvent = (kind) => (e) => {
+      let ev;
+      try { ev = JSON.parse(e.data); } catch (_) { return; }
+      const change = { kind, action: 'upsert', id: ev.data?.id, group_id: ev.group_id, data: ev.data };
+      if (applyChange(change) && !$('#modal-root').classList.contains('is-open')) render();
+    };
+    eventSource.addEventListener('post', onEvent('post'));
+    eventSource.addEventListener('comment', onEvent('comment'));
+  }
+
   // --- Simple router -------------------------------------------------------
   function routeFromHash() {
     return location.hash.replace('#', '') || 'groups';
@@ -484,7 +670,7 @@
             <span class="group-dot" style="background:${g.color}"></span>
             <div class="side-meta">
               <div class="name">${g.name}</div>
-              <div class="muted small">${(Array.isArray(g.members) ? g.members.length : (Array.isArray(g.memberNames) ? g.memberNames.length : 0))} members • ${postedToday ? 'Posted today ✅' : 'Post today required'}</div>
+              <div class="muted small">${memberCountOf(g)} members • ${postedToday ? 'Posted today ✅' : 'Post today required'}</div>
             </div>`;
           el.addEventListener('click', () => { selectedGroupId = g.id; saveState(); renderGroupDetail(); renderSide(); });
           return el;
@@ -500,14 +686,14 @@
       const postedToday = (g.posts || []).some(p => (p && (p.userId === currentUser.id || p.userName === me) && p.date === todayISO()));
       pane.innerHTML = `
         <div class="group-card">
-          ${g.cover ? `<div class="cover-banner"><img src="${g.cover}" alt="${g.name} cover" /></div>` : ''}
+          ${g.cover ? `<div class="cover-banner">${pictureHTML(g.cover, g.coverSrcset, '100vw', `alt="${g.name} cover"`)}</div>` : ''}
           <div class="group-hero">
             <div class="row" style="gap:12px; align-items:center;">
               <span class="group-dot" style="width:18px; height:18px; background:${g.color}"></span>
               <h2 class="group-title" style="margin:0; font-size:22px;">${g.name}</h2>
             </div>
             <div class="row" style="gap:8px;">
-              <span class="chip">${(Array.isArray(g.members) ? g.members.length : (Array.isArray(g.memberNames) ? g.memberNames.length : 0))} member${((Array.isArray(g.members) ? g.members.length : (Array.isArray(g.memberNames) ? g.memberNames.length : 0)) === 1) ? '' : 's'}</span>
+              <span class="chip">${memberCountOf(g)} member${(memberCountOf(g) === 1) ? '' : 's'}</span>
               ${uniqueUsers.slice(0,6).map(n => `<span class="chip">${n}</span>`).join('')}
             </div>
             <div class="muted">${g.description || 'No description'}</div>
@@ -544,7 +730,7 @@
     const meName = (currentUser && currentUser.name) || '';
     const postedByMeToday = (group.posts || []).some(p => (p && (p.userId === currentUser.id || p.userName === meName)) && p.date === todayISO());
     const visibleMembers = (group.members || []).slice(0, 6);
-    const memberCount = group.memberCount ?? group.members.length;
+    const memberCount = memberCountOf(group);
     const remainingMembers = Math.max(0, memberCount - visibleMembers.length);
     const card = document.createElement('section');
     card.className = 'group-card';
@@ -610,7 +796,7 @@
     const commentBlurb = post.latestComment ? post.latestComment : (post.commentCount ? 'View comments' : '');
     return `
       <article class="post-card" data-post-id="${post.id}">
-        <img class="post-thumb" src="${post.imageUrl}" alt="Post by ${post.userName}" />
+        ${pictureHTML(post.imageUrl, post.imageSrcset, '(max-width: 640px) 100vw, 360px', `class="post-thumb" alt="Post by ${post.userName}" loading="lazy"`)}
         <div class="post-meta">
           <span class="${isMe ? 'me' : ''}">${post.userName}</span>
           <button class="icon" title="Open">🔍</button>
@@ -769,7 +955,7 @@
             ${g.cover ? `<span class="cover-thumb"><img src="${g.cover}" alt="${g.name} cover"></span>` : `<span class="group-dot" style="background:${g.color}"></span>`}
             <div class="side-meta">
               <div class="name">${g.name}</div>
-              <div class="muted small">${Array.isArray(g.members) ? g.members.length : 0} members • ${postedToday ? 'Posted today ✅' : 'Post today required'}</div>
+              <div class="muted small">${memberCountOf(g)} members • ${postedToday ? 'Posted today ✅' : 'Post today required'}</div>
             </div>`;
           el.addEventListener('click', () => { selectedGroupId = g.id; saveState(); renderGroupDetail(); renderSide(); });
           return el;
@@ -783,14 +969,14 @@
       const photos = (g.posts || []);
       pane.innerHTML = `
         <div class="group-card">
-          ${g.cover ? `<div class="cover-banner"><img src="${g.cover}" alt="${g.name} cover" /></div>` : ''}
+          ${g.cover ? `<div class="cover-banner">${pictureHTML(g.cover, g.coverSrcset, '100vw', `alt="${g.name} cover"`)}</div>` : ''}
           <div class="group-hero">
             <div class="row" style="gap:12px; align-items:center;">
               <span class="group-dot" style="width:18px; height:18px; background:${g.color}"></span>
               <h2 class="group-title" style="margin:0; font-size:22px;">${g.name}</h2>
             </div>
             <div class="row" style="gap:8px;">
-              <span class="chip">${(Array.isArray(g.members) ? g.members.length : (Array.isArray(g.memberNames) ? g.memberNames.length : 0))} member${((Array.isArray(g.members) ? g.members.length : (Array.isArray(g.memberNames) ? g.memberNames.length : 0)) === 1) ? '' : 's'}</span>
+              <span class="chip">${memberCountOf(g)} member${(memberCountOf(g) === 1) ? '' : 's'}</span>
               ${uniqueUsers.slice(0,6).map(n => `<span class="chip">${n}</span>`).join('')}
             </div>
             <div class="muted">${g.description || 'No description'}</div>
@@ -874,7 +1060,7 @@
           ${g.cover ? `<span class="cover-thumb" style="width:40px; height:40px;"><img src="${g.cover}" alt="${g.name} cover" /></span>` : `<span class="group-dot" style="background:${g.color}"></span>`}
           <div>
             <div style="font-weight:600">${g.name}</div>
-            <div class="muted" style="font-size:13px">${g.members.length} members</div>
+            <div class="muted" style="font-size:13px">${memberCountOf(g)} members</div>
           </div>
           <div class="tile-actions">
             <button class="ghost-btn" data-act="open">Open</button>
@@ -898,6 +1084,12 @@
     return groups.some(g => (g.posts || []).some(p => p && (p.userId === currentUser.id || p.userName === me) && p.date === todayISO()));
   }
   function calcStreak() {
+    const server = currentUser.streak;
+    if (server && Number.isFinite(Number(server.current))) {
+      // Server streak covers full history; count a post made since the last load.
+      const current = Number(server.current);
+      return server.last_active_date !== todayISO() && didPostToday() ? current + 1 : current;
+    }
     // Count consecutive days (including today) where user posted in any group.
     let streak = 0;
     for (let i = 0; i < 30; i++) { // simple cap
@@ -986,12 +1178,11 @@
       const caption = $('#caption', wrap).value.trim();
       if (!selectedFile) return;
       try {
-        const form = new FormData();
-        form.append('image', selectedFile);
-        form.append('caption', caption);
-        form.append('group_id', String(groupId));
-        form.append('user_name', (currentUser.name || 'Anonymous'));
-        const p = await uploadForm('/posts/upload/', form);
+        const btn = $('#postBtn', wrap);
+        btn.disabled = true;
+        const p = await uploadChunked(selectedFile, { caption, group_id: groupId }, (done) => {
+          btn.textContent = `Uploading ${Math.round(done * 100)}%`;
+        }).finally(() => { btn.disabled = false; btn.textContent = 'Post'; });
         const newPost = {
           id: p.id,
           userId: null,
@@ -1016,7 +1207,7 @@
     const wrap = document.createElement('div');
     const isMe = (post.userId === currentUser.id) || (post.userName === (currentUser.name || ''));
     wrap.innerHTML = `
-      <img src="${post.imageUrl}" alt="Post image" style="width:100%; border-radius:12px;" />
+      ${pictureHTML(post.imageUrl, post.imageSrcset, '(max-width: 760px) 100vw, 720px', 'alt="Post image" style="width:100%; border-radius:12px;"')}
       <div class="row" style="justify-content:space-between;">
         <div class="row">
           <span class="group-dot" style="background:${group.color}"></span>
@@ -1049,6 +1240,7 @@
         const countEl = $('#commentCount', wrap);
         const replyMeta = $('#replyMeta', wrap);
         let commentTree = Array.isArray(post.comments) ? post.comments : [];
+        let nextAfter = null;
         let replyTo = null;
 
         function renderComments(list) {
@@ -1075,17 +1267,24 @@
                   </div>
                 </div>
                 ${replies}
+                ${c.has_more_replies ? `<button class="ghost-btn" data-more-replies="${c.id}" style="margin-left:${(level + 1) * 12}px; padding:4px 6px; font-size:12px;">Load more replies</button>` : ''}
               `;
             }).join('');
           }
 
-          listEl.innerHTML = renderTree(list);
+          listEl.innerHTML = renderTree(list)
+            + (nextAfter ? '<button class="ghost-btn" data-more-comments style="padding:4px 6px; font-size:12px;">Load more comments</button>' : '');
           function countNodes(nodes) {
             return nodes.reduce((acc, n) => acc + 1 + (Array.isArray(n.replies) ? countNodes(n.replies) : 0), 0);
           }
-          const totalCount = countNodes(list);
+          const totalCount = typeof post.commentCount === 'number' ? post.commentCount : countNodes(list);
           if (countEl) countEl.textContent = `${totalCount} comment${totalCount === 1 ? '' : 's'}`;
 
+          $$('[data-more-replies]', listEl).forEach(btn => {
+            btn.addEventListener('click', () => loadMoreReplies(btn.dataset.moreReplies, btn));
+          });
+          $('[data-more-comments]', listEl)?.addEventListener('click', (e) => loadMoreComments(e.currentTarget));
+
           $$('[data-reply]', listEl).forEach(btn => {
             btn.addEventListener('click', () => {
               replyTo = btn.dataset.reply;
@@ -1130,6 +1329,7 @@
             if (String(c.id) === String(parentId)) {
               c.replies = c.replies || [];
               c.replies.unshift(newComment);
+              c.reply_count = (c.reply_count || 0) + 1;
               return true;
             }
             if (c.replies && insertComment(c.replies, parentId, newComment)) return true;
@@ -1140,17 +1340,47 @@
         async function loadComments() {
           if (listEl) listEl.innerHTML = '<div class="muted">Loading comments...</div>';
           try {
-            const items = await fetchComments(post.id);
-            commentTree = items;
-            post.comments = items;
-            const countNodes = (nodes) => nodes.reduce((acc, n) => acc + 1 + (Array.isArray(n.replies) ? countNodes(n.replies) : 0), 0);
-            post.commentCount = countNodes(items);
-            renderComments(items);
+            const page = await fetchComments(post.id);
+            commentTree = page.results;
+            nextAfter = page.nextAfter;
+            post.comments = commentTree;
+            if (page.total !== null) post.commentCount = page.total;
+            renderComments(commentTree);
           } catch (e) {
             if (listEl) listEl.innerHTML = '<div class="muted">Unable to load comments.</div>';
           }
         }
 
+        async function loadMoreComments(btn) {
+          if (btn) btn.disabled = true;
+          try {
+            const page = await fetchComments(post.id, { after: nextAfter });
+            // Comments posted in this session are already in the tree.
+            const have = new Set(commentTree.map(c => String(c.id)));
+            commentTree.push(...page.results.filter(c => !have.has(String(c.id))));
+            nextAfter = page.nextAfter;
+            renderComments(commentTree);
+          } catch (e) {
+            if (btn) btn.disabled = false;
+          }
+        }
+
+        async function loadMoreReplies(commentId, btn) {
+          const node = findCommentById(commentTree, commentId);
+          if (!node) return;
+          if (btn) btn.disabled = true;
+          try {
+            const page = await fetchComments(post.id, { parent: node.id, after: node.replies_after });
+            const have = new Set((node.replies || []).map(c => String(c.id)));
+            node.replies = (node.replies || []).concat(page.results.filter(c => !have.has(String(c.id))));
+            node.has_more_replies = !!page.nextAfter;
+            if (page.results.length) node.replies_after = page.results[page.results.length - 1].id;
+            renderComments(commentTree);
+          } catch (e) {
+            if (btn) btn.disabled = false;
+          }
+        }
+
         loadComments();
 
         const submit = $('#commentSubmit', wrap);
@@ -1278,7 +1508,7 @@
           } else {
             const g = await patchJSON(`/groups/${group.id}/`, { name, color, description, is_public: !isPrivate });
             const idx = groups.findIndex(x => x.id === group.id);
-            if (idx !== -1) groups[idx] = { ...groups[idx], ...g, cover: g.cover_url || groups[idx].cover };
+            if (idx !== -1) groups[idx] = { ...groups[idx], ...g, cover: g.cover_url || groups[idx].cover, coverSrcset: g.cover_srcset || null };
             if (coverFile) {
               const fd = new FormData();
               fd.append('cover', coverFile);
@@ -1381,8 +1611,26 @@
     let period = initialPeriod; // 'daily' | 'weekly' | 'monthly'
     const wrap = document.createElement('div');
 
-    function paint() {
-      const rows = buildLeaderboard(group, period);
+    async function fetchRows() {
+      // Server-side rankings cover full history; fall back to the local feed if unavailable.
+      try {
+        const res = await getJSON(`/groups/${encodeURIComponent(group.id)}/leaderboard/?period=${period}`);
+        return (res?.results || []).map(r => ({
+          rank: r.rank,
+          userId: String(r.user_id),
+          name: r.name || r.username || 'Unknown',
+          activeDays: r.active_days,
+          totalPosts: r.total_posts,
+          streak: r.streak,
+          lastPost: r.last_post ? new Date(r.last_post) : null,
+        }));
+      } catch (_) {
+        return buildLeaderboard(group, period);
+      }
+    }
+
+    async function paint() {
+      const rows = await fetchRows();
       wrap.innerHTML = `
       <div class="row" style="justify-content:space-between; align-items:center; margin-bottom:10px;">
         <div class="row" style="gap:10px;">
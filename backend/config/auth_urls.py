@@ -13,17 +13,21 @@ from django.contrib.auth import authenticate, login, logout, get_user_model
 from django.middleware.csrf import get_token
 
 
+def user_payload(u) -> dict:
+    """Shape of the current user as returned by `/api/auth/me/`."""
+    name = (u.first_name + (" " + u.last_name if u.last_name else "")).strip() or u.username
+    return {
+        "id": u.id,
+        "username": u.username,
+        "name": name,
+        "initials": (u.first_name[:1] + u.last_name[:1]).upper() or u.username[:2].upper(),
+    }
+
+
 @require_http_methods(["GET"])
 def me(request):
     if request.user.is_authenticated:
-        u = request.user
-        name = (u.first_name + (" " + u.last_name if u.last_name else "")).strip() or u.username
-        return JsonResponse({
-            "id": u.id,
-            "username": u.username,
-            "name": name,
-            "initials": (u.first_name[:1] + u.last_name[:1]).upper() or u.username[:2].upper(),
-        })
+        return JsonResponse(user_payload(request.user))
     # Set a CSRF cookie for convenience in dev (even though our endpoints are csrf_exempt)
     get_token(request)
     return JsonResponse({"detail": "Not authenticated"}, status=401)
@@ -70,8 +74,7 @@ def login_view(request):
     if user is None:
         return JsonResponse({"detail": "Invalid credentials"}, status=400)
     login(request, user)
-    name = (user.first_name + (" " + user.last_name if user.last_name else "")).strip() or user.username
-    return JsonResponse({"id": user.id, "username": user.username, "name": name, "initials": (user.first_name[:1] + user.last_name[:1]).upper() or user.username[:2].upper()})
+    return JsonResponse(user_payload(user))
 
 
 @csrf_exempt
@@ -189,6 +189,71 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 CORS_ALLOW_ALL_ORIGINS = True
 CORS_ALLOW_CREDENTIALS = True
 
+# Any Django cache backend works (the group feed cache only uses portable calls):
+# locmem by default, or e.g. CACHE_BACKEND=django.core.cache.backends.db.DatabaseCache
+# CACHE_LOCATION=cache_table (after `manage.py createcachetable`), or the FileBasedCache.
+# Group roles (posts.authz) are cached across requests only in a backend shared by
+# every process (database, Redis, Memcached); with locmem or files each request loads them.
+AUTHZ_CACHE_SECONDS = int(os.getenv("AUTHZ_CACHE_SECONDS", "300"))
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv("CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.getenv("CACHE_LOCATION", "daily-groups"),
+    }
+}
+
+# Realtime events (/api/events/): LocalBackend fans out within one process;
+# use posts.realtime.ChangeLogBackend when running several ASGI workers.
+REALTIME_BACKEND = os.getenv("REALTIME_BACKEND", "posts.realtime.LocalBackend")
+
+# Delta sync (posts.changelog): seconds a change log entry waits before it is
+# served, so entries from transactions that commit out of id order are not
+# skipped. Must exceed the longest transaction that writes entries.
+CHANGELOG_SYNC_LAG_SECONDS = float(os.getenv("CHANGELOG_SYNC_LAG_SECONDS", "5"))
+
+# Image variants (posts.variants): resizing worker processes, and the longest
+# edge kept when originals are normalized.
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", "2"))
+IMAGE_MAX_EDGE = int(os.getenv("IMAGE_MAX_EDGE", "2560"))
+
+# Background jobs (posts.jobs, run by `manage.py worker`): queue name -> how
+# many of its jobs one worker runs at once. Image variant builds have their
+# own queue so a burst of uploads can't hold up archives and imports.
+JOB_QUEUES = {"default": 4, "images": 2}
+# Periodic tasks: dotted task name -> seconds between runs.
+JOB_SCHEDULE = {"posts.feed.prune": 3600}
+
+# Materialized feed (posts.feed): days of feed rows kept, today included;
+# only today's are read.
+FEED_KEEP_DAYS = int(os.getenv("FEED_KEEP_DAYS", "2"))
+
+# Resumable uploads (posts.uploads): where chunks are staged until finalize.
+# Must be shared between web servers when there are several.
+UPLOAD_STAGING_DIR = os.getenv("UPLOAD_STAGING_DIR", "")
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(25 * 1024 * 1024)))
+
+# Content-addressed media (posts.blobs): hours an unreferenced image blob is
+# kept before `prune_blobs` deletes it.
+BLOB_GRACE_HOURS = int(os.getenv("BLOB_GRACE_HOURS", "24"))
+
+# CSV post import (posts.imports): rows per bulk insert, and the upload size
+# above which the import runs as a background job.
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "500"))
+IMPORT_INLINE_MAX_BYTES = int(os.getenv("IMPORT_INLINE_MAX_BYTES", str(1024 * 1024)))
+
+# Account archives (posts.archives): hours a finished zip stays downloadable,
+# and how many image files are read from storage at once while building it.
+ARCHIVE_HOURS = int(os.getenv("ARCHIVE_HOURS", "24"))
+ARCHIVE_WORKERS = int(os.getenv("ARCHIVE_WORKERS", "8"))
+
+# Post retention (posts.retention, `apply_retention`): days of posts to keep
+# (unset keeps everything; a group's retention_days overrides it), posts
+# deleted per transaction, and days after a group's end_date before its
+# posts are removed.
+RETENTION_DAYS = int(os.environ["RETENTION_DAYS"]) if os.getenv("RETENTION_DAYS") else None
+RETENTION_CHUNK_SIZE = int(os.getenv("RETENTION_CHUNK_SIZE", "500"))
+RETENTION_ENDED_GROUP_DAYS = int(os.getenv("RETENTION_ENDED_GROUP_DAYS", "0"))
+
 LOGIN_URL = "/accounts/login/"
 LOGIN_REDIRECT_URL = "/"
 LOGOUT_REDIRECT_URL = "/"
@@ -208,5 +273,9 @@ LOGGING = {
             "handlers": ["console"],
             "level": "INFO",
         },
+        "posts": {
+            "handlers": ["console"],
+            "level": "WARNING",
+        },
     },
 }
\ No newline at end of file
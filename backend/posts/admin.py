@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Group, Post, GroupMembership, Profile, AuditLog, GroupInvite, Comment
+from .models import Group, Post, GroupMembership, Profile, AuditLog, GroupInvite, Comment, DailyActivity, Job, UploadSession
 
 
 @admin.register(Group)
@@ -42,3 +42,28 @@ class CommentAdmin(admin.ModelAdmin):
     list_display = ("id", "post", "user_name", "parent", "created_at")
     list_filter = ("created_at",)
     search_fields = ("text", "user_name")
+
+
+@admin.register(DailyActivity)
+class DailyActivityAdmin(admin.ModelAdmin):
+    list_display = ("date", "user", "group", "post_count", "comment_count")
+    list_filter = ("date", "group")
+    list_select_related = ("user", "group")
+    date_hierarchy = "date"
+    search_fields = ("user__username", "group__name")
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ("id", "task", "queue", "status", "attempts", "run_after", "duration_ms", "created_at")
+    list_filter = ("status", "queue", "task")
+    search_fields = ("task", "last_error")
+    readonly_fields = ("locked_by", "locked_at", "started_at", "finished_at", "wait_ms", "duration_ms")
+
+
+@admin.register(UploadSession)
+class UploadSessionAdmin(admin.ModelAdmin):
+    list_display = ("id", "user", "group", "filename", "size", "received", "status", "expires_at")
+    list_filter = ("status",)
+    list_select_related = ("user", "group")
+    search_fields = ("user__username", "filename")
@@ -0,0 +1,204 @@
+"""
+Full-account archives: one zip with a manifest and the original images.
+
+`start()` starts the `build` background job (or returns the one already
+under way). The job writes `manifest.json` (the user, their groups, and
+their posts with comments) straight into the zip, a chunk of posts at a
+time, then adds each distinct image file once: post images and the covers
+of the listed groups, under `media/`. The manifest's `file` entries point
+there. Image files are read from storage by a thread pool, each copied to
+its own temporary file a block at a time, and appended to the zip on disk
+in order, so neither the images nor the zip are held in memory. The
+finished zip is saved to storage under archives/ and the job's result holds
+its name; the download view streams it back. Archives are deleted by a
+delayed `delete` job after ARCHIVE_HOURS.
+
+Progress is reported on the Job row: {"stage": "manifest", "posts"} while
+the manifest is written, then {"stage": "media", "files", "done", "bytes"}.
+"""
+import json
+import logging
+import os
+import posixpath
+import shutil
+import tempfile
+import uuid
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import authz, exports, jobs
+from .models import Group, Job
+
+logger = logging.getLogger(__name__)
+
+COPY_BUFFER = 64 * 1024
+
+
+def hours() -> int:
+    return int(getattr(settings, "ARCHIVE_HOURS", 24))
+
+
+def workers() -> int:
+    return max(1, int(getattr(settings, "ARCHIVE_WORKERS", 8)))
+
+
+def member_name(name: str) -> str:
+    """Path of a stored file inside the zip; blob names are already unique."""
+    return posixpath.join("media", posixpath.basename(name) if name.startswith("blobs/") else name)
+
+
+def groups(user):
+    return (
+        Group.objects.filter(Q(pk__in=authz.group_ids(user)) | Q(owner=user) | Q(posts__author=user))
+        .distinct()
+        .order_by("id")
+    )
+
+
+def _write_manifest(out, user, files: dict, progress) -> int:
+    """Write manifest.json to the open zip entry `out`; fills `files` (storage name -> zip name). Returns the post count."""
+    def emit(text: str) -> None:
+        out.write(text.encode())
+
+    def file_for(name: str | None) -> str | None:
+        if not name:
+            return None
+        files.setdefault(name, member_name(name))
+        return files[name]
+
+    group_list = [
+        {
+            "id": group.id,
+            "name": group.name,
+            "description": group.description,
+            "color": group.color,
+            "is_public": group.is_public,
+            "owner": group.owner_id == user.id,
+            "start_date": group.start_date,
+            "end_date": group.end_date,
+            "created_at": group.created_at,
+            "cover": file_for(group.cover.name),
+        }
+        for group in groups(user)
+    ]
+    header = {
+        "exported_at": timezone.now(),
+        "user": {"id": user.id, "username": user.username, "email": user.email, "date_joined": user.date_joined},
+        "groups": group_list,
+    }
+    # Everything but the posts array, which is streamed in after it.
+    emit(json.dumps(header, cls=DjangoJSONEncoder)[:-1] + ', "posts": [')
+    count = 0
+    for batch in exports.rows(user, {}):
+        comments = exports.comments_for(batch)
+        items = []
+        for row in batch:
+            image = row.pop("image")
+            items.append({**row, "file": file_for(image), "comments": comments[row["id"]]})
+        emit(("," if count else "") + ",".join(json.dumps(item, cls=DjangoJSONEncoder) for item in items))
+        count += len(batch)
+        progress(stage="manifest", posts=count)
+    emit("]}")
+    return count
+
+
+def _fetch(name: str, directory: str):
+    """Copy one stored file to a temporary file; returns its path, or None if it is missing."""
+    try:
+        with default_storage.open(name, "rb") as src, tempfile.NamedTemporaryFile(dir=directory, delete=False) as dst:
+            shutil.copyfileobj(src, dst, COPY_BUFFER)
+            return dst.name
+    except (FileNotFoundError, OSError):
+        logger.warning("Archive: could not read %s", name, exc_info=True)
+        return None
+
+
+def write(user, fileobj, progress=lambda **data: None) -> dict:
+    """Write the archive for `user` into the binary file `fileobj`; returns counts."""
+    files: dict[str, str] = {}
+    missing = []
+    size = 0
+    with zipfile.ZipFile(fileobj, "w", zipfile.ZIP_DEFLATED, allowZip64=True) as zf:
+        with zf.open("manifest.json", "w", force_zip64=True) as out:
+            posts = _write_manifest(out, user, files, progress)
+        names = sorted(files)
+        progress(stage="media", files=len(names), done=0, bytes=0)
+        with tempfile.TemporaryDirectory(prefix="archive-") as directory, ThreadPoolExecutor(max_workers=workers()) as pool:
+            # A bounded window of reads ahead of the writer keeps at most that many temporary files on disk.
+            window = workers() * 2
+            for start in range(0, len(names), window):
+                chunk = names[start:start + window]
+                for name, path in zip(chunk, pool.map(lambda n: _fetch(n, directory), chunk)):
+                    if path is None:
+                        missing.append(name)
+                        continue
+                    # Images are already compressed; storing them saves CPU for nothing lost.
+                    zf.write(path, files[name], compress_type=zipfile.ZIP_STORED)
+                    size += zf.getinfo(files[name]).file_size
+                    os.unlink(path)
+                progress(stage="media", files=len(names), done=start + len(chunk), bytes=size)
+    return {"posts": posts, "files": len(names) - len(missing), "missing": missing[:100], "bytes": size}
+
+
+@jobs.task(max_attempts=2)
+def build(ctx, user_id: int) -> dict:
+    """Build the archive in a temporary file and save it to storage."""
+    user = User.objects.get(pk=user_id)
+    with tempfile.TemporaryFile(suffix=".zip") as fh:
+        result = write(user, fh, progress=ctx.progress)
+        fh.seek(0)
+        name = default_storage.save(f"archives/{user_id}/{uuid.uuid4().hex}.zip", File(fh))
+    expires_at = timezone.now() + timedelta(hours=hours())
+    delete.enqueue(delay=hours() * 3600, name=name)
+    return {**result, "name": name, "size": default_storage.size(name), "expires_at": expires_at}
+
+
+@jobs.task(max_attempts=3)
+def delete(ctx, name: str) -> None:
+    default_storage.delete(name)
+
+
+def start(user) -> Job:
+    """The user's archive job in progress, or a new one."""
+    running = Job.objects.filter(
+        task=build.name, payload__user_id=user.id, status__in=(Job.QUEUED, Job.RUNNING)
+    ).order_by("-id").first()
+    return running or build.enqueue(user_id=user.id)
+
+
+def job_for(user, pk) -> Job | None:
+    job = Job.objects.filter(pk=pk, task=build.name).first()
+    return job if job is not None and job.payload.get("user_id") == user.id else None
+
+
+def available(job: Job) -> bool:
+    if job.status != Job.SUCCEEDED or not job.result:
+        return False
+    expires_at = parse_datetime(job.result.get("expires_at") or "")
+    if expires_at is not None and expires_at <= timezone.now():
+        return False
+    return default_storage.exists(job.result["name"])
+
+
+def as_dict(job: Job) -> dict:
+    data = {"id": job.pk, "status": job.status, "progress": job.progress or {}, "created_at": job.created_at}
+    if job.status == Job.SUCCEEDED and job.result:
+        data.update({key: job.result.get(key) for key in ("posts", "files", "size")})
+        data["expires_at"] = parse_datetime(job.result.get("expires_at") or "")
+        data["available"] = available(job)
+    return data
+
+
+def file_chunks(name: str):
+    with default_storage.open(name, "rb") as fh:
+        yield from fh.chunks()
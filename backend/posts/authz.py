@@ -0,0 +1,106 @@
+"""
+Group authorization: one {group_id: role} map per user.
+
+Every "is this user the owner, a moderator or a member of the group" check
+goes through `role_in`. The map is loaded with two small queries and
+memoized on the user object (Django builds one per request). With a cache
+shared by every process (database, Redis, Memcached) it is also cached across
+requests under authz:roles:<user id>, and receivers in posts/models.py drop
+it when one of the user's memberships changes, a group they own (or owned)
+changes hands, or the user is deleted. A per-process cache (locmem, file) is
+not used: dropping the map there would miss the other workers, and a removed
+member would keep access until the entry expired.
+"""
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+
+from .models import Group, GroupMembership
+
+OWNER = "owner"
+MODERATOR = "moderator"
+MEMBER = "member"
+
+
+def cache_seconds() -> int:
+    return int(getattr(settings, "AUTHZ_CACHE_SECONDS", 300))
+
+
+def shared_cache() -> bool:
+    """Whether roles are cached across requests: only in a cache every process sees."""
+    return cache_seconds() > 0 and not isinstance(caches["default"], (LocMemCache, FileBasedCache, DummyCache))
+
+
+def cache_key(user_id: int) -> str:
+    return f"authz:roles:{user_id}"
+
+
+def load(user_id: int) -> dict[int, str]:
+    roles = dict(GroupMembership.objects.filter(user_id=user_id).values_list("group_id", "role"))
+    for group_id in Group.objects.filter(owner_id=user_id).values_list("id", flat=True):
+        roles[group_id] = OWNER
+    return roles
+
+
+def roles(user) -> dict[int, str]:
+    if user is None or not user.is_authenticated:
+        return {}
+    memo = getattr(user, "_authz_roles", None)
+    if memo is None:
+        if not shared_cache():
+            memo = load(user.id)
+        else:
+            memo = cache.get(cache_key(user.id))
+            if memo is None:
+                memo = load(user.id)
+                cache.set(cache_key(user.id), memo, cache_seconds())
+        user._authz_roles = memo
+    return memo
+
+
+def role_in(user, group_id) -> str | None:
+    try:
+        return roles(user).get(int(group_id))
+    except (TypeError, ValueError):
+        return None
+
+
+def is_member(user, group_id) -> bool:
+    """Owner or member (any role)."""
+    return role_in(user, group_id) is not None
+
+
+def is_owner(user, group_id) -> bool:
+    return role_in(user, group_id) == OWNER
+
+
+def can_moderate(user, group_id) -> bool:
+    return role_in(user, group_id) in (OWNER, MODERATOR)
+
+
+def can_edit_post(user, post) -> bool:
+    return post.author_id == user.id or can_moderate(user, post.group_id)
+
+
+def group_ids(user) -> list[int]:
+    return list(roles(user))
+
+
+def invalidate(*user_ids) -> None:
+    keys = [cache_key(uid) for uid in set(user_ids) if uid]
+    if not keys or not shared_cache():
+        return
+    cache.delete_many(keys)
+    # Drop again after commit so a concurrent request cannot re-cache pre-commit roles.
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def forget(user) -> None:
+    """
+    Drop the memo kept on this user object, so the next check reads the shared
+    cache (or the database): on logout and user deletion, and before each realtime delivery.
+    """
+    user.__dict__.pop("_authz_roles", None)
@@ -0,0 +1,197 @@
+"""
+Content-addressed storage for post images, group covers and their variants.
+
+Files saved through a BlobImageField (Post.image, Group.cover), and every
+variant written by posts.variants, are hashed (SHA-256) chunk by chunk as
+they stream in and stored once per distinct content, under
+blobs/<aa>/<bb>/<sha256>.<ext>. An identical upload reuses the existing
+Blob and writes nothing.
+
+`Blob.refs` counts the rows pointing at a blob: the file field itself plus
+each file named in `image_variants` / `cover_variants`. The receivers in
+posts.models keep it in step with saves and deletes, posts.variants with
+builds, and updates go through posts.counters so bulk deletes inside
+`counters.batched()` collapse into a few UPDATEs. Unreferenced blobs are
+not removed right away: `collect()` (run by `prune_blobs`) deletes them once
+they have stayed unreferenced for BLOB_GRACE_HOURS, so URLs already handed
+out keep working for a while and a re-upload can revive them. Retention,
+which deletes posts for good, removes the files it released at once with
+`delete_released()`, including legacy files saved before blobs existed.
+"""
+import hashlib
+import posixpath
+import re
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from . import counters, imaging
+from .models import Blob, Group, Post
+
+FIELDS = {Post: "image", Group: "cover"}
+EXTENSION = re.compile(r"^[a-z0-9]{1,8}$")
+
+
+def grace_hours() -> int:
+    return int(getattr(settings, "BLOB_GRACE_HOURS", 24))
+
+
+def blob_name(sha: str, filename: str) -> str:
+    ext = posixpath.splitext(filename or "")[1].lstrip(".").lower()
+    ext = "jpg" if ext == "jpeg" else ext
+    return f"blobs/{sha[:2]}/{sha[2:4]}/{sha}" + (f".{ext}" if EXTENSION.match(ext) else "")
+
+
+def digest(chunks) -> tuple[str, int]:
+    """(hex SHA-256, size) of an iterable of byte chunks."""
+    sha, size = hashlib.sha256(), 0
+    for chunk in chunks:
+        sha.update(chunk)
+        size += len(chunk)
+    return sha.hexdigest(), size
+
+
+def store(content, filename: str, storage=None) -> Blob:
+    """Store a django File once per content; `filename` only supplies the extension."""
+    storage = storage or default_storage
+    sha, size = digest(content.chunks())
+    blob = Blob.objects.filter(sha256=sha).first()
+    # Clearing orphaned_at also fails if a collection pass deleted the row meanwhile.
+    if blob is not None and Blob.objects.filter(pk=blob.pk).update(orphaned_at=None):
+        return blob
+    name = storage.save(blob_name(sha, filename), content)
+    try:
+        with transaction.atomic():
+            return Blob.objects.create(name=name, sha256=sha, size=size)
+    except IntegrityError:
+        # The same content was stored concurrently; keep that copy.
+        blob = Blob.objects.get(sha256=sha)
+        if blob.name != name:
+            storage.delete(name)
+        return blob
+
+
+def referenced(source: str, variants: dict) -> list[str]:
+    """Blob names used by one file field: the file and each variant file (repeats included)."""
+    names = [source] if source else []
+    for variant, _ in imaging.VARIANTS:
+        entry = (variants or {}).get(variant) or {}
+        names.extend(entry[fmt] for fmt in imaging.FORMATS if entry.get(fmt))
+    return names
+
+
+def references(instance) -> list[str]:
+    field = FIELDS[type(instance)]
+    return referenced(getattr(instance, field).name or "", getattr(instance, f"{field}_variants"))
+
+
+def swap(previous, current) -> None:
+    """Move references from the names in `previous` to those in `current`."""
+    previous, current = Counter(previous), Counter(current)
+    for name, n in (current - previous).items():
+        counters.bump(Blob, name, "refs", n)
+    for name, n in (previous - current).items():
+        counters.bump(Blob, name, "refs", -n)
+
+
+def remember(instance, update_fields=None) -> None:
+    """pre_save: note which blobs the row used before this save."""
+    field = FIELDS[type(instance)]
+    if instance._state.adding:
+        instance._blobs_previous = []
+    elif update_fields is None or {field, f"{field}_variants"} & set(update_fields):
+        row = type(instance).objects.filter(pk=instance.pk).values_list(field, f"{field}_variants").first()
+        instance._blobs_previous = referenced(row[0] or "", row[1]) if row else []
+
+
+def saved(instance) -> None:
+    previous = instance.__dict__.pop("_blobs_previous", None)
+    if previous is not None:
+        swap(previous, references(instance))
+
+
+def recount() -> int:
+    """Recompute every Blob.refs from the rows; returns how many counts changed."""
+    counts = Counter()
+    for model, field in FIELDS.items():
+        rows = model.objects.values_list(field, f"{field}_variants")
+        for source, variants in rows.iterator(chunk_size=2000):
+            counts.update(referenced(source or "", variants))
+    changed = []
+    for blob in Blob.objects.only("name", "refs").iterator(chunk_size=2000):
+        if blob.refs != counts[blob.name]:
+            blob.refs = counts[blob.name]
+            changed.append(blob)
+    Blob.objects.bulk_update(changed, ["refs"], batch_size=500)
+    return len(changed)
+
+
+def collect(grace: float | None = None, storage=None, workers: int = 1) -> tuple[int, int]:
+    """
+    Mark newly unreferenced blobs and delete those unreferenced for longer
+    than `grace` hours, files included, `workers` files at a time.
+    Returns (deleted, bytes freed).
+    """
+    storage = storage or default_storage
+    now = timezone.now()
+    Blob.objects.filter(refs__gt=0, orphaned_at__isnull=False).update(orphaned_at=None)
+    Blob.objects.filter(refs=0, orphaned_at__isnull=True).update(orphaned_at=now)
+    cutoff = now - timedelta(hours=grace_hours() if grace is None else grace)
+    expired = Blob.objects.filter(refs=0, orphaned_at__lte=cutoff).values_list("name", "size").iterator(chunk_size=500)
+    deleted = freed = 0
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        for batch in _batches(expired, 500):
+            # Re-checked per row: a store() or acquire since the scan keeps the blob.
+            gone = [(name, size) for name, size in batch if Blob.objects.filter(pk=name, refs=0, orphaned_at__lte=cutoff).delete()[0]]
+            list(pool.map(storage.delete, [name for name, _ in gone]))
+            deleted += len(gone)
+            freed += sum(size for _, size in gone)
+    return deleted, freed
+
+
+def delete_released(names, storage=None, workers: int = 1) -> tuple[int, int]:
+    """
+    Delete the files named in `names`, released by rows that are gone, without
+    waiting for the grace period: blobs nothing references any more, and legacy
+    files (not in the Blob table) that no post or cover names. Returns
+    (deleted, bytes freed).
+    """
+    storage = storage or default_storage
+    names = set(names)
+    if not names:
+        return 0, 0
+    known = dict(Blob.objects.filter(pk__in=names).values_list("name", "size"))
+    # Re-checked per row, as in collect(): a store() or acquire meanwhile keeps the blob.
+    gone = [name for name in known if Blob.objects.filter(pk=name, refs=0).delete()[0]]
+    legacy = names - set(known)
+    for model, field in FIELDS.items():
+        if legacy:
+            legacy -= set(model.objects.filter(**{f"{field}__in": legacy}).values_list(field, flat=True))
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        list(pool.map(storage.delete, gone))
+        legacy_sizes = list(pool.map(lambda name: _delete_file(storage, name), legacy))
+    return len(gone) + sum(1 for size in legacy_sizes if size is not None), (
+        sum(known[name] for name in gone) + sum(size or 0 for size in legacy_sizes)
+    )
+
+
+def _delete_file(storage, name: str) -> int | None:
+    """Delete a file outside the Blob table; its size, or None if it was already gone."""
+    try:
+        size = storage.size(name)
+    except (OSError, NotImplementedError):
+        return None
+    storage.delete(name)
+    return size
+
+
+def _batches(iterable, size: int):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
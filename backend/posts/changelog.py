@@ -0,0 +1,143 @@
+"""
+Append-only change log behind the delta-sync endpoint.
+
+Save/delete receivers append one ChangeLogEntry per change to a post,
+comment, group or membership, tagged with the group it belongs to and, for
+groups and memberships, the user it concerns. Clients keep the id of the
+last entry they saw as an opaque token and ask for what changed after it.
+
+Ids are handed out at INSERT time, but concurrent transactions commit in any
+order, so a lower id can become visible after a higher one was already
+served. Entries are therefore only served, and tokens only advance, once
+they are CHANGELOG_SYNC_LAG_SECONDS old (default 5): a client misses nothing
+written by a transaction that commits within that long of writing its
+entries.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from . import authz, threads
+from .models import ChangeLogEntry, Comment, Group, GroupMembership, Post
+
+DEFAULT_LIMIT = 500
+
+
+def retention_days() -> int:
+    return int(getattr(settings, "CHANGELOG_RETENTION_DAYS", 7))
+
+
+def sync_lag_seconds() -> float:
+    return float(getattr(settings, "CHANGELOG_SYNC_LAG_SECONDS", 5))
+
+
+def settled():
+    """Entries old enough that every lower id has committed or never will."""
+    return ChangeLogEntry.objects.filter(created_at__lte=timezone.now() - timedelta(seconds=sync_lag_seconds()))
+
+
+def record(kind: str, action: str, object_id: int, group_id=None, user_id=None) -> None:
+    ChangeLogEntry.objects.create(kind=kind, action=action, object_id=object_id, group_id=group_id, user_id=user_id)
+
+
+def record_many(kind: str, action: str, rows) -> None:
+    """record() for many (object_id, group_id) pairs in one INSERT."""
+    ChangeLogEntry.objects.bulk_create(
+        [ChangeLogEntry(kind=kind, action=action, object_id=oid, group_id=gid) for oid, gid in rows]
+    )
+
+
+def post_group_id(comment: Comment):
+    if Comment.post.is_cached(comment):
+        return comment.post.group_id
+    return Post.objects.filter(pk=comment.post_id).values_list("group_id", flat=True).first()
+
+
+def latest_token() -> str:
+    return str(settled().order_by("-id").values_list("id", flat=True).first() or 0)
+
+
+def parse_token(raw):
+    try:
+        value = int(raw)
+    except (TypeError, ValueError):
+        return None
+    return value if 0 <= value < 2**63 else None
+
+
+def visible_group_ids(user) -> list[int]:
+    return authz.group_ids(user)
+
+
+def entries_for(user, since: int, limit: int = DEFAULT_LIMIT) -> tuple[list[ChangeLogEntry], bool]:
+    rows = list(
+        settled().filter(id__gt=since)
+        .filter(Q(group_id__in=visible_group_ids(user)) | Q(user_id=user.id))
+        .order_by("id")[: limit + 1]
+    )
+    return rows[:limit], len(rows) > limit
+
+
+def _payloads(latest: dict, request) -> dict:
+    """Current representation of every upserted object, keyed by (kind, id)."""
+    from .serializers import GroupSerializer, PostSerializer
+
+    ids = {kind: [pk for (k, pk), e in latest.items() if k == kind and e.action == "upsert"] for kind, _ in ChangeLogEntry.KIND_CHOICES}
+    context = {"request": request}
+    found = {}
+    posts = Post.objects.filter(pk__in=ids["post"]).select_related("author")
+    for item in PostSerializer(posts, many=True, context=context).data:
+        found[("post", item["id"])] = item
+    for comment in Comment.objects.filter(pk__in=ids["comment"]):
+        found[("comment", comment.id)] = threads.node(comment)
+    groups = Group.objects.filter(pk__in=ids["group"]).select_related("owner")
+    for item in GroupSerializer(groups, many=True, context=context).data:
+        found[("group", item["id"])] = item
+    memberships = GroupMembership.objects.filter(pk__in=ids["membership"]).select_related("user")
+    for m in memberships:
+        found[("membership", m.id)] = {
+            "id": m.id,
+            "group_id": m.group_id,
+            "user_id": m.user_id,
+            "username": m.user.username,
+            "role": m.role,
+        }
+    return found
+
+
+def changes(user, since: int, request=None, limit: int = DEFAULT_LIMIT) -> dict:
+    """Changes visible to `user` after token `since`, one item per object (latest state)."""
+    oldest = ChangeLogEntry.objects.order_by("id").values_list("id", flat=True).first()
+    if oldest is not None and since < oldest - 1:
+        # Entries the client has not seen were pruned; it has to reload everything.
+        return {"token": latest_token(), "reset": True, "has_more": False, "changes": []}
+    entries, has_more = entries_for(user, since, limit)
+    if not entries:
+        return {"token": str(since), "reset": False, "has_more": False, "changes": []}
+    latest = {}
+    for entry in entries:
+        latest.pop((entry.kind, entry.object_id), None)
+        latest[(entry.kind, entry.object_id)] = entry
+    found = _payloads(latest, request)
+    items = []
+    for key, entry in latest.items():
+        data = found.get(key)
+        # An upsert whose row has since been deleted is reported as a delete.
+        action = "upsert" if data is not None else "delete"
+        items.append({
+            "token": str(entry.id),
+            "kind": entry.kind,
+            "action": action,
+            "id": entry.object_id,
+            "group_id": entry.group_id,
+            "data": data,
+        })
+    return {"token": str(entries[-1].id), "reset": False, "has_more": has_more, "changes": items}
+
+
+def prune(days=None) -> int:
+    cutoff = timezone.now() - timedelta(days=retention_days() if days is None else days)
+    deleted, _ = ChangeLogEntry.objects.filter(created_at__lt=cutoff).delete()
+    return deleted
@@ -0,0 +1,52 @@
+"""
+Denormalized counters (Group.post_count, Group.member_count, Post.comment_count).
+
+Counters are adjusted with F() expressions so concurrent writers never lose
+an increment. Bulk paths wrap their work in `batched()` so that per-row
+signal updates collapse into one UPDATE per distinct delta.
+"""
+from collections import defaultdict
+from contextlib import contextmanager
+import threading
+
+from django.db.models import F
+from django.db.models.functions import Greatest
+
+_state = threading.local()
+
+
+def _apply(model, pks, field: str, delta: int) -> None:
+    if not pks or not delta:
+        return
+    expr = F(field) + delta if delta > 0 else Greatest(F(field) + delta, 0)
+    model.objects.filter(pk__in=pks).update(**{field: expr})
+
+
+def bump(model, pk, field: str, delta: int = 1) -> None:
+    """Add `delta` to `model.field` for the row `pk` (deferred inside `batched()`)."""
+    pending = getattr(_state, "pending", None)
+    if pending is not None:
+        pending[(model, field)][pk] += delta
+        return
+    _apply(model, [pk], field, delta)
+
+
+@contextmanager
+def batched():
+    """Collect counter updates made inside the block and apply them on exit."""
+    if getattr(_state, "pending", None) is not None:
+        # Nested: the outermost block flushes.
+        yield
+        return
+    _state.pending = defaultdict(lambda: defaultdict(int))
+    try:
+        yield
+        pending = _state.pending
+    finally:
+        _state.pending = None
+    for (model, field), deltas in pending.items():
+        by_delta = defaultdict(list)
+        for pk, delta in deltas.items():
+            by_delta[delta].append(pk)
+        for delta, pks in by_delta.items():
+            _apply(model, pks, field, delta)
@@ -0,0 +1,63 @@
+"""
+Strong ETags built from the Group.version / Post.version counters.
+
+Receivers in posts/models.py bump a group's version whenever the group, its
+members, posts or comments change, and a post's version whenever the post or
+its comments change. Renaming a user or editing a profile bumps one
+site-wide accounts version, since names show up on pages of every group the
+user is in; it is kept in the database (posts.versions) so every process sees
+the bump. A tag over (user, day, query string, accounts version, versions)
+therefore changes whenever the response could, and views can compare it
+against If-None-Match with two small queries, before any serializer or
+template work.
+"""
+import hashlib
+
+from django.utils import timezone
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+from . import versions as cache_versions
+
+
+ACCOUNTS_VERSION = "etags:accounts"
+
+
+def accounts_version() -> int:
+    return cache_versions.get(ACCOUNTS_VERSION)
+
+
+def accounts_changed() -> None:
+    """Retire every tag when the transaction commits (a name or profile changed)."""
+    cache_versions.bump(ACCOUNTS_VERSION)
+
+
+def make(request, *parts) -> str:
+    query = sorted(request.GET.lists())
+    user_id = getattr(request.user, "id", None)
+    raw = repr((request.path, query, user_id, timezone.localdate().isoformat(), accounts_version(), parts))
+    return '"%s"' % hashlib.sha256(raw.encode()).hexdigest()[:40]
+
+
+def matches(request, etag: str) -> bool:
+    header = request.META.get("HTTP_IF_NONE_MATCH")
+    if not header:
+        return False
+    tags = parse_etags(header)
+    # If-None-Match uses the weak comparison.
+    return "*" in tags or etag in {t.removeprefix("W/") for t in tags}
+
+
+def versions(queryset) -> list:
+    """(id, version) pairs of `queryset`, in id order."""
+    return list(queryset.order_by("id").values_list("id", "version"))
+
+
+def headers(etag: str) -> dict:
+    # Per-user data: browsers revalidate every time, shared caches keep out.
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers(etag))
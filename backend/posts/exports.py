@@ -0,0 +1,163 @@
+"""
+Streaming exports of a user's own posts, as CSV or NDJSON.
+
+Posts are read with `values_list().iterator()` a chunk at a time and each
+chunk is written out before the next is read, so memory stays flat however
+much history the user has. NDJSON lines carry the post's comments, fetched
+with one query per chunk of posts. Both formats accept `start`/`end`
+(inclusive dates) and repeated `group` ids as filters. `json_chunks` streams
+the API's JSON array export the same way, serializing a chunk at a time.
+
+Under ASGI, Django would collect a synchronous iterator into a list before
+sending it, so `response()` hands it an async iterator that pulls one chunk
+at a time from a worker thread instead.
+"""
+import csv
+import io
+import json
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.utils.dateparse import parse_date
+
+from .models import Comment, Post
+
+CHUNK_SIZE = 500
+FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+# The first three match what the CSV importer reads back.
+CSV_COLUMNS = ("group_name", "caption", "date", "id", "group_id", "created_at", "comment_count", "image_url")
+POST_FIELDS = ("id", "group_id", "group__name", "caption", "date", "created_at", "comment_count", "image")
+COMMENT_FIELDS = ("id", "post_id", "parent_id", "user_name", "text", "created_at")
+
+
+def parse_filters(params) -> dict:
+    """{"start", "end", "group_ids"} from query parameters; raises ValueError for malformed values."""
+    filters = {}
+    for key in ("start", "end"):
+        raw = (params.get(key) or "").strip()
+        if raw:
+            filters[key] = parse_date(raw)
+            if filters[key] is None:
+                raise ValueError(f"{key} must be a date (YYYY-MM-DD).")
+    groups = [g for g in params.getlist("group") if g.strip()]
+    if groups:
+        try:
+            filters["group_ids"] = [int(g) for g in groups]
+        except ValueError:
+            raise ValueError("group must be a group id.")
+    return filters
+
+
+def queryset(user, start=None, end=None, group_ids=None):
+    qs = Post.objects.filter(author=user)
+    if start:
+        qs = qs.filter(date__gte=start)
+    if end:
+        qs = qs.filter(date__lte=end)
+    if group_ids:
+        qs = qs.filter(group_id__in=group_ids)
+    return qs.order_by("-created_at", "-id")
+
+
+def _batches(iterable, size: int = CHUNK_SIZE):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def rows(user, filters, request=None):
+    """Batches of post dicts, read with one server-side cursor. `image` is the storage name."""
+    storage = Post._meta.get_field("image").storage
+    values = queryset(user, **filters).values_list(*POST_FIELDS).iterator(chunk_size=CHUNK_SIZE)
+    for batch in _batches(values):
+        result = []
+        for pk, group_id, group_name, caption, day, created_at, comment_count, image in batch:
+            url = storage.url(image) if image else None
+            result.append({
+                "id": pk,
+                "group_id": group_id,
+                "group_name": group_name,
+                "caption": caption,
+                "date": day,
+                "created_at": created_at,
+                "comment_count": comment_count,
+                "image_url": request.build_absolute_uri(url) if request and url else url,
+                "image": image,
+            })
+        yield result
+
+
+def csv_chunks(user, filters, request=None):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CSV_COLUMNS, extrasaction="ignore")
+    writer.writeheader()
+    for batch in rows(user, filters, request):
+        writer.writerows({**row, "created_at": row["created_at"].isoformat()} for row in batch)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _public(row: dict) -> dict:
+    return {key: value for key, value in row.items() if key != "image"}
+
+
+def comments_for(batch) -> dict:
+    """{post id: [comment dicts]} for a batch of post dicts, in one query."""
+    comments = {row["id"]: [] for row in batch}
+    for comment in Comment.objects.filter(post_id__in=list(comments)).order_by("post_id", "id").values(*COMMENT_FIELDS):
+        comments[comment.pop("post_id")].append(comment)
+    return comments
+
+
+def ndjson_chunks(user, filters, request=None):
+    for batch in rows(user, filters, request):
+        comments = comments_for(batch)
+        yield "".join(
+            json.dumps({**row, "comments": comments[row["id"]]}, cls=DjangoJSONEncoder) + "\n"
+            for row in map(_public, batch)
+        )
+
+
+def json_chunks(user, filters, serialize):
+    """A JSON array of `serialize(posts)` output, built one chunk of posts at a time."""
+    yield "["
+    first = True
+    pks = queryset(user, **filters).values_list("pk", flat=True).iterator(chunk_size=CHUNK_SIZE)
+    for batch in _batches(pks):
+        posts = queryset(user).filter(pk__in=batch).select_related("author")
+        items = ",".join(json.dumps(item, cls=DjangoJSONEncoder) for item in serialize(list(posts)))
+        yield ("" if first else ",") + items
+        first = False
+    yield "]"
+
+
+async def _async_chunks(chunks):
+    # One thread hop per chunk; thread_sensitive keeps every read on the same DB connection.
+    chunks = iter(chunks)
+    next_chunk = sync_to_async(lambda: next(chunks, None), thread_sensitive=True)
+    while (chunk := await next_chunk()) is not None:
+        yield chunk
+
+
+def stream(request, chunks, content_type: str, filename: str | None = None) -> StreamingHttpResponse:
+    if isinstance(request, ASGIRequest):
+        chunks = _async_chunks(chunks)
+    response = StreamingHttpResponse(chunks, content_type=content_type)
+    if filename:
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    response["Cache-Control"] = "no-store"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+def response(request, user, fmt: str, filters: dict) -> StreamingHttpResponse:
+    chunks = csv_chunks if fmt == "csv" else ndjson_chunks
+    return stream(request, chunks(user, filters, request), FORMATS[fmt], f"my_posts.{fmt}")
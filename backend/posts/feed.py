@@ -0,0 +1,187 @@
+"""
+Materialized per-user feed (fan-out on write).
+
+Each new post writes one FeedEntry per reader (group owner, members and the
+author), so reading a user's "today" feed is a range scan on
+(user, date, created_at) instead of the Post x membership join with DISTINCT.
+Groups whose audience exceeds FEED_FANOUT_MAX_MEMBERS are not fanned out;
+readers of such groups fall back to the join query.
+
+Only today's rows are read. The `prune` job (scheduled in JOB_SCHEDULE)
+deletes rows older than FEED_KEEP_DAYS days, so the table holds a day or two
+of posts rather than the whole history.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from . import jobs
+from .models import FeedEntry, Group, GroupMembership, Post
+
+PRUNE_BATCH = 5000
+
+
+def max_fanout_members() -> int:
+    return int(getattr(settings, "FEED_FANOUT_MAX_MEMBERS", 500))
+
+
+def keep_days() -> int:
+    return max(1, int(getattr(settings, "FEED_KEEP_DAYS", 2)))
+
+
+def group_audience(group: Group) -> set[int]:
+    ids = set(GroupMembership.objects.filter(group_id=group.id).values_list("user_id", flat=True))
+    ids.add(group.owner_id)
+    return ids
+
+
+def _entries_for(post: Post, user_ids) -> list[FeedEntry]:
+    return [
+        FeedEntry(user_id=uid, post_id=post.id, group_id=post.group_id, date=post.date, created_at=post.created_at)
+        for uid in user_ids
+    ]
+
+
+def disable_fanout(group: Group) -> None:
+    Group.objects.filter(pk=group.pk).update(feed_fanout=False)
+    group.feed_fanout = False
+    FeedEntry.objects.filter(group_id=group.pk).delete()
+
+
+def fan_out_post(post: Post) -> int:
+    """Write feed rows for a freshly created post. Returns the number of readers."""
+    group = post.group
+    if not group.feed_fanout:
+        # The author still sees their own post through the fallback query.
+        return 0
+    audience = group_audience(group)
+    if len(audience) > max_fanout_members():
+        disable_fanout(group)
+        return 0
+    audience.add(post.author_id)
+    FeedEntry.objects.bulk_create(_entries_for(post, audience), ignore_conflicts=True)
+    return len(audience)
+
+
+def fan_out_posts(group: Group, posts) -> int:
+    """fan_out_post for many new posts of one group (bulk imports), reading its audience once."""
+    if not group.feed_fanout or not posts:
+        return 0
+    audience = group_audience(group)
+    if len(audience) > max_fanout_members():
+        disable_fanout(group)
+        return 0
+    entries = [entry for post in posts for entry in _entries_for(post, audience | {post.author_id})]
+    FeedEntry.objects.bulk_create(entries, batch_size=1000, ignore_conflicts=True)
+    return len(entries)
+
+
+def add_member(user_id: int, group: Group, date=None) -> int:
+    """Backfill the day's posts of a group into a new member's feed."""
+    if not group.feed_fanout:
+        return 0
+    date = date or timezone.localdate()
+    posts = Post.objects.filter(group_id=group.id, date=date).only("id", "group_id", "date", "created_at")
+    entries = [e for p in posts for e in _entries_for(p, [user_id])]
+    FeedEntry.objects.bulk_create(entries, ignore_conflicts=True)
+    return len(entries)
+
+
+def remove_member(user_id: int, group_id: int) -> int:
+    """Prune a group's posts from a departing member's feed (their own posts stay)."""
+    deleted, _ = (
+        FeedEntry.objects.filter(user_id=user_id, group_id=group_id)
+        .exclude(post__author_id=user_id)
+        .exclude(group__owner_id=user_id)
+        .delete()
+    )
+    return deleted
+
+
+def change_owner(group: Group, previous_owner_id: int) -> None:
+    """Move a group's feed rows for today from its previous owner to its new one."""
+    add_member(group.owner_id, group)
+    if not GroupMembership.objects.filter(group_id=group.id, user_id=previous_owner_id).exists():
+        remove_member(previous_owner_id, group.id)
+
+
+def prune_before(date) -> int:
+    """Delete feed rows dated before `date`, a batch per statement. Returns the number deleted."""
+    deleted = 0
+    while True:
+        ids = list(FeedEntry.objects.filter(date__lt=date).values_list("id", flat=True)[:PRUNE_BATCH])
+        if not ids:
+            return deleted
+        deleted += FeedEntry.objects.filter(pk__in=ids).delete()[0]
+
+
+@jobs.task()
+def prune(ctx, days: int | None = None) -> int:
+    """Delete rows that are no longer read: older than FEED_KEEP_DAYS days (today counts as one)."""
+    return prune_before(timezone.localdate() - timedelta(days=(days or keep_days()) - 1))
+
+
+def legacy_feed_queryset(user, date):
+    return (
+        Post.objects.filter(date=date)
+        .filter(Q(author=user) | Q(group__members=user) | Q(group__owner=user))
+        .distinct()
+    )
+
+
+def has_unfanned_groups(user) -> bool:
+    return Group.objects.filter(feed_fanout=False).filter(Q(owner=user) | Q(members=user)).exists()
+
+
+def feed_queryset(user, date=None):
+    """Posts visible to `user` on `date` (today by default)."""
+    date = date or timezone.localdate()
+    if has_unfanned_groups(user):
+        return legacy_feed_queryset(user, date)
+    return Post.objects.filter(feed_entries__user=user, feed_entries__date=date)
+
+
+def rebuild(date=None, batch_size: int = 500, stdout=None) -> int:
+    """
+    Recreate every feed row for `date` from posts and memberships. Fan-out
+    is only switched back on when rebuilding today: a group's rows for other
+    days were deleted when it was switched off, so re-enabling it from a
+    past day would hide today's posts from its members.
+    """
+    today = timezone.localdate()
+    date = date or today
+    limit = max_fanout_members()
+    if date == today:
+        # Groups that shrank back under the limit are fanned out again; today's rows are rebuilt below.
+        for group in Group.objects.filter(feed_fanout=False):
+            if len(group_audience(group)) <= limit:
+                Group.objects.filter(pk=group.pk).update(feed_fanout=True)
+    FeedEntry.objects.filter(date=date).delete()
+    audiences: dict[int, set[int]] = {}
+    written = 0
+    batch: list[FeedEntry] = []
+    posts = Post.objects.filter(date=date).select_related("group").order_by("id")
+    for post in posts.iterator(chunk_size=batch_size):
+        group = post.group
+        if group.id not in audiences:
+            audience = group_audience(group)
+            fanout = group.feed_fanout and len(audience) <= limit
+            if group.feed_fanout and not fanout:
+                disable_fanout(group)
+            audiences[group.id] = audience if fanout else set()
+        readers = audiences[group.id]
+        if not readers:
+            continue
+        batch.extend(_entries_for(post, readers | {post.author_id}))
+        if len(batch) >= batch_size:
+            FeedEntry.objects.bulk_create(batch, ignore_conflicts=True)
+            written += len(batch)
+            batch = []
+            if stdout is not None:
+                stdout.write(f"  {written} feed rows written...")
+    if batch:
+        FeedEntry.objects.bulk_create(batch, ignore_conflicts=True)
+        written += len(batch)
+    return written
@@ -0,0 +1,69 @@
+"""
+Per-group, per-day cache of the serialized "today" feed.
+
+The feed of a group is the same for every member, so the page served for
+`/api/posts/?group_id=` is cached once per (group, day, query) under a key
+that embeds Group.version. Post/comment saves and deletes, cover updates
+and membership changes bump that version (see the version_* receivers in
+posts/models.py), so stale pages are never read again; they just age out.
+
+Only portable cache operations are used (get/set/add/incr), so any Django
+backend works: local memory, file-based or database. Hit/miss counters are
+kept in the same cache; with a shared backend they add up across workers.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+
+STATS_KEYS = {"hits": "groupfeed:stats:hits", "misses": "groupfeed:stats:misses"}
+
+
+def cache():
+    return caches[getattr(settings, "FEED_CACHE_ALIAS", "default")]
+
+
+def cache_seconds() -> int:
+    return int(getattr(settings, "FEED_CACHE_SECONDS", 3600))
+
+
+def cache_key(request, group_id: int, version: int, day=None) -> str:
+    day = day or timezone.localdate()
+    # Absolute image/next URLs depend on the host; paging and search on the query.
+    variant = repr((request.get_host(), sorted(request.GET.lists())))
+    digest = hashlib.sha256(variant.encode()).hexdigest()[:24]
+    return f"groupfeed:{group_id}:{day.isoformat()}:{version}:{digest}"
+
+
+def _count(stat: str) -> None:
+    key = STATS_KEYS[stat]
+    backend = cache()
+    try:
+        backend.incr(key)
+    except ValueError:
+        # First event since the counter expired; a concurrent add wins, then incr.
+        if not backend.add(key, 1, None):
+            backend.incr(key)
+
+
+def get(key: str):
+    data = cache().get(key)
+    _count("misses" if data is None else "hits")
+    return data
+
+
+def store(key: str, data) -> None:
+    cache().set(key, data, cache_seconds())
+
+
+def stats() -> dict:
+    values = cache().get_many(list(STATS_KEYS.values()))
+    hits = values.get(STATS_KEYS["hits"], 0)
+    misses = values.get(STATS_KEYS["misses"], 0)
+    total = hits + misses
+    return {"hits": hits, "misses": misses, "hit_rate": round(hits / total, 4) if total else None}
+
+
+def reset_stats() -> None:
+    cache().delete_many(list(STATS_KEYS.values()))
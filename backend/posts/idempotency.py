@@ -0,0 +1,109 @@
+"""
+Idempotency-Key support for POST endpoints that create things.
+
+A client sends the same `Idempotency-Key` header on every retry of one
+logical request. The first request claims the key, and its successful (2xx)
+response is stored for IDEMPOTENCY_KEY_HOURS. Retries get that stored
+response back (marked `Idempotent-Replayed: true`) and the view does not
+run again. Error responses are not stored, so a client can fix the problem
+and retry with the same key.
+
+The key is bound to the request's method, path and content: a digest of
+the form fields and uploaded files (multipart boundaries differ between
+retries, so not of the raw body), or of the raw body otherwise. Reusing a
+key with other content is answered with 422.
+"""
+import hashlib
+import json
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http import JsonResponse
+from django.utils import timezone
+
+from .models import IdempotencyKey
+
+HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+MAX_REQUEST_LENGTH = 300
+# A first request still unfinished after this long is taken to have died with its process.
+ABANDONED_SECONDS = 300
+
+
+def ttl_hours() -> int:
+    return int(getattr(settings, "IDEMPOTENCY_KEY_HOURS", 24))
+
+
+def prune() -> int:
+    deleted, _ = IdempotencyKey.objects.filter(created_at__lt=timezone.now() - timedelta(hours=ttl_hours())).delete()
+    return deleted
+
+
+def fingerprint(request) -> str:
+    digest = hashlib.sha256()
+    if request.content_type in ("multipart/form-data", "application/x-www-form-urlencoded"):
+        digest.update(json.dumps(sorted(request.POST.lists())).encode())
+        for field, files in sorted(request.FILES.lists()):
+            for upload in files:
+                digest.update(f"\0{field}\0{upload.name}\0{upload.size}\0".encode())
+                for chunk in upload.chunks():
+                    digest.update(chunk)
+                upload.seek(0)
+    else:
+        digest.update(request.body)
+    return f"{request.method} {request.path}"[:MAX_REQUEST_LENGTH - 65] + " " + digest.hexdigest()
+
+
+def _claim(user, key: str, fingerprint: str):
+    """Returns (record, None) for the first request with this key, or (None, response) for a retry."""
+    stale = IdempotencyKey.objects.filter(user=user, key=key, created_at__lt=timezone.now() - timedelta(hours=ttl_hours()))
+    stale.delete()
+    try:
+        with transaction.atomic():
+            return IdempotencyKey.objects.create(user=user, key=key, request=fingerprint), None
+    except IntegrityError:
+        pass
+    record = IdempotencyKey.objects.filter(user=user, key=key).first()
+    now = timezone.now()
+    if record is not None and record.status_code is None and record.created_at < now - timedelta(seconds=ABANDONED_SECONDS):
+        taken = IdempotencyKey.objects.filter(pk=record.pk, status_code__isnull=True, created_at=record.created_at)
+        if taken.update(created_at=now, request=fingerprint):
+            record.created_at, record.request = now, fingerprint
+            return record, None
+    if record is None or record.status_code is None:
+        return None, JsonResponse({"detail": "A request with this Idempotency-Key is still in progress."}, status=409)
+    if record.request != fingerprint:
+        return None, JsonResponse({"detail": "This Idempotency-Key was used for a different request."}, status=422)
+    response = JsonResponse(record.response, status=record.status_code, safe=False)
+    response["Idempotent-Replayed"] = "true"
+    return None, response
+
+
+def idempotent(view):
+    """Make a JSON-returning function view replay its first successful response for a repeated Idempotency-Key."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        key = (request.headers.get(HEADER) or "").strip()
+        if not key or not request.user.is_authenticated:
+            return view(request, *args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return JsonResponse({"detail": f"{HEADER} is longer than {MAX_KEY_LENGTH} characters."}, status=400)
+        record, replay = _claim(request.user, key, fingerprint(request))
+        if replay is not None:
+            return replay
+        try:
+            response = view(request, *args, **kwargs)
+        except Exception:
+            record.delete()
+            raise
+        if 200 <= response.status_code < 300 and response.get("Content-Type", "").startswith("application/json"):
+            record.status_code = response.status_code
+            record.response = json.loads(response.content)
+            record.save(update_fields=["status_code", "response"])
+        else:
+            record.delete()
+        return response
+
+    return wrapper
@@ -0,0 +1,173 @@
+"""
+Pillow side of the image variant pipeline (see posts.variants).
+
+Only Pillow is imported here so that `render` can run in a spawned worker
+process without setting up Django: it takes the uploaded bytes and returns
+the normalized original plus every variant as encoded bytes.
+"""
+import io
+
+from PIL import Image, ImageOps
+
+# (name, longest edge in px); each is written as WebP and JPEG.
+VARIANTS = (
+    ("thumb", 320),
+    ("feed", 1080),
+    ("full", 2048),
+)
+FORMATS = ("webp", "jpeg")
+EXTENSIONS = {"webp": "webp", "jpeg": "jpg", "png": "png"}
+
+JPEG_QUALITY = 82
+WEBP_QUALITY = 80
+ORIGINAL_QUALITY = 90
+# EXIF orientation tag.
+ORIENTATION = 0x0112
+
+# Metadata dropped when an original is kept as uploaded: JPEG APP1 (EXIF, XMP),
+# APP3-APP13 (IPTC and vendor data), APP15 and comments; APP0 (JFIF), APP2 (ICC
+# profile) and APP14 (Adobe colour transform) are needed to decode it the same way.
+JPEG_DROP = {0xE1, *range(0xE3, 0xEE), 0xEF, 0xFE}
+# PNG text, EXIF and timestamp chunks.
+PNG_DROP = {b"tEXt", b"zTXt", b"iTXt", b"eXIf", b"tIME"}
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+def _flatten(img: Image.Image) -> Image.Image:
+    """RGB copy of `img`, with transparency composited onto white."""
+    if img.mode == "RGB":
+        return img
+    if img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info):
+        rgba = img.convert("RGBA")
+        background = Image.new("RGB", rgba.size, (255, 255, 255))
+        background.paste(rgba, mask=rgba.getchannel("A"))
+        return background
+    return img.convert("RGB")
+
+
+def _encode(img: Image.Image, fmt: str, quality: int) -> bytes:
+    buf = io.BytesIO()
+    # No exif=/icc_profile= arguments, and an empty comment (Pillow would copy the upload's
+    # JPEG comment): nothing from the upload's metadata is carried over.
+    if fmt == "jpeg":
+        _flatten(img).save(buf, "JPEG", quality=quality, optimize=True, progressive=True, comment=b"")
+    elif fmt == "webp":
+        if img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGBA" if "A" in img.getbands() or "transparency" in img.info else "RGB")
+        img.save(buf, "WEBP", quality=quality, method=4)
+    else:
+        img.save(buf, "PNG", optimize=True)
+    return buf.getvalue()
+
+
+def _strip_jpeg(data: bytes) -> bytes | None:
+    """`data` without its JPEG_DROP segments, the entropy-coded data untouched; None if it can't be parsed."""
+    if data[:2] != b"\xff\xd8":
+        return None
+    out = [data[:2]]
+    i = 2
+    while i + 4 <= len(data):
+        if data[i] != 0xFF:
+            return None
+        marker = data[i + 1]
+        if marker == 0xFF:
+            # Fill byte before a marker.
+            i += 1
+            continue
+        if marker == 0xDA:
+            # Start of scan: everything from here on is image data.
+            out.append(data[i:])
+            return b"".join(out)
+        end = i + 2 + int.from_bytes(data[i + 2:i + 4], "big")
+        if marker not in JPEG_DROP:
+            out.append(data[i:end])
+        i = end
+    return None
+
+
+def _strip_png(data: bytes) -> bytes | None:
+    """`data` without its PNG_DROP chunks; None if it can't be parsed."""
+    if data[:8] != PNG_SIGNATURE:
+        return None
+    out = [data[:8]]
+    i = 8
+    while i + 12 <= len(data):
+        length = int.from_bytes(data[i:i + 4], "big")
+        kind = data[i + 4:i + 8]
+        end = i + 12 + length
+        if kind not in PNG_DROP:
+            out.append(data[i:end])
+        if kind == b"IEND":
+            return b"".join(out)
+        i = end
+    return None
+
+
+def _fit(img: Image.Image, edge: int) -> Image.Image:
+    if max(img.size) <= edge:
+        return img
+    resized = img.copy()
+    resized.thumbnail((edge, edge), Image.Resampling.LANCZOS)
+    return resized
+
+
+def render(data: bytes, max_edge: int, normalize: bool = True) -> dict:
+    """
+    Normalize an uploaded image and render its variants.
+
+    A JPEG or PNG that is already upright and within `max_edge` keeps its
+    encoded image data; only the metadata segments are dropped. Any other
+    original is rotated upright from its EXIF orientation, downscaled to
+    `max_edge` and re-encoded without metadata (PNGs stay PNG, everything
+    else becomes JPEG). With `normalize=False` (the data is an original that
+    was normalized before) only the variants are rendered and the original's
+    "data" is None. Returns {"original": {...}, "<variant>": {...}} where
+    each entry has "width", "height" and per-format "data"/"ext".
+    """
+    with Image.open(io.BytesIO(data)) as src:
+        size, mode = src.size, src.mode
+        original_format = "png" if src.format == "PNG" else "jpeg"
+        upright = src.getexif().get(ORIENTATION, 1) == 1
+        kept = None
+        if normalize and upright and max(size) <= max_edge and not getattr(src, "is_animated", False):
+            if src.format == "JPEG" and mode in ("RGB", "L"):
+                kept = _strip_jpeg(data)
+            elif src.format == "PNG":
+                kept = _strip_png(data)
+        src.draft("RGB", (max_edge, max_edge))
+        img = ImageOps.exif_transpose(src)
+        img.load()
+    if img.mode not in ("RGB", "RGBA", "L", "LA", "P"):
+        img = img.convert("RGB")
+    img = _fit(img, max_edge)
+
+    if not normalize:
+        original_data = None
+    elif kept is not None:
+        original_data = kept
+    else:
+        original_data = _encode(img, original_format, ORIGINAL_QUALITY)
+    result = {
+        "original": {
+            "width": img.width,
+            "height": img.height,
+            "ext": EXTENSIONS[original_format],
+            "data": original_data,
+        }
+    }
+    # Each variant is scaled down from the previous (larger) one.
+    current = img
+    for name, edge in sorted(VARIANTS, key=lambda v: -v[1]):
+        current = _fit(current, edge)
+        result[name] = {
+            "width": current.width,
+            "height": current.height,
+            "formats": {
+                fmt: {
+                    "ext": EXTENSIONS[fmt],
+                    "data": _encode(current, fmt, WEBP_QUALITY if fmt == "webp" else JPEG_QUALITY),
+                }
+                for fmt in FORMATS
+            },
+        }
+    return result
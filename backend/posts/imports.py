@@ -0,0 +1,182 @@
+"""
+Bulk import of posts from CSV (columns: group_name, caption).
+
+The file is read line by line, so memory use does not grow with its size.
+Group names resolve through an in-memory cache seeded with the groups the
+importing user belongs to; a name not found there creates a group owned by
+the user. Posts are inserted with bulk_create in batches of
+IMPORT_BATCH_SIZE, one transaction per batch. The work the Post post_save
+receivers would do per row is done once per batch instead: feed fan-out,
+counters, versions, rollups, streaks, change log, audit log, blob
+references and cache invalidation. Realtime events are not sent for
+imported posts; clients pick them up through /sync/ and the version
+counters.
+
+Imported posts share one placeholder image. Its variants are rendered once
+per import, so no per-post variant builds are scheduled.
+
+Uploads larger than IMPORT_INLINE_MAX_BYTES are copied to storage and run
+by the `import_csv` background job, which reports progress on its Job row.
+"""
+import csv
+import functools
+import io
+import logging
+import uuid
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from PIL import Image
+
+from . import authz, blobs, changelog, counters, feed, jobs, reports, rollups, streaks, variants
+from .models import AuditLog, Group, GroupMembership, Post
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_GROUP = "Imported"
+MAX_ERRORS = 100
+COLUMNS = ("group_name", "caption")
+
+
+def batch_size() -> int:
+    return max(1, int(getattr(settings, "IMPORT_BATCH_SIZE", 500)))
+
+
+def inline_max_bytes() -> int:
+    return int(getattr(settings, "IMPORT_INLINE_MAX_BYTES", 1024 * 1024))
+
+
+@functools.cache
+def placeholder_png() -> bytes:
+    """The placeholder image: one light grey pixel, encoded once per process."""
+    buf = io.BytesIO()
+    Image.new("L", (1, 1), 238).save(buf, "PNG")
+    return buf.getvalue()
+
+
+def lines(file):
+    """Decoded text lines of a django File (an upload or a storage file), read a chunk at a time."""
+    for i, line in enumerate(file):
+        yield line.decode("utf-8-sig" if i == 0 else "utf-8")
+
+
+class GroupCache:
+    def __init__(self, user):
+        self.user = user
+        self.by_name = {}
+        for group in Group.objects.filter(pk__in=authz.group_ids(user)).order_by("id"):
+            self.by_name.setdefault(group.name, group)
+
+    def get(self, name: str) -> Group:
+        group = self.by_name.get(name)
+        if group is None:
+            group = Group(name=name, owner=self.user)
+            group._actor = self.user
+            group.save()
+            GroupMembership.objects.get_or_create(user=self.user, group=group)
+            self.by_name[name] = group
+        return group
+
+
+def _placeholder() -> tuple[str, dict]:
+    storage = Post._meta.get_field("image").storage
+    source = blobs.store(ContentFile(placeholder_png()), "placeholder.png", storage).name
+    try:
+        return variants.render_blobs(storage, source)
+    except Exception:
+        # Pillow could not read the placeholder; the posts show the file as it is.
+        logger.warning("Could not render variants of the import placeholder", exc_info=True)
+        return source, {}
+
+
+def _insert(user, posts: list[Post], image: tuple[str, dict]) -> int:
+    """Insert one batch and apply the post_save side effects once per group."""
+    name, built = image
+    for post in posts:
+        post.image, post.image_variants = name, built
+    by_group = defaultdict(list)
+    with transaction.atomic(), counters.batched():
+        Post.objects.bulk_create(posts)
+        for post in posts:
+            by_group[post.group_id].append(post)
+        for group_id, group_posts in by_group.items():
+            counters.bump(Group, group_id, "post_count", len(group_posts))
+            counters.bump(Group, group_id, "version", 1)
+            rollups.bump(user.id, group_id, group_posts[0].date, "post_count", len(group_posts))
+            streaks.record_post(group_posts[0])
+            feed.fan_out_posts(group_posts[0].group, group_posts)
+        changelog.record_many("post", "upsert", [(post.id, post.group_id) for post in posts])
+        AuditLog.objects.bulk_create(
+            [AuditLog(user=user, action="create", model="Post", object_id=str(post.pk), details=str(post)) for post in posts]
+        )
+        blobs.swap([], blobs.referenced(name, built) * len(posts))
+    reports.invalidate(user.id, *{group_posts[0].group.owner_id for group_posts in by_group.values()})
+    return len(posts)
+
+
+def run(user, rows, progress=None) -> dict:
+    """
+    Import posts for `user` from an iterable of CSV text lines. Returns
+    {"rows", "created", "failed", "errors"}; `errors` lists the first
+    MAX_ERRORS problems as {"line", "error"}. `progress`, if given, is
+    called with the same counts after each batch.
+    """
+    result = {"rows": 0, "created": 0, "failed": 0, "errors": []}
+
+    def error(line: int, message: str) -> None:
+        result["failed"] += 1
+        if len(result["errors"]) < MAX_ERRORS:
+            result["errors"].append({"line": line, "error": message})
+
+    reader = csv.DictReader(rows)
+    groups = GroupCache(user)
+    name_max = Group._meta.get_field("name").max_length
+    size = batch_size()
+    image = None
+    batch: list[Post] = []
+    try:
+        if not set(COLUMNS) & set(reader.fieldnames or ()):
+            error(1, f"Expected a header row with columns: {', '.join(COLUMNS)}.")
+            return result
+        for row in reader:
+            result["rows"] += 1
+            name = (row.get("group_name") or "").strip() or DEFAULT_GROUP
+            if len(name) > name_max:
+                error(reader.line_num, f"group_name is longer than {name_max} characters.")
+                continue
+            batch.append(Post(group=groups.get(name), author=user, caption=(row.get("caption") or "").strip()))
+            if len(batch) >= size:
+                image = image or _placeholder()
+                result["created"] += _insert(user, batch, image)
+                batch = []
+                if progress:
+                    progress(rows=result["rows"], created=result["created"], failed=result["failed"])
+    except (csv.Error, UnicodeDecodeError) as e:
+        # The rest of the file cannot be read reliably; rows before this line are kept.
+        error(reader.line_num + 1, f"Could not read the file: {e}")
+    if batch:
+        result["created"] += _insert(user, batch, image or _placeholder())
+    if progress:
+        progress(rows=result["rows"], created=result["created"], failed=result["failed"])
+    return result
+
+
+@jobs.task(max_attempts=1)
+def import_csv(ctx, user_id: int, name: str) -> dict:
+    """Background import of a CSV saved by `enqueue`. Not retried: batches already inserted stay."""
+    try:
+        user = User.objects.get(pk=user_id)
+        with default_storage.open(name, "rb") as fh:
+            return run(user, lines(fh), progress=ctx.progress)
+    finally:
+        default_storage.delete(name)
+
+
+def enqueue(user, upload):
+    """Copy an uploaded CSV to storage and start importing it in the background; returns the Job."""
+    name = default_storage.save(f"imports/{uuid.uuid4().hex}.csv", upload)
+    return import_csv.enqueue(user_id=user.id, name=name)
@@ -0,0 +1,21 @@
+"""
+Entry points for `manage.py worker --pool process`.
+
+Spawned pool processes unpickle these before Django is set up, so this
+module imports nothing from Django or the app at import time.
+"""
+import os
+
+
+def setup() -> None:
+    import django
+
+    # Settings come from the worker's environment, inherited by the pool.
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+    django.setup()
+
+
+def execute(*args) -> dict:
+    from .jobs import execute
+
+    return execute(*args)
@@ -0,0 +1,319 @@
+"""
+Background jobs stored in the main database, run by `manage.py worker`.
+
+A task is a function decorated with `@task`; it receives a JobContext and
+the job's JSON payload as keyword arguments, and may return a JSON-able
+result. `enqueue()` writes a Job row inside the caller's transaction, so a
+job exists only if the change that asked for it committed.
+
+Workers claim runnable jobs with SELECT ... FOR UPDATE SKIP LOCKED where the
+database supports it (Postgres); on SQLite, which has no row locks but
+serializes writers, each candidate is claimed with a compare-and-set
+UPDATE. Each worker runs at most N jobs of a queue at once (JOB_QUEUES or
+--queue name:N) on a thread or process pool. Failures are retried with
+exponential backoff up to max_attempts; every attempt records how long the
+job waited and ran, which `job_stats` aggregates per task. Tasks listed in
+JOB_SCHEDULE are queued again by the workers every so many seconds.
+"""
+import json
+import logging
+import multiprocessing
+import os
+import random
+import socket
+import threading
+import time
+import traceback
+import uuid
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections, router, transaction
+from django.db.models import Avg, Count, F, Max, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from . import job_process
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+ERROR_MAX_CHARS = 4000
+MAINTENANCE_SECONDS = 60
+
+
+def queues() -> dict[str, int]:
+    return dict(getattr(settings, "JOB_QUEUES", {"default": 4, "images": 2}))
+
+
+def schedule() -> dict[str, float]:
+    """Periodic tasks: dotted task name -> seconds between runs (JOB_SCHEDULE)."""
+    return {name: float(seconds) for name, seconds in getattr(settings, "JOB_SCHEDULE", {}).items()}
+
+
+def default_max_attempts() -> int:
+    return int(getattr(settings, "JOB_MAX_ATTEMPTS", 5))
+
+
+def backoff_seconds(attempt: int) -> float:
+    """Delay before retry number `attempt` (1-based): doubling from JOB_BACKOFF_SECONDS, capped, with jitter."""
+    base = float(getattr(settings, "JOB_BACKOFF_SECONDS", 10))
+    cap = float(getattr(settings, "JOB_BACKOFF_MAX_SECONDS", 3600))
+    return min(base * 2 ** (attempt - 1), cap) * random.uniform(0.8, 1.2)
+
+
+def stale_seconds() -> int:
+    return int(getattr(settings, "JOB_STALE_SECONDS", 300))
+
+
+def retention_days() -> int:
+    return int(getattr(settings, "JOB_RETENTION_DAYS", 7))
+
+
+class Task:
+    def __init__(self, fn, name: str, queue: str, max_attempts: int | None):
+        self.fn = fn
+        self.name = name
+        self.queue = queue
+        self.max_attempts = max_attempts
+        self.__doc__ = fn.__doc__
+
+    def __call__(self, *args, **kwargs):
+        return self.fn(*args, **kwargs)
+
+    def enqueue(self, delay: float = 0, **payload) -> Job:
+        return enqueue(self, payload, delay=delay)
+
+
+def task(queue: str = "default", max_attempts: int | None = None):
+    """Register a function as a task, named by its dotted import path."""
+    def decorator(fn):
+        return Task(fn, f"{fn.__module__}.{fn.__qualname__}", queue, max_attempts)
+    return decorator
+
+
+def resolve(name: str) -> Task:
+    obj = import_string(name)
+    if not isinstance(obj, Task):
+        raise ValueError(f"{name} is not a task")
+    return obj
+
+
+class JobContext:
+    """First argument of every task: the job's id and attempt, and a way to report progress."""
+
+    def __init__(self, job_id: int, attempt: int):
+        self.id = job_id
+        self.attempt = attempt
+
+    def progress(self, **data) -> None:
+        Job.objects.filter(pk=self.id).update(progress=data)
+
+
+def enqueue(task, payload: dict | None = None, queue: str | None = None, delay: float = 0, max_attempts: int | None = None) -> Job:
+    task = task if isinstance(task, Task) else resolve(task)
+    return Job.objects.create(
+        task=task.name,
+        queue=queue or task.queue,
+        payload=payload or {},
+        max_attempts=max_attempts or task.max_attempts or default_max_attempts(),
+        run_after=timezone.now() + timedelta(seconds=delay),
+    )
+
+
+def enqueue_periodic() -> int:
+    """
+    Queue each scheduled task that has no job waiting or running, to run
+    `seconds` from now; workers check this with their maintenance. Returns
+    the number of jobs queued.
+    """
+    queued = 0
+    for name, seconds in schedule().items():
+        task = resolve(name)
+        if not Job.objects.filter(queue=task.queue, status__in=(Job.QUEUED, Job.RUNNING), task=task.name).exists():
+            enqueue(task, delay=seconds)
+            queued += 1
+    return queued
+
+
+def claim(queue: str, limit: int, worker_id: str) -> list[Job]:
+    """Mark up to `limit` runnable jobs of `queue` as running for `worker_id` and return them."""
+    if limit <= 0:
+        return []
+    now = timezone.now()
+    runnable = Job.objects.filter(queue=queue, status=Job.QUEUED, run_after__lte=now).order_by("run_after", "id")
+    running = {"status": Job.RUNNING, "locked_by": worker_id, "locked_at": now, "started_at": now, "attempts": F("attempts") + 1}
+    features = connections[router.db_for_write(Job)].features
+    if features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            ids = list(runnable.select_for_update(skip_locked=True).values_list("id", flat=True)[:limit])
+            if ids:
+                Job.objects.filter(pk__in=ids).update(**running)
+    else:
+        # No row locks: the status check in each UPDATE makes sure only one worker wins a row.
+        # Each runs in autocommit; a read-then-write transaction would deadlock other SQLite writers.
+        ids = [
+            pk for pk in runnable.values_list("id", flat=True)[:limit]
+            if Job.objects.filter(pk=pk, status=Job.QUEUED).update(**running)
+        ]
+    return list(Job.objects.filter(pk__in=ids).order_by("run_after", "id")) if ids else []
+
+
+def execute(job_id: int, task_name: str, payload: dict, attempt: int) -> dict:
+    """Run one job in a pool thread or process; never raises, returns the outcome."""
+    started = time.perf_counter()
+    try:
+        result = resolve(task_name)(JobContext(job_id, attempt), **payload)
+        # Round-trip now so an unserializable result fails the job rather than the worker.
+        result = json.loads(json.dumps(result, cls=DjangoJSONEncoder))
+        outcome = {"ok": True, "result": result}
+    except Exception:
+        outcome = {"ok": False, "error": traceback.format_exc()[-ERROR_MAX_CHARS:]}
+    finally:
+        if threading.current_thread() is not threading.main_thread():
+            # Pool threads are reused; don't leave a connection per thread open between jobs.
+            connections.close_all()
+    outcome["duration_ms"] = (time.perf_counter() - started) * 1000
+    return outcome
+
+
+def finish(job: Job, outcome: dict, worker_id: str) -> str:
+    """Record the outcome of an attempt: success, a retry after backoff, or failure. Returns the new status."""
+    now = timezone.now()
+    fields = {
+        "locked_by": "",
+        "locked_at": None,
+        "finished_at": now,
+        "wait_ms": (job.started_at - job.run_after).total_seconds() * 1000,
+        "duration_ms": outcome.get("duration_ms"),
+    }
+    if outcome["ok"]:
+        fields.update(status=Job.SUCCEEDED, result=outcome["result"], last_error="")
+    elif job.attempts < job.max_attempts:
+        fields.update(
+            status=Job.QUEUED,
+            run_after=now + timedelta(seconds=backoff_seconds(job.attempts)),
+            last_error=outcome["error"],
+        )
+    else:
+        fields.update(status=Job.FAILED, last_error=outcome["error"])
+        logger.warning("Job %s (%s) failed after %s attempts", job.pk, job.task, job.attempts)
+    # Only while this worker still owns the job; the reaper may have taken it back.
+    Job.objects.filter(pk=job.pk, status=Job.RUNNING, locked_by=worker_id).update(**fields)
+    return fields["status"]
+
+
+def reap_stale(seconds: int | None = None) -> int:
+    """Release jobs held by workers that died: retry them, or fail those out of attempts."""
+    now = timezone.now()
+    stale = Job.objects.filter(status=Job.RUNNING, locked_at__lt=now - timedelta(seconds=seconds or stale_seconds()))
+    lost = {"locked_by": "", "locked_at": None, "last_error": "Worker lost while running the job."}
+    failed = stale.filter(attempts__gte=F("max_attempts")).update(status=Job.FAILED, finished_at=now, **lost)
+    return failed + stale.update(status=Job.QUEUED, run_after=now, **lost)
+
+
+def prune(days: int | None = None) -> int:
+    cutoff = timezone.now() - timedelta(days=retention_days() if days is None else days)
+    deleted, _ = Job.objects.filter(status__in=(Job.SUCCEEDED, Job.FAILED), finished_at__lt=cutoff).delete()
+    return deleted
+
+
+def stats(hours: float = 24) -> list[dict]:
+    """Per-task counts and timings for jobs finished in the last `hours`, plus what is queued or running."""
+    recent = Q(finished_at__gte=timezone.now() - timedelta(hours=hours))
+    return list(
+        Job.objects.filter(recent | Q(status__in=(Job.QUEUED, Job.RUNNING)))
+        .values("task")
+        .annotate(
+            queued=Count("id", filter=Q(status=Job.QUEUED)),
+            running=Count("id", filter=Q(status=Job.RUNNING)),
+            succeeded=Count("id", filter=recent & Q(status=Job.SUCCEEDED)),
+            failed=Count("id", filter=recent & Q(status=Job.FAILED)),
+            retried=Count("id", filter=recent & Q(attempts__gt=1)),
+            avg_ms=Avg("duration_ms", filter=recent),
+            max_ms=Max("duration_ms", filter=recent),
+            avg_wait_ms=Avg("wait_ms", filter=recent),
+        )
+        .order_by("task")
+    )
+
+
+class Worker:
+    def __init__(self, queue_limits: dict[str, int], pool: str = "thread", poll_seconds: float = 1.0, burst: bool = False):
+        self.queue_limits = {q: n for q, n in queue_limits.items() if n > 0}
+        self.pool = pool
+        self.poll_seconds = poll_seconds
+        self.burst = burst
+        self.id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.stopping = threading.Event()
+        self.counts = Counter()
+
+    def stop(self, *args) -> None:
+        """Stop claiming; jobs in flight are allowed to finish."""
+        self.stopping.set()
+
+    def _executor(self):
+        slots = sum(self.queue_limits.values())
+        if self.pool == "process":
+            return ProcessPoolExecutor(
+                max_workers=slots, mp_context=multiprocessing.get_context("spawn"), initializer=job_process.setup
+            )
+        return ThreadPoolExecutor(max_workers=slots, thread_name_prefix="job")
+
+    def _maintain(self, inflight) -> None:
+        # Heartbeat: a job stays locked while its worker is alive, however long it runs.
+        if inflight:
+            Job.objects.filter(pk__in=[job.pk for job in inflight.values()], locked_by=self.id).update(locked_at=timezone.now())
+        reaped = reap_stale()
+        if reaped:
+            logger.warning("Released %s stale jobs", reaped)
+        prune()
+        enqueue_periodic()
+
+    def run(self) -> Counter:
+        executor = self._executor()
+        run = job_process.execute if self.pool == "process" else execute
+        inflight: dict = {}
+        running = Counter()
+        next_maintenance = 0.0
+        broken = False
+        try:
+            while True:
+                if time.monotonic() >= next_maintenance:
+                    self._maintain(inflight)
+                    next_maintenance = time.monotonic() + MAINTENANCE_SECONDS
+                if not self.stopping.is_set() and not broken:
+                    for queue, limit in self.queue_limits.items():
+                        for job in claim(queue, limit - running[queue], self.id):
+                            future = executor.submit(run, job.pk, job.task, job.payload, job.attempts)
+                            inflight[future] = job
+                            running[queue] += 1
+                if not inflight:
+                    if self.stopping.is_set() or self.burst:
+                        break
+                    self.stopping.wait(self.poll_seconds)
+                    continue
+                done, _ = wait(inflight, timeout=self.poll_seconds, return_when=FIRST_COMPLETED)
+                for future in done:
+                    job = inflight.pop(future)
+                    running[job.queue] -= 1
+                    try:
+                        outcome = future.result()
+                    except Exception:
+                        # The pool itself failed (e.g. a process was killed); the job is retried.
+                        broken = True
+                        outcome = {"ok": False, "error": traceback.format_exc()[-ERROR_MAX_CHARS:]}
+                    status = finish(job, outcome, self.id)
+                    self.counts[status] += 1
+                    logger.info("Job %s %s: %s in %.0f ms", job.pk, job.task, status, outcome.get("duration_ms") or 0)
+                if broken and not inflight:
+                    # Every job of the dead pool has been recorded; start a new one.
+                    executor.shutdown(wait=False)
+                    executor = self._executor()
+                    broken = False
+        finally:
+            executor.shutdown(wait=True)
+        return self.counts
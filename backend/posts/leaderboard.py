@@ -0,0 +1,107 @@
+"""
+Server-side group leaderboard.
+
+Rankings are computed from the DailyActivity rollup (one row per member and
+active day), with streaks read from the incremental Streak records, and cached per
+(group, period, day) under a key that embeds the group's version counter. Every
+post, comment and membership change bumps that counter in the database (imports
+and retention included), so all processes stop reading the old board at once,
+whatever the cache backend.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models import Count, Max, Sum
+from django.utils import timezone
+
+from . import streaks
+from .models import DailyActivity, Group, GroupMembership, Post, Streak
+
+PERIOD_DAYS = {"daily": 1, "weekly": 7, "monthly": 30}
+
+
+def cache_seconds() -> int:
+    return int(getattr(settings, "LEADERBOARD_CACHE_SECONDS", 600))
+
+
+def cache_key(group: Group, period: str, day) -> str:
+    return f"leaderboard:{group.id}:v{group.version}:{period}:{day.isoformat()}"
+
+
+def _last_post_times(group: Group, last_days: dict) -> dict:
+    """{user id: created_at of their latest post}, given {user id: date of their latest post}."""
+    if not last_days:
+        return {}
+    rows = (
+        Post.objects.filter(group=group, date__in=set(last_days.values()))
+        .values("author_id", "date")
+        .annotate(last=Max("created_at"))
+        .order_by()
+        .values_list("author_id", "date", "last")
+    )
+    return {author_id: last for author_id, day, last in rows if last_days.get(author_id) == day}
+
+
+def compute(group: Group, period: str, today=None) -> list[dict]:
+    today = today or timezone.localdate()
+    start = today - timedelta(days=PERIOD_DAYS[period] - 1)
+
+    active = DailyActivity.objects.filter(group=group, post_count__gt=0)
+    window = {
+        row["user_id"]: row
+        for row in active.filter(date__gte=start, date__lte=today)
+        .values("user_id")
+        .annotate(active_days=Count("id"), total_posts=Sum("post_count"))
+        .order_by()
+    }
+    last_posts = _last_post_times(
+        group, dict(active.values("user_id").annotate(last=Max("date")).order_by().values_list("user_id", "last"))
+    )
+    current_streaks = {s.user_id: streaks.effective_current(s, today) for s in Streak.objects.filter(group=group)}
+
+    people = {}
+    members = GroupMembership.objects.filter(group=group).values_list(
+        "user_id", "user__username", "user__first_name", "user__last_name"
+    )
+    owner = group.owner
+    for uid, username, first, last in list(members) + [(owner.id, owner.username, owner.first_name, owner.last_name)]:
+        people[uid] = {"username": username, "name": f"{first} {last}".strip() or username}
+    # Former members keep their history on the board.
+    missing = (set(window) | set(last_posts)) - set(people)
+    if missing:
+        for uid, username, first, last in User.objects.filter(id__in=missing).values_list(
+            "id", "username", "first_name", "last_name"
+        ):
+            people[uid] = {"username": username, "name": f"{first} {last}".strip() or username}
+
+    rows = []
+    for uid, person in people.items():
+        stats = window.get(uid, {})
+        last = last_posts.get(uid)
+        rows.append({
+            "user_id": uid,
+            "username": person["username"],
+            "name": person["name"],
+            "active_days": stats.get("active_days", 0),
+            "total_posts": stats.get("total_posts", 0),
+            "streak": current_streaks.get(uid, 0),
+            "last_post": last.isoformat() if last else None,
+        })
+    # Most recent poster first among ties (ISO strings sort chronologically), then the ranking keys.
+    rows.sort(key=lambda r: r["last_post"] or "", reverse=True)
+    rows.sort(key=lambda r: (-r["active_days"], -r["total_posts"], -r["streak"]))
+    for rank, row in enumerate(rows, start=1):
+        row["rank"] = rank
+    return rows
+
+
+def leaderboard(group: Group, period: str) -> list[dict]:
+    today = timezone.localdate()
+    key = cache_key(group, period, today)
+    rows = cache.get(key)
+    if rows is None:
+        rows = compute(group, period, today)
+        cache.set(key, rows, cache_seconds())
+    return rows
@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand
+
+from posts import blobs, retention
+
+
+class Command(BaseCommand):
+    help = (
+        'Deletes posts past their retention: RETENTION_DAYS (or --days), a group\'s own retention_days, '
+        'and everything in groups that have ended. Oldest first, in chunks, one transaction and audit entry per chunk.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help='Days of posts to keep, today included (overrides RETENTION_DAYS; 0 keeps none).')
+        parser.add_argument('--all', action='store_true', help='Delete every post, whatever the policies.')
+        parser.add_argument('--chunk-size', type=int, help='Posts per transaction (default RETENTION_CHUNK_SIZE).')
+        parser.add_argument('--dry-run', action='store_true', help='Only count what would be deleted.')
+        parser.add_argument('--workers', type=int, default=8, help='Media files deleted in parallel.')
+        parser.add_argument('--grace-hours', type=float, help='Override BLOB_GRACE_HOURS for other unused media collected afterwards (media of deleted posts goes right away).')
+
+    def handle(self, *args, **options):
+        if options['days'] is not None and options['days'] < 0:
+            self.stderr.write('--days must be 0 or more.')
+            return
+
+        def progress(**stats):
+            if options['verbosity'] >= 2:
+                self.stdout.write(
+                    f"  chunk {stats['chunks']}: {stats['posts']} posts through {stats['last_date']} "
+                    f"({stats['posts'] / stats['seconds'] if stats['seconds'] else 0:.0f}/s)"
+                )
+
+        stats = retention.run(
+            days=options['days'],
+            dry_run=options['dry_run'],
+            size=options['chunk_size'],
+            workers=options['workers'],
+            grace=options['grace_hours'],
+            progress=progress,
+            everything=options['all'],
+        )
+        span = f" dated {stats['first_date']} to {stats['last_date']}" if stats['posts'] else ''
+        timing = f"in {stats['seconds']:.1f}s ({stats['posts_per_second']:.0f} posts/s, {stats['chunks']} chunks)"
+        if options['dry_run']:
+            self.stdout.write(f"Would delete {stats['posts']} posts{span} and {stats['comments']} comments; counted {timing}.")
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {stats['posts']} posts{span} and {stats['comments']} comments {timing}; "
+            f"removed {stats['blobs']} media files ({stats['bytes']} bytes)."
+        ))
+        grace = blobs.grace_hours() if options['grace_hours'] is None else options['grace_hours']
+        self.stdout.write(
+            f"Media of the deleted posts is removed right away; other unused media files are "
+            f"removed once unused for {grace:g} hours (BLOB_GRACE_HOURS, --grace-hours)."
+        )
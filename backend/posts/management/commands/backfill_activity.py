@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from posts import rollups
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the daily activity rollup from posts and comments, in date chunks.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', help='First day (YYYY-MM-DD). Defaults to the oldest post.')
+        parser.add_argument('--end', help='Last day (YYYY-MM-DD). Defaults to today.')
+        parser.add_argument('--chunk-days', type=int, default=30)
+
+    def handle(self, *args, **options):
+        bounds = {}
+        for name in ('start', 'end'):
+            if options[name]:
+                bounds[name] = parse_date(options[name])
+                if bounds[name] is None:
+                    raise CommandError(f'--{name} must be YYYY-MM-DD')
+        written = rollups.backfill(chunk_days=max(1, options['chunk_days']), stdout=self.stdout, **bounds)
+        self.stdout.write(self.style.SUCCESS(f'Wrote {written} daily activity rows.'))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from posts import variants
+from posts.models import Group, Post
+
+
+class Command(BaseCommand):
+    help = 'Normalizes post images and group covers and writes their WebP/JPEG variants, in parallel.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Rebuild the variants of rows that are already current (their original is kept as it is).')
+        parser.add_argument('--only', choices=('posts', 'covers'), help='Limit to post images or group covers.')
+
+    def handle(self, *args, **options):
+        targets = {'posts': Post, 'covers': Group}
+        if options['only']:
+            targets = {options['only']: targets[options['only']]}
+        for label, model in targets.items():
+            field = variants.FIELDS[model]
+            rows = model.objects.exclude(**{field: ''}).exclude(**{f'{field}__isnull': True})
+            pks = [
+                pk for pk, name, built in rows.values_list('pk', field, f'{field}_variants').iterator()
+                if options['force'] or (built or {}).get('source') != name
+            ]
+            built, failed = variants.build_many(model, pks, force=options['force'])
+            style = self.style.WARNING if failed else self.style.SUCCESS
+            self.stdout.write(style(f'{label}: built {built} of {len(pks)}, {failed} failed.'))
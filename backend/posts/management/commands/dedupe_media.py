@@ -0,0 +1,98 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import blobs, counters, variants
+from posts.models import Blob
+
+
+def _rewrite(built: dict, mapping: dict) -> dict:
+    if not built:
+        return built
+    result = dict(built, source=mapping.get(built.get('source'), built.get('source')))
+    for variant in result:
+        if isinstance(result[variant], dict):
+            result[variant] = {k: mapping.get(v, v) if isinstance(v, str) else v for k, v in result[variant].items()}
+    return result
+
+
+class Command(BaseCommand):
+    help = (
+        'Moves existing post images, covers and their variants into the content-addressed blob store. '
+        'The first file of each content is kept where it is; rows using a copy are pointed at it and the copies deleted.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would be deduplicated.')
+        parser.add_argument('--workers', type=int, default=8, help='Files hashed in parallel.')
+
+    def handle(self, *args, **options):
+        rows = []
+        for model, field in blobs.FIELDS.items():
+            values = model.objects.exclude(**{field: ''}).exclude(**{f'{field}__isnull': True})
+            for pk, source, built, related_id in values.values_list('pk', field, f'{field}_variants', variants.RELATED[model]).iterator():
+                rows.append((model, field, pk, source, built or {}, related_id))
+        names = {name for row in rows for name in blobs.referenced(row[3], row[4])}
+        known = set(Blob.objects.filter(pk__in=names).values_list('pk', flat=True)) if names else set()
+        legacy = sorted(names - known)
+
+        def hash_file(name):
+            try:
+                with default_storage.open(name, 'rb') as fh:
+                    return blobs.digest(fh.chunks())
+            except (FileNotFoundError, OSError):
+                return None
+
+        with ThreadPoolExecutor(max_workers=max(1, options['workers'])) as pool:
+            hashed = dict(zip(legacy, pool.map(hash_file, legacy)))
+        missing = [name for name, result in hashed.items() if result is None]
+
+        # Per content: an existing blob, else the first legacy file, adopted in place.
+        existing = dict(Blob.objects.filter(sha256__in={r[0] for r in hashed.values() if r}).values_list('sha256', 'name'))
+        canonical, adopt, mapping, duplicates = {}, [], {}, {}
+        for name, result in hashed.items():
+            if result is None:
+                continue
+            sha, size = result
+            if sha not in canonical:
+                canonical[sha] = existing.get(sha) or name
+                if canonical[sha] == name:
+                    adopt.append(Blob(name=name, sha256=sha, size=size))
+            if canonical[sha] != name:
+                mapping[name] = canonical[sha]
+                duplicates[name] = size
+
+        self.stdout.write(
+            f'{len(rows)} rows, {len(legacy)} files outside the blob store ({len(missing)} missing), '
+            f'{len(adopt)} distinct, {len(duplicates)} duplicates ({sum(duplicates.values())} bytes).'
+        )
+        if options['dry_run']:
+            return
+
+        Blob.objects.bulk_create(adopt, batch_size=500, ignore_conflicts=True)
+        repointed, keep = 0, set()
+        with counters.batched():
+            for model, field, pk, source, built, related_id in rows:
+                new_source, new_built = mapping.get(source, source), _rewrite(built, mapping)
+                if new_source == source and new_built == built:
+                    continue
+                with transaction.atomic():
+                    # Skipped if the file changed since it was read; its files are then left alone.
+                    if model.objects.filter(pk=pk, **{field: source}).update(**{field: new_source, f'{field}_variants': new_built}):
+                        variants.mark_changed(model, pk, related_id)
+                        repointed += 1
+                    else:
+                        keep.update(blobs.referenced(source, built))
+        recounted = blobs.recount()
+        removed = freed = 0
+        for name, size in duplicates.items():
+            if name not in keep:
+                default_storage.delete(name)
+                removed += 1
+                freed += size
+        self.stdout.write(self.style.SUCCESS(
+            f'Adopted {len(adopt)} files, repointed {repointed} rows, deleted {removed} duplicates '
+            f'({freed} bytes), corrected {recounted} reference counts.'
+        ))
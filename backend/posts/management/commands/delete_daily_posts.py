@@ -1,9 +1,12 @@
+from django.core.management import call_command
 from django.core.management.base import BaseCommand
-from posts.models import Post
+
 
 class Command(BaseCommand):
-    help = 'Deletes all posts from the database.'
+    help = 'Deletes all posts. Same as `apply_retention --all`; use apply_retention for regular clean-up.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only count what would be deleted.')
 
     def handle(self, *args, **options):
-        count, _ = Post.objects.all().delete()
-        self.stdout.write(self.style.SUCCESS(f'Successfully deleted {count} posts.'))
+        call_command('apply_retention', all=True, dry_run=options['dry_run'], stdout=self.stdout, stderr=self.stderr, verbosity=options['verbosity'])
@@ -0,0 +1,209 @@
+import random
+import re
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Max, Q
+from django.utils import timezone
+
+from posts import changelog, feed, prefetch, rollups, threads
+from posts.models import AuditLog, ChangeLogEntry, Comment, DailyActivity, FeedEntry, Group, GroupMembership, Job, Post
+
+# Tables that grow with usage; a full scan of any of them in a hot query fails the run.
+LARGE_TABLES = {
+    Post._meta.db_table,
+    Comment._meta.db_table,
+    FeedEntry._meta.db_table,
+    GroupMembership._meta.db_table,
+    AuditLog._meta.db_table,
+    DailyActivity._meta.db_table,
+    ChangeLogEntry._meta.db_table,
+    Job._meta.db_table,
+}
+
+FULL_SCAN_PATTERNS = {
+    "sqlite": re.compile(r"\bSCAN (\w+)"),
+    "postgresql": re.compile(r"Seq Scan on (\w+)"),
+}
+
+
+class _Rollback(Exception):
+    pass
+
+
+def explain(qs) -> str:
+    # QuerySet.explain() misplaces the EXPLAIN prefix on window-filtered querysets
+    # (they compile to a wrapping subquery), so compile and prefix by hand.
+    sql, params = qs.query.get_compiler(using=qs.db).as_sql()
+    with connection.cursor() as cursor:
+        cursor.execute(f"{connection.ops.explain_query_prefix()} {sql}", params)
+        return "\n".join(str(row[-1]) for row in cursor.fetchall())
+
+
+def hot_queries(user, group, group_ids, post_ids, comment_ids, today):
+    """The queries issued by posts/views.py and web/views.py on every page load."""
+    return [
+        ("group_feed", Post.objects.filter(date=today, group_id=group.id).order_by("-created_at", "-id")[:10]),
+        ("bootstrap_posts", Post.objects.filter(group_id__in=group_ids, date=today).order_by("-created_at", "-id")),
+        ("user_feed", feed.feed_queryset(user, today).order_by("-created_at", "-id")[:10]),
+        ("author_history", Post.objects.filter(author=user, date__gte=today - timedelta(days=6))),
+        ("export_my_posts", Post.objects.filter(author=user).order_by("-created_at")),
+        ("comment_previews", prefetch.latest_comments_queryset(post_ids)),
+        ("reply_previews", prefetch.subtree_replies_queryset(Q(
+            post_id=post_ids[0], path__gt=Comment.path_segment(comment_ids[0]),
+            path__lt=threads.subtree_end(Comment.path_segment(comment_ids[0])),
+        ))),
+        ("comment_threads", Comment.objects.filter(post_id=post_ids[0], depth=0).order_by("id")[:21]),
+        ("comment_subtrees", threads.descendants_queryset(
+            [Comment(id=i, post_id=post_ids[0], path=Comment.path_segment(i), depth=0) for i in comment_ids],
+            threads.DEFAULT_DEPTH,
+            threads.DEFAULT_REPLIES,
+        )),
+        ("group_members", prefetch.members_queryset(group_ids)),
+        ("authz_roles", GroupMembership.objects.filter(user_id=user.id).values_list("group_id", "role")),
+        ("authz_owned", Group.objects.filter(owner_id=user.id).values_list("id", flat=True)),
+        ("activity_report", DailyActivity.objects.filter(user=user, date__gte=today - timedelta(days=6), post_count__gt=0)),
+        ("leaderboard_window", DailyActivity.objects.filter(group=group, date__gte=today - timedelta(days=29), post_count__gt=0)),
+        ("leaderboard_last_post", Post.objects.filter(group=group, date__in=[today, today - timedelta(days=3)])
+            .values("author_id", "date").annotate(last=Max("created_at")).order_by()),
+        ("sync_changes", changelog.settled().filter(id__gt=0).filter(
+            Q(group_id__in=group_ids) | Q(user_id=user.id)
+        ).order_by("id")[: changelog.DEFAULT_LIMIT + 1]),
+        ("job_claim", Job.objects.filter(
+            queue="default", status=Job.QUEUED, run_after__lte=timezone.now()
+        ).order_by("run_after", "id")[:4]),
+        ("audit_lookup", AuditLog.objects.filter(model="Post", object_id=str(post_ids[0])).order_by("-created_at")),
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        'Seeds a large synthetic dataset inside a rolled-back transaction, captures EXPLAIN output '
+        'for the hot feed/comment/membership queries and fails if any of them full-scans a large table.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=20000, help='Number of seeded posts.')
+        parser.add_argument('--days', type=int, default=60, help='Spread seeded posts over this many days.')
+        parser.add_argument('--no-seed', action='store_true', help='Explain against existing data only.')
+        parser.add_argument('--show-plans', action='store_true', help='Print the full plan for every query.')
+
+    def handle(self, *args, **options):
+        vendor = connection.vendor
+        if vendor not in FULL_SCAN_PATTERNS:
+            raise CommandError(f'Unsupported database vendor: {vendor}')
+        failures = []
+        try:
+            with transaction.atomic():
+                if options['no_seed']:
+                    ctx = self._existing_context()
+                else:
+                    ctx = self._seed(max(100, options['posts']), max(1, options['days']))
+                self._analyze()
+                for name, qs in hot_queries(**ctx):
+                    plan = explain(qs)
+                    scanned = sorted({t for t in FULL_SCAN_PATTERNS[vendor].findall(plan) if t in LARGE_TABLES})
+                    if scanned:
+                        failures.append(name)
+                        self.stdout.write(self.style.ERROR(f'FULL SCAN {name}: {", ".join(scanned)}'))
+                    else:
+                        self.stdout.write(self.style.SUCCESS(f'ok        {name}'))
+                    if scanned or options['show_plans']:
+                        self.stdout.write('    ' + plan.replace('\n', '\n    '))
+                raise _Rollback()
+        except _Rollback:
+            pass
+        if failures:
+            raise CommandError(f'{len(failures)} hot queries fall back to a full scan: {", ".join(failures)}')
+        self.stdout.write(self.style.SUCCESS('All hot queries use an index.'))
+
+    def _analyze(self):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                for table in sorted(LARGE_TABLES):
+                    cursor.execute(f'ANALYZE {connection.ops.quote_name(table)}')
+            else:
+                cursor.execute('ANALYZE')
+
+    def _existing_context(self):
+        membership = GroupMembership.objects.select_related('user', 'group').order_by('-id').first()
+        post = Post.objects.order_by('-id').first()
+        comment = Comment.objects.order_by('-id').first()
+        if membership is None or post is None or comment is None:
+            raise CommandError('Not enough data to explain; run without --no-seed.')
+        return {
+            'user': membership.user,
+            'group': membership.group,
+            'group_ids': list(GroupMembership.objects.filter(user=membership.user).values_list('group_id', flat=True)),
+            'post_ids': [post.id],
+            'comment_ids': [comment.id],
+            'today': timezone.localdate(),
+        }
+
+    def _seed(self, n_posts: int, n_days: int):
+        rng = random.Random(347)
+        today = timezone.localdate()
+        now = timezone.now()
+        n_users = max(20, n_posts // 100)
+        n_groups = max(5, n_posts // 400)
+        self.stdout.write(f'Seeding {n_users} users, {n_groups} groups, {n_posts} posts over {n_days} days...')
+
+        users = User.objects.bulk_create(
+            [User(username=f'explain-{i}-{rng.getrandbits(32):x}', password='!') for i in range(n_users)]
+        )
+        groups = Group.objects.bulk_create(
+            [Group(name=f'Explain {i}', owner=users[i % n_users]) for i in range(n_groups)]
+        )
+        memberships = []
+        for group in groups:
+            for user in rng.sample(users, min(len(users), 25)):
+                memberships.append(GroupMembership(user=user, group=group, role='member'))
+        GroupMembership.objects.bulk_create(memberships, batch_size=1000, ignore_conflicts=True)
+
+        posts = Post.objects.bulk_create(
+            [
+                Post(group=rng.choice(groups), author=rng.choice(users), caption='seed', image='posts/seed.png')
+                for _ in range(n_posts)
+            ],
+            batch_size=1000,
+        )
+        # auto_now_add pins every row to today; spread them over the window afterwards.
+        by_day: dict[int, list[int]] = {}
+        for post in posts:
+            by_day.setdefault(rng.randrange(n_days), []).append(post.id)
+        for offset, ids in by_day.items():
+            Post.objects.filter(pk__in=ids).update(
+                date=today - timedelta(days=offset),
+                created_at=now - timedelta(days=offset),
+            )
+
+        comments = Comment.objects.bulk_create(
+            [
+                Comment(post=rng.choice(posts), author=rng.choice(users), user_name='seed', text='seed')
+                for _ in range(n_posts * 2)
+            ],
+            batch_size=1000,
+        )
+        ChangeLogEntry.objects.bulk_create(
+            [ChangeLogEntry(kind='post', action='upsert', object_id=p.id, group_id=p.group_id) for p in posts],
+            batch_size=1000,
+        )
+        AuditLog.objects.bulk_create(
+            [AuditLog(action='create', model='Post', object_id=str(p.id), details='seed') for p in posts],
+            batch_size=1000,
+        )
+
+        user = users[0]
+        group_ids = list(GroupMembership.objects.filter(user=user).values_list('group_id', flat=True)) or [groups[0].id]
+        feed.rebuild(date=today)
+        rollups.backfill(start=today - timedelta(days=n_days), end=today)
+        return {
+            'user': user,
+            'group': Group.objects.get(pk=group_ids[0]),
+            'group_ids': group_ids,
+            'post_ids': [p.id for p in posts[:10]],
+            'comment_ids': [c.id for c in comments[:10]],
+            'today': today,
+        }
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from posts import feed_cache
+
+
+class Command(BaseCommand):
+    help = 'Prints hit/miss statistics of the group feed cache.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Zero the counters after printing them.')
+
+    def handle(self, *args, **options):
+        stats = feed_cache.stats()
+        rate = 'n/a' if stats['hit_rate'] is None else f"{stats['hit_rate']:.1%}"
+        self.stdout.write(f"hits: {stats['hits']}  misses: {stats['misses']}  hit rate: {rate}")
+        if options['reset']:
+            feed_cache.reset_stats()
+            self.stdout.write(self.style.SUCCESS('Counters reset.'))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from posts import jobs
+
+
+def _ms(value) -> str:
+    return f'{value:.0f}' if value is not None else '-'
+
+
+class Command(BaseCommand):
+    help = 'Prints per-task job counts and timings (run time and queue wait, in ms).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=float, default=24, help='Window of finished jobs to include.')
+
+    def handle(self, *args, **options):
+        rows = jobs.stats(options['hours'])
+        if not rows:
+            self.stdout.write('No jobs.')
+            return
+        header = ('task', 'queued', 'running', 'ok', 'failed', 'retried', 'avg ms', 'max ms', 'avg wait ms')
+        lines = [header] + [
+            (
+                r['task'], r['queued'], r['running'], r['succeeded'], r['failed'], r['retried'],
+                _ms(r['avg_ms']), _ms(r['max_ms']), _ms(r['avg_wait_ms']),
+            )
+            for r in rows
+        ]
+        widths = [max(len(str(line[i])) for line in lines) for i in range(len(header))]
+        for line in lines:
+            self.stdout.write('  '.join(str(v).ljust(w) if i == 0 else str(v).rjust(w) for i, (v, w) in enumerate(zip(line, widths))))
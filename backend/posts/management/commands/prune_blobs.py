@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from posts import blobs
+
+
+class Command(BaseCommand):
+    help = 'Deletes image blobs that no post, cover or variant has referenced for BLOB_GRACE_HOURS.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--grace-hours', type=float, help='Override BLOB_GRACE_HOURS.')
+        parser.add_argument('--workers', type=int, default=8, help='Files deleted in parallel.')
+        parser.add_argument('--recount', action='store_true', help='Recompute reference counts from the rows first.')
+
+    def handle(self, *args, **options):
+        if options['recount']:
+            self.stdout.write(f'Corrected {blobs.recount()} reference counts.')
+        deleted, freed = blobs.collect(options['grace_hours'], workers=options['workers'])
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} blobs ({freed} bytes).'))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from posts import changelog
+
+
+class Command(BaseCommand):
+    help = 'Deletes change log entries older than CHANGELOG_RETENTION_DAYS (clients behind that point resync from scratch).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help='Override CHANGELOG_RETENTION_DAYS.')
+
+    def handle(self, *args, **options):
+        deleted = changelog.prune(options['days'])
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} change log entries.'))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from posts import idempotency, uploads
+
+
+class Command(BaseCommand):
+    help = 'Deletes expired upload sessions, orphaned staging files and expired idempotency keys.'
+
+    def handle(self, *args, **options):
+        sessions = uploads.prune()
+        keys = idempotency.prune()
+        self.stdout.write(f'Deleted {sessions} upload sessions and {keys} idempotency keys.')
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from posts import feed
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the materialized per-user feed for a day (backfill after migrating or to fix drift).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='Day to rebuild (YYYY-MM-DD). Defaults to today.')
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--prune', action='store_true', help='Also delete feed rows older than the rebuilt day.')
+
+    def handle(self, *args, **options):
+        date = timezone.localdate()
+        if options['date']:
+            date = parse_date(options['date'])
+            if date is None:
+                raise CommandError('--date must be YYYY-MM-DD')
+        written = feed.rebuild(date=date, batch_size=max(1, options['batch_size']), stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt feed for {date}: {written} rows.'))
+        if options['prune']:
+            pruned = feed.prune_before(date)
+            self.stdout.write(self.style.SUCCESS(f'Pruned {pruned} rows older than {date}.'))
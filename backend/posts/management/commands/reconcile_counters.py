@@ -0,0 +1,60 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from posts.models import Comment, Group, GroupMembership, Post
+
+
+def _actual_counts(model, fk: str, ids) -> dict[int, int]:
+    rows = model.objects.filter(**{f"{fk}__in": ids}).order_by().values(fk).annotate(n=Count("id"))
+    return {row[fk]: row["n"] for row in rows}
+
+
+class Command(BaseCommand):
+    help = 'Recomputes denormalized group/post/comment counters in batches and fixes any drift.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--dry-run', action='store_true', help='Report drift without writing.')
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options['batch_size'])
+        dry_run = options['dry_run']
+        group_fixed = self._reconcile(
+            Group,
+            {"post_count": (Post, "group"), "member_count": (GroupMembership, "group")},
+            batch_size,
+            dry_run,
+        )
+        post_fixed = self._reconcile(Post, {"comment_count": (Comment, "post")}, batch_size, dry_run)
+        comment_fixed = self._reconcile(Comment, {"reply_count": (Comment, "parent")}, batch_size, dry_run)
+        verb = 'Found' if dry_run else 'Fixed'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {group_fixed} groups, {post_fixed} posts and {comment_fixed} comments with drifted counters.'
+        ))
+
+    def _reconcile(self, model, counters: dict, batch_size: int, dry_run: bool) -> int:
+        fields = list(counters)
+        fixed = 0
+        last_pk = 0
+        while True:
+            rows = list(model.objects.filter(pk__gt=last_pk).order_by('pk').only('pk', *fields)[:batch_size])
+            if not rows:
+                return fixed
+            last_pk = rows[-1].pk
+            ids = [r.pk for r in rows]
+            actual = {field: _actual_counts(src, fk, ids) for field, (src, fk) in counters.items()}
+            drifted = []
+            for row in rows:
+                changed = False
+                for field in fields:
+                    value = actual[field].get(row.pk, 0)
+                    if getattr(row, field) != value:
+                        setattr(row, field, value)
+                        changed = True
+                if changed:
+                    drifted.append(row)
+            if drifted and not dry_run:
+                with transaction.atomic():
+                    model.objects.bulk_update(drifted, fields)
+            fixed += len(drifted)
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from posts import streaks
+
+
+class Command(BaseCommand):
+    help = 'Resets streaks broken by a missed day (run daily). Use --rebuild to recompute all streaks from history.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true', help='Recompute every streak from posts.')
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            written = streaks.rebuild()
+            self.stdout.write(self.style.SUCCESS(f'Rebuilt {written} streaks.'))
+            return
+        reset = streaks.rollover()
+        self.stdout.write(self.style.SUCCESS(f'Reset {reset} broken streaks.'))
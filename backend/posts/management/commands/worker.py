@@ -0,0 +1,42 @@
+import logging
+import signal
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import jobs
+
+
+def parse_queue(value: str) -> tuple[str, int]:
+    name, _, limit = value.partition(':')
+    try:
+        return name, int(limit) if limit else jobs.queues().get(name, 1)
+    except ValueError:
+        raise CommandError(f'--queue expects NAME or NAME:CONCURRENCY, got {value!r}')
+
+
+class Command(BaseCommand):
+    help = 'Runs background jobs from the database queue until stopped (SIGINT/SIGTERM finish the jobs in flight).'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--queue', action='append', default=[], metavar='NAME[:N]',
+            help='Queue to serve and how many of its jobs to run at once. Repeatable; defaults to JOB_QUEUES.',
+        )
+        parser.add_argument('--pool', choices=('thread', 'process'), default='thread')
+        parser.add_argument('--poll', type=float, default=1.0, help='Seconds between polls when idle.')
+        parser.add_argument('--burst', action='store_true', help='Exit once no runnable jobs are left.')
+
+    def handle(self, *args, **options):
+        limits = dict(parse_queue(q) for q in options['queue']) or jobs.queues()
+        if not any(n > 0 for n in limits.values()):
+            raise CommandError('No queue has a concurrency above zero.')
+        if options['verbosity'] > 1:
+            logging.getLogger('posts.jobs').setLevel(logging.INFO)
+        worker = jobs.Worker(limits, pool=options['pool'], poll_seconds=max(0.1, options['poll']), burst=options['burst'])
+        signal.signal(signal.SIGINT, worker.stop)
+        signal.signal(signal.SIGTERM, worker.stop)
+        queues = ', '.join(f'{name}:{n}' for name, n in limits.items())
+        self.stdout.write(f'Worker {worker.id} serving {queues} on a {options["pool"]} pool.')
+        counts = worker.run()
+        summary = ', '.join(f'{n} {status}' for status, n in sorted(counts.items())) or 'no jobs'
+        self.stdout.write(self.style.SUCCESS(f'Worker stopped: {summary}.'))
@@ -0,0 +1,66 @@
+# Generated by Django 5.2.8 on 2026-10-18 18:58
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def fill_today(apps, schema_editor):
+    # Same rows as feed.rebuild() for today, so the materialized feed is not empty after deploying.
+    Group = apps.get_model("posts", "Group")
+    Post = apps.get_model("posts", "Post")
+    GroupMembership = apps.get_model("posts", "GroupMembership")
+    FeedEntry = apps.get_model("posts", "FeedEntry")
+    limit = int(getattr(settings, "FEED_FANOUT_MAX_MEMBERS", 500))
+    audiences = {}
+    entries = []
+    for post in Post.objects.filter(date=timezone.localdate()).select_related("group").order_by("id").iterator():
+        if post.group_id not in audiences:
+            audience = set(GroupMembership.objects.filter(group_id=post.group_id).values_list("user_id", flat=True))
+            audience.add(post.group.owner_id)
+            if len(audience) > limit:
+                Group.objects.filter(pk=post.group_id).update(feed_fanout=False)
+                audience = set()
+            audiences[post.group_id] = audience
+        if audiences[post.group_id]:
+            entries.extend(
+                FeedEntry(user_id=uid, post_id=post.id, group_id=post.group_id, date=post.date, created_at=post.created_at)
+                for uid in audiences[post.group_id] | {post.author_id}
+            )
+        if len(entries) >= 1000:
+            FeedEntry.objects.bulk_create(entries, ignore_conflicts=True)
+            entries = []
+    FeedEntry.objects.bulk_create(entries, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0011_merge_20251207_2106'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='group',
+            name='feed_fanout',
+            field=models.BooleanField(default=True),
+        ),
+        migrations.CreateModel(
+            name='FeedEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('created_at', models.DateTimeField()),
+                ('group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to='posts.group')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to='posts.post')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'date', '-created_at'], name='posts_feed_user_date_idx'), models.Index(fields=['user', 'group'], name='posts_feed_user_group_idx')],
+                'unique_together': {('user', 'post')},
+            },
+        ),
+        migrations.RunPython(fill_today, migrations.RunPython.noop),
+    ]
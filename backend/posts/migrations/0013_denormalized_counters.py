@@ -0,0 +1,46 @@
+# Generated by Django 5.2.8 on 2026-10-18 19:02
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def _count(model, fk):
+    return Coalesce(Subquery(
+        model.objects.filter(**{fk: OuterRef("pk")}).order_by().values(fk).annotate(n=Count("id")).values("n")
+    ), 0)
+
+
+def fill_counters(apps, schema_editor):
+    Group = apps.get_model("posts", "Group")
+    Post = apps.get_model("posts", "Post")
+    Comment = apps.get_model("posts", "Comment")
+    GroupMembership = apps.get_model("posts", "GroupMembership")
+    Group.objects.update(post_count=_count(Post, "group"), member_count=_count(GroupMembership, "group"))
+    Post.objects.update(comment_count=_count(Comment, "post"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0012_feed_entries'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='group',
+            name='member_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='group',
+            name='post_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.8 on 2026-10-18 19:07
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+
+
+def fill_activity(apps, schema_editor):
+    Post = apps.get_model("posts", "Post")
+    Comment = apps.get_model("posts", "Comment")
+    DailyActivity = apps.get_model("posts", "DailyActivity")
+    counts = {}
+    posts = Post.objects.values("author_id", "group_id", "date").annotate(n=Count("id")).order_by()
+    for r in posts.iterator(chunk_size=2000):
+        counts[(r["author_id"], r["group_id"], r["date"])] = [r["n"], 0]
+    comments = (
+        Comment.objects.filter(author__isnull=False)
+        .annotate(day=TruncDate("created_at"))
+        .values("author_id", "post__group_id", "day")
+        .annotate(n=Count("id"))
+        .order_by()
+    )
+    for r in comments.iterator(chunk_size=2000):
+        counts.setdefault((r["author_id"], r["post__group_id"], r["day"]), [0, 0])[1] = r["n"]
+    DailyActivity.objects.bulk_create(
+        [
+            DailyActivity(user_id=user_id, group_id=group_id, date=day, post_count=n_posts, comment_count=n_comments)
+            for (user_id, group_id, day), (n_posts, n_comments) in counts.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0015_streaks'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyActivity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('post_count', models.PositiveIntegerField(default=0)),
+                ('comment_count', models.PositiveIntegerField(default=0)),
+                ('group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_activity', to='posts.group')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_activity', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'daily activity',
+                'indexes': [models.Index(fields=['user', 'date'], name='posts_activity_user_date_idx'), models.Index(fields=['group', 'date'], name='posts_activity_group_date_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'group', 'date'), name='posts_activity_user_group_day_uniq')],
+            },
+        ),
+        migrations.RunPython(fill_activity, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 5.2.8 on 2026-10-18 19:10
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_paths(apps, schema_editor):
+    Comment = apps.get_model("posts", "Comment")
+    Comment.objects.update(reply_count=Coalesce(Subquery(
+        Comment.objects.filter(parent=OuterRef("pk")).order_by().values("parent").annotate(n=Count("id")).values("n")
+    ), 0))
+    # Parents always have a lower id than their replies, so one ordered pass per post suffices.
+    seen, batch, post_id = {}, [], None
+    rows = Comment.objects.order_by("post_id", "id").only("id", "post_id", "parent_id")
+    for comment in rows.iterator(chunk_size=2000):
+        if comment.post_id != post_id:
+            seen, post_id = {}, comment.post_id
+        prefix, depth = seen.get(comment.parent_id, ("", -1))
+        comment.path = f"{prefix}{comment.id:010d}/"
+        comment.depth = depth + 1
+        seen[comment.id] = (comment.path, comment.depth)
+        batch.append(comment)
+        if len(batch) >= 1000:
+            Comment.objects.bulk_update(batch, ["path", "depth"])
+            batch = []
+    if batch:
+        Comment.objects.bulk_update(batch, ["path", "depth"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0016_daily_activity'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='path',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='reply_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'depth', 'id'], name='posts_comment_thread_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'path'], name='posts_comment_path_idx'),
+        ),
+        migrations.RunPython(fill_paths, migrations.RunPython.noop),
+    ]
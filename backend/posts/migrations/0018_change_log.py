@@ -0,0 +1,28 @@
+# Generated by Django 5.2.8 on 2026-10-18 19:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0017_comment_paths'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeLogEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('post', 'Post'), ('comment', 'Comment'), ('group', 'Group'), ('membership', 'Membership')], max_length=12)),
+                ('action', models.CharField(choices=[('upsert', 'Created or updated'), ('delete', 'Deleted')], max_length=8)),
+                ('object_id', models.BigIntegerField()),
+                ('group_id', models.BigIntegerField(blank=True, null=True)),
+                ('user_id', models.BigIntegerField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['group_id', 'id'], name='posts_changelog_group_idx'), models.Index(fields=['user_id', 'id'], name='posts_changelog_user_idx'), models.Index(fields=['created_at'], name='posts_changelog_created_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.8 on 2026-10-18 19:38
+
+import posts.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0022_chunked_uploads'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='group',
+            name='cover',
+            field=posts.models.BlobImageField(blank=True, null=True, upload_to='groups/covers/'),
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='image',
+            field=posts.models.BlobImageField(upload_to=posts.models.upload_to_post),
+        ),
+        migrations.CreateModel(
+            name='Blob',
+            fields=[
+                ('name', models.CharField(max_length=255, primary_key=True, serialize=False)),
+                ('sha256', models.CharField(max_length=64, unique=True)),
+                ('size', models.BigIntegerField()),
+                ('refs', models.PositiveIntegerField(default=0)),
+                ('orphaned_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['refs', 'orphaned_at'], name='posts_blob_refs_idx')],
+            },
+        ),
+    ]
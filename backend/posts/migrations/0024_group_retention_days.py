@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 19:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0023_blob_store'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='group',
+            name='retention_days',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
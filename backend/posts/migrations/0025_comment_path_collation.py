@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-18 20:04
+
+import posts.models
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0024_group_retention_days'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='comment',
+            name='path',
+            field=posts.models.CommentPathField(blank=True, db_collation='C', default=''),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-18 20:17
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0025_comment_path_collation'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='feedentry',
+            index=models.Index(fields=['date'], name='posts_feed_date_idx'),
+        ),
+    ]
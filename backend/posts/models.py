@@ -1,9 +1,12 @@
-from django.db import models
+from django.db import connections, models, router, transaction
+from django.db.models.fields.files import ImageFieldFile
 from django.contrib.auth.models import User
-from django.db.models.signals import post_save, post_delete
+from django.contrib.auth.signals import user_logged_out
+from django.db.models.signals import post_save, post_delete, pre_save
 from django.dispatch import receiver
 from django.utils import timezone
 import secrets
+import uuid
 
 
 class Profile(models.Model):
@@ -13,6 +16,13 @@ class Profile(models.Model):
     def __str__(self):
         return f"{self.user.username} Profile"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Compared on save, so re-saving an unchanged profile (every user save does) is not an edit.
+        instance._loaded_bio = instance.__dict__.get("bio")
+        return instance
+
 
 @receiver(post_save, sender=User)
 def create_user_profile(sender, instance, created, **kwargs):
@@ -28,6 +38,24 @@ def save_user_profile(sender, instance, **kwargs):
         pass
 
 
+class BlobFieldFile(ImageFieldFile):
+    def save(self, name, content, save=True):
+        # Stored under its content hash instead of upload_to; identical files share one blob.
+        from . import blobs
+        self.name = blobs.store(content, name, self.storage).name
+        self._set_instance_attribute(self.name, content)
+        self._committed = True
+        if save:
+            self.instance.save()
+
+    save.alters_data = True
+
+
+class BlobImageField(models.ImageField):
+    """ImageField whose files are stored once per distinct content (see posts.blobs)."""
+    attr_class = BlobFieldFile
+
+
 class Group(models.Model):
     name = models.CharField(max_length=200)
     owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name="owned_groups")
@@ -35,14 +63,30 @@ class Group(models.Model):
     color = models.CharField(max_length=16, default="#6b9bff")
     description = models.TextField(blank=True)
     is_public = models.BooleanField(default=True)
-    cover = models.ImageField(upload_to="groups/covers/", null=True, blank=True)
+    cover = BlobImageField(upload_to="groups/covers/", null=True, blank=True)
+    # Resized WebP/JPEG copies of the cover, written in the background (see posts.variants)
+    cover_variants = models.JSONField(default=dict, blank=True)
     start_date = models.DateField(null=True, blank=True)
     end_date = models.DateField(null=True, blank=True)
+    # Days of posts to keep; overrides RETENTION_DAYS for this group (see posts.retention)
+    retention_days = models.PositiveIntegerField(null=True, blank=True)
+    # Cleared once the audience outgrows FEED_FANOUT_MAX_MEMBERS; such groups are read with the join query instead.
+    feed_fanout = models.BooleanField(default=True)
+    # Denormalized counters, maintained by signals (see posts.counters)
+    post_count = models.PositiveIntegerField(default=0)
+    member_count = models.PositiveIntegerField(default=0)
+    # Bumped on any change to the group, its posts, comments or members (see posts.etags)
+    version = models.PositiveIntegerField(default=1)
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self) -> str:
         return self.name
 
+    @property
+    def cover_srcset(self) -> dict:
+        from . import variants
+        return variants.srcset(variants.urls(self))
+
 
 class GroupMembership(models.Model):
     ROLE_CHOICES = (
@@ -56,6 +100,9 @@ class GroupMembership(models.Model):
 
     class Meta:
         unique_together = ("user", "group")
+        indexes = [
+            models.Index(fields=["group", "role"], name="posts_member_group_role_idx"),
+        ]
 
 
 class GroupInvite(models.Model):
@@ -85,38 +132,174 @@ class Post(models.Model):
     group = models.ForeignKey(Group, on_delete=models.CASCADE, related_name="posts")
     author = models.ForeignKey(User, on_delete=models.CASCADE, related_name="posts")
     caption = models.TextField(blank=True)
-    image = models.ImageField(upload_to=upload_to_post)
+    image = BlobImageField(upload_to=upload_to_post)
+    # Resized WebP/JPEG copies of the image, written in the background (see posts.variants)
+    image_variants = models.JSONField(default=dict, blank=True)
     date = models.DateField(auto_now_add=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    comment_count = models.PositiveIntegerField(default=0)
+    # Bumped on any change to the post or its comments (see posts.etags)
+    version = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        indexes = [
+            # Group feed for a day, newest first (also serves group_id__in lists)
+            models.Index(fields=["date", "group", "-created_at"], name="posts_post_date_group_idx"),
+            # Per-author history: reports, exports
+            models.Index(fields=["author", "date"], name="posts_post_author_date_idx"),
+        ]
+
+    @property
+    def image_srcset(self) -> dict:
+        from . import variants
+        return variants.srcset(variants.urls(self))
 
     def as_dict(self, request=None):
+        from . import variants
         url = self.image.url if self.image else None
         if request and url:
             url = request.build_absolute_uri(url)
+        image_variants = variants.urls(self, request)
         return {
             "id": self.id,
             "group_id": self.group_id,
             "user_name": self.author.username,
             "caption": self.caption,
             "image_url": url,
+            "image_variants": image_variants,
+            "image_srcset": variants.srcset(image_variants),
             "date": self.date.isoformat() if self.date else None,
         }
 
 
+COMMENT_MAX_DEPTH = 50
+COMMENT_PATH_SEGMENT = 11
+
+
+def reserve_ids(model, n: int, using: str | None = None) -> list[int] | None:
+    """
+    Take `n` ids from the table's id sequence ahead of inserting the rows, so
+    values derived from the id can go into the INSERT. None on backends
+    without a sequence to take from.
+    """
+    using = using or router.db_for_write(model)
+    connection = connections[using]
+    table = model._meta.db_table
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute(
+                "SELECT nextval(pg_get_serial_sequence(%s, %s)) FROM generate_series(1, %s)",
+                [table, model._meta.pk.column, n],
+            )
+            return [row[0] for row in cursor.fetchall()]
+        if connection.vendor == "sqlite":
+            # AUTOINCREMENT tables keep their last id in sqlite_sequence; bumping it
+            # takes the write lock, so the range is ours and later inserts skip it.
+            cursor.execute("UPDATE sqlite_sequence SET seq = seq + %s WHERE name = %s RETURNING seq", [n, table])
+            row = cursor.fetchone()
+            if row is None:
+                cursor.execute(
+                    f"INSERT INTO sqlite_sequence (name, seq) SELECT %s, COALESCE(MAX({connection.ops.quote_name(model._meta.pk.column)}), 0) + %s "
+                    f"FROM {connection.ops.quote_name(table)} RETURNING seq",
+                    [table, n],
+                )
+                row = cursor.fetchone()
+            return list(range(row[0] - n + 1, row[0] + 1))
+    return None
+
+
+class CommentPathField(models.TextField):
+    """
+    A text field that compares bytewise: "/" must sort below the digits for
+    subtree ranges. Unbounded, since replies made before COMMENT_MAX_DEPTH was
+    enforced (or outside the API) can nest deeper.
+    """
+
+    def db_parameters(self, connection):
+        params = super().db_parameters(connection)
+        # SQLite's default BINARY collation already does; "C" only exists on PostgreSQL.
+        if connection.vendor != "postgresql":
+            params["collation"] = None
+        return params
+
+
+class CommentQuerySet(models.QuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        pending = [c for c in objs if not c.path]
+        unsaved = [c for c in pending if c.pk is None]
+        ids = reserve_ids(self.model, len(unsaved), self.db) if unsaved else []
+        for comment, pk in zip(unsaved, ids or []):
+            comment.pk = pk
+        Comment.fill_paths([c for c in pending if c.pk is not None])
+        created = super().bulk_create(objs, *args, **kwargs)
+        late = [c for c in pending if not c.path]
+        if late:
+            # No ids to reserve on this backend: the paths follow the insert.
+            Comment.fill_paths(late)
+            self.bulk_update(late, ["path", "depth"])
+        return created
+
+
 class Comment(models.Model):
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name="comments")
     author = models.ForeignKey(User, null=True, blank=True, on_delete=models.SET_NULL, related_name="comments")
     user_name = models.CharField(max_length=120)
     text = models.TextField()
     parent = models.ForeignKey("self", null=True, blank=True, on_delete=models.CASCADE, related_name="replies")
+    # Materialized path: zero-padded ids of the ancestors and the comment itself,
+    # each followed by "/", so a subtree is one range on (post, path).
+    path = CommentPathField(blank=True, default="", db_collation="C")
+    depth = models.PositiveSmallIntegerField(default=0)
+    reply_count = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = CommentQuerySet.as_manager()
+
     class Meta:
         ordering = ("-created_at",)
+        indexes = [
+            models.Index(fields=["post", "created_at"], name="posts_comment_post_created_idx"),
+            models.Index(fields=["parent", "created_at"], name="posts_comment_parent_idx"),
+            models.Index(fields=["post", "depth", "id"], name="posts_comment_thread_idx"),
+            models.Index(fields=["post", "path"], name="posts_comment_path_idx"),
+        ]
 
     def __str__(self):
         return f"{self.user_name}: {self.text[:24]}"
 
+    @staticmethod
+    def path_segment(pk: int) -> str:
+        return f"{pk:0{COMMENT_PATH_SEGMENT - 1}d}/"
+
+    @classmethod
+    def fill_paths(cls, comments) -> None:
+        """Set path and depth on comments that have their pk; parents come before their replies."""
+        lookup = {c.parent_id for c in comments if c.parent_id and not cls.parent.is_cached(c)}
+        parents = {pk: (path, depth) for pk, path, depth in cls.objects.filter(pk__in=lookup).values_list("id", "path", "depth")}
+        for comment in comments:
+            parent = comment.parent if cls.parent.is_cached(comment) else None
+            if parent is not None:
+                prefix, depth = parent.path, parent.depth
+            else:
+                prefix, depth = parents.get(comment.parent_id, ("", -1))
+            comment.path = prefix + cls.path_segment(comment.pk)
+            comment.depth = depth + 1
+
+    def save(self, *args, **kwargs):
+        if not self.path:
+            # Reserve the id so the path goes into the INSERT and post_save receivers see it.
+            ids = reserve_ids(Comment, 1, kwargs.get("using")) if self.pk is None else []
+            if ids:
+                self.pk = ids[0]
+                kwargs["force_insert"] = True
+            if self.pk is not None:
+                self.fill_paths([self])
+        super().save(*args, **kwargs)
+        if not self.path:
+            self.fill_paths([self])
+            Comment.objects.filter(pk=self.pk).update(path=self.path, depth=self.depth)
+
     def as_dict(self):
         return {
             "id": self.id,
@@ -128,6 +311,237 @@ class Comment(models.Model):
         }
 
 
+class FeedEntry(models.Model):
+    """One row per (reader, post), written when the post is created (fan-out on write)."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="feed_entries")
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name="feed_entries")
+    group = models.ForeignKey(Group, on_delete=models.CASCADE, related_name="feed_entries")
+    date = models.DateField()
+    created_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ("user", "post")
+        indexes = [
+            models.Index(fields=["user", "date", "-created_at"], name="posts_feed_user_date_idx"),
+            models.Index(fields=["user", "group"], name="posts_feed_user_group_idx"),
+            # Pruning of past days
+            models.Index(fields=["date"], name="posts_feed_date_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.user_id} <- post {self.post_id} ({self.date})"
+
+
+class Streak(models.Model):
+    """
+    Posting streak for a user, overall (group is null) or within one group.
+
+    Updated in O(1) when a post is created; `rollover_streaks` zeroes broken
+    streaks once a day.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="streaks")
+    group = models.ForeignKey(Group, null=True, blank=True, on_delete=models.CASCADE, related_name="streaks")
+    current = models.PositiveIntegerField(default=0)
+    longest = models.PositiveIntegerField(default=0)
+    last_active_date = models.DateField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "group"], name="posts_streak_user_group_uniq"),
+            models.UniqueConstraint(
+                fields=["user"], condition=models.Q(group__isnull=True), name="posts_streak_user_overall_uniq"
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["last_active_date"], name="posts_streak_last_active_idx"),
+        ]
+
+    def __str__(self) -> str:
+        scope = f"group {self.group_id}" if self.group_id else "overall"
+        return f"{self.user_id} {scope}: {self.current} (best {self.longest})"
+
+
+class DailyActivity(models.Model):
+    """Per (user, group, day) post and comment counts, kept current by signals (see posts.rollups)."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="daily_activity")
+    group = models.ForeignKey(Group, on_delete=models.CASCADE, related_name="daily_activity")
+    date = models.DateField()
+    post_count = models.PositiveIntegerField(default=0)
+    comment_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = "daily activity"
+        constraints = [
+            models.UniqueConstraint(fields=["user", "group", "date"], name="posts_activity_user_group_day_uniq"),
+        ]
+        indexes = [
+            models.Index(fields=["user", "date"], name="posts_activity_user_date_idx"),
+            models.Index(fields=["group", "date"], name="posts_activity_group_date_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.date} user {self.user_id} group {self.group_id}: {self.post_count} posts, {self.comment_count} comments"
+
+
+class ChangeLogEntry(models.Model):
+    """Append-only record of post/comment/group/membership changes, read by /api/sync/."""
+    KIND_CHOICES = (
+        ("post", "Post"),
+        ("comment", "Comment"),
+        ("group", "Group"),
+        ("membership", "Membership"),
+    )
+    ACTION_CHOICES = (
+        ("upsert", "Created or updated"),
+        ("delete", "Deleted"),
+    )
+    kind = models.CharField(max_length=12, choices=KIND_CHOICES)
+    action = models.CharField(max_length=8, choices=ACTION_CHOICES)
+    object_id = models.BigIntegerField()
+    # Plain ids rather than foreign keys: entries must outlive the rows they describe.
+    group_id = models.BigIntegerField(null=True, blank=True)
+    user_id = models.BigIntegerField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["group_id", "id"], name="posts_changelog_group_idx"),
+            models.Index(fields=["user_id", "id"], name="posts_changelog_user_idx"),
+            models.Index(fields=["created_at"], name="posts_changelog_created_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"#{self.id} {self.action} {self.kind} {self.object_id}"
+
+
+class UploadSession(models.Model):
+    """A resumable, chunked upload of a post image (see posts.uploads)."""
+    OPEN = "open"
+    COMPLETE = "complete"
+    STATUS_CHOICES = (
+        (OPEN, "Open"),
+        (COMPLETE, "Complete"),
+    )
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="upload_sessions")
+    group = models.ForeignKey(Group, on_delete=models.CASCADE, related_name="upload_sessions")
+    caption = models.TextField(blank=True)
+    filename = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100, blank=True)
+    size = models.PositiveBigIntegerField()
+    # Length of the contiguous prefix written so far; the client resumes from here.
+    received = models.PositiveBigIntegerField(default=0)
+    status = models.CharField(max_length=12, choices=STATUS_CHOICES, default=OPEN)
+    post = models.ForeignKey(Post, null=True, blank=True, on_delete=models.SET_NULL, related_name="+")
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["expires_at"], name="posts_upload_expires_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.filename} {self.received}/{self.size} ({self.status})"
+
+
+class IdempotencyKey(models.Model):
+    """The response to a request sent with an Idempotency-Key header, replayed on retries (see posts.idempotency)."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+    key = models.CharField(max_length=255)
+    # Method, path and content digest of the first request; reusing the key for another request is rejected.
+    request = models.CharField(max_length=300)
+    # Null while the first request is still being handled.
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "key"], name="posts_idempotency_user_key_uniq"),
+        ]
+        indexes = [
+            models.Index(fields=["created_at"], name="posts_idempotency_created_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.user_id}:{self.key} -> {self.status_code}"
+
+
+class Blob(models.Model):
+    """One stored file per distinct content, shared by every row that uses it (see posts.blobs)."""
+    name = models.CharField(max_length=255, primary_key=True)
+    sha256 = models.CharField(max_length=64, unique=True)
+    size = models.BigIntegerField()
+    # File fields and variant entries pointing here; adjusted through posts.counters.
+    refs = models.PositiveIntegerField(default=0)
+    # Set when a collection pass first finds the blob unreferenced; it is deleted a grace period later.
+    orphaned_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["refs", "orphaned_at"], name="posts_blob_refs_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.name} ({self.refs} refs)"
+
+
+class CacheVersion(models.Model):
+    """A version number embedded in cache keys, bumped to retire them in every process (see posts.versions)."""
+    key = models.CharField(max_length=100, primary_key=True)
+    value = models.PositiveBigIntegerField(default=1)
+
+    def __str__(self) -> str:
+        return f"{self.key}={self.value}"
+
+
+class Job(models.Model):
+    """A unit of background work, claimed and run by `manage.py worker` (see posts.jobs)."""
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    STATUS_CHOICES = (
+        (QUEUED, "Queued"),
+        (RUNNING, "Running"),
+        (SUCCEEDED, "Succeeded"),
+        (FAILED, "Failed"),
+    )
+    queue = models.CharField(max_length=50, default="default")
+    task = models.CharField(max_length=200)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=12, choices=STATUS_CHOICES, default=QUEUED)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    # Not claimed before this time; pushed back on each retry.
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    progress = models.JSONField(default=dict, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    # Timing of the last attempt: time spent queued before it started, and its run time.
+    wait_ms = models.FloatField(null=True, blank=True)
+    duration_ms = models.FloatField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Claim query: next runnable jobs of a queue
+            models.Index(fields=["queue", "status", "run_after"], name="posts_job_claim_idx"),
+            models.Index(fields=["status", "locked_at"], name="posts_job_status_lock_idx"),
+            models.Index(fields=["status", "finished_at"], name="posts_job_status_finished_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"#{self.id} {self.task} [{self.queue}] {self.status}"
+
+
 class AuditLog(models.Model):
     ACTION_CHOICES = (
         ("create", "Create"),
@@ -143,6 +557,9 @@ class AuditLog(models.Model):
 
     class Meta:
         ordering = ("-created_at",)
+        indexes = [
+            models.Index(fields=["model", "object_id", "-created_at"], name="posts_audit_object_idx"),
+        ]
 
     def __str__(self) -> str:
         return f"{self.created_at:%Y-%m-%d %H:%M} {self.user or 'system'} {self.action} {self.model}#{self.object_id}"
@@ -179,3 +596,338 @@ def log_group_save(sender, instance: 'Group', created: bool, **kwargs):
 @receiver(post_delete, sender=Group)
 def log_group_delete(sender, instance: 'Group', **kwargs):
     _log_action(getattr(instance, '_actor', None), 'delete', instance)
+
+
+@receiver(post_save, sender=User)
+def etags_user_saved(sender, instance: User, created: bool, update_fields=None, **kwargs):
+    if not created and (update_fields is None or {"username", "first_name", "last_name"} & set(update_fields)):
+        from . import etags
+        etags.accounts_changed()
+
+
+@receiver(post_save, sender=Profile)
+def etags_profile_saved(sender, instance: Profile, created: bool, **kwargs):
+    if not created and instance.bio != getattr(instance, "_loaded_bio", instance.bio):
+        from . import etags
+        etags.accounts_changed()
+    instance._loaded_bio = instance.bio
+
+
+@receiver(post_save, sender=Post)
+def fan_out_post(sender, instance: Post, created: bool, **kwargs):
+    if created:
+        from . import feed
+        feed.fan_out_post(instance)
+
+
+@receiver(post_save, sender=GroupMembership)
+def feed_member_joined(sender, instance: GroupMembership, created: bool, **kwargs):
+    if created:
+        from . import feed
+        feed.add_member(instance.user_id, instance.group)
+
+
+@receiver(post_delete, sender=GroupMembership)
+def feed_member_left(sender, instance: GroupMembership, **kwargs):
+    from . import feed
+    feed.remove_member(instance.user_id, instance.group_id)
+
+
+@receiver(post_save, sender=Group)
+def feed_owner_changed(sender, instance: Group, created: bool, **kwargs):
+    previous = getattr(instance, "_authz_previous_owner_id", None)
+    if not created and previous is not None and previous != instance.owner_id:
+        from . import feed
+        feed.change_owner(instance, previous)
+
+
+@receiver(post_save, sender=Post)
+def count_post_created(sender, instance: Post, created: bool, **kwargs):
+    if created:
+        from . import counters
+        counters.bump(Group, instance.group_id, "post_count", 1)
+
+
+@receiver(post_delete, sender=Post)
+def count_post_deleted(sender, instance: Post, **kwargs):
+    from . import counters
+    counters.bump(Group, instance.group_id, "post_count", -1)
+
+
+@receiver(post_save, sender=Comment)
+def count_comment_created(sender, instance: Comment, created: bool, **kwargs):
+    if created:
+        from . import counters
+        counters.bump(Post, instance.post_id, "comment_count", 1)
+
+
+@receiver(post_delete, sender=Comment)
+def count_comment_deleted(sender, instance: Comment, **kwargs):
+    from . import counters
+    counters.bump(Post, instance.post_id, "comment_count", -1)
+
+
+@receiver(post_save, sender=Comment)
+def count_reply_created(sender, instance: Comment, created: bool, **kwargs):
+    if created and instance.parent_id:
+        from . import counters
+        counters.bump(Comment, instance.parent_id, "reply_count", 1)
+
+
+@receiver(post_delete, sender=Comment)
+def count_reply_deleted(sender, instance: Comment, **kwargs):
+    if instance.parent_id:
+        from . import counters
+        counters.bump(Comment, instance.parent_id, "reply_count", -1)
+
+
+@receiver(post_save, sender=GroupMembership)
+def count_member_joined(sender, instance: GroupMembership, created: bool, **kwargs):
+    if created:
+        from . import counters
+        counters.bump(Group, instance.group_id, "member_count", 1)
+
+
+@receiver(post_delete, sender=GroupMembership)
+def count_member_left(sender, instance: GroupMembership, **kwargs):
+    from . import counters
+    counters.bump(Group, instance.group_id, "member_count", -1)
+
+
+@receiver(post_save, sender=Post)
+def reports_post_saved(sender, instance: Post, created: bool, **kwargs):
+    if created:
+        from . import reports
+        reports.invalidate(instance.author_id, instance.group.owner_id)
+
+
+@receiver(post_delete, sender=Post)
+def reports_post_deleted(sender, instance: Post, **kwargs):
+    from . import reports
+    owner_id = Group.objects.filter(pk=instance.group_id).values_list("owner_id", flat=True).first()
+    reports.invalidate(instance.author_id, *([owner_id] if owner_id else []))
+
+
+@receiver(post_save, sender=Group)
+def reports_group_saved(sender, instance: Group, **kwargs):
+    # The owner's per-group breakdown lists group names and colours.
+    from . import reports
+    previous = getattr(instance, "_authz_previous_owner_id", None)
+    reports.invalidate(instance.owner_id, *([previous] if previous else []))
+
+
+@receiver(post_delete, sender=Group)
+def reports_group_deleted(sender, instance: Group, **kwargs):
+    from . import reports
+    reports.invalidate(instance.owner_id)
+
+
+@receiver(post_save, sender=Post)
+def streak_post_created(sender, instance: Post, created: bool, **kwargs):
+    if created:
+        from . import streaks
+        streaks.record_post(instance)
+
+
+@receiver(post_save, sender=Post)
+def rollup_post_created(sender, instance: Post, created: bool, **kwargs):
+    if created:
+        from . import rollups
+        rollups.bump(instance.author_id, instance.group_id, instance.date, "post_count", 1)
+
+
+@receiver(post_delete, sender=Post)
+def rollup_post_deleted(sender, instance: Post, **kwargs):
+    from . import rollups
+    rollups.bump(instance.author_id, instance.group_id, instance.date, "post_count", -1)
+
+
+@receiver(post_save, sender=Comment)
+def rollup_comment_created(sender, instance: Comment, created: bool, **kwargs):
+    if created and instance.author_id:
+        from . import rollups
+        rollups.bump(instance.author_id, instance.post.group_id, timezone.localdate(instance.created_at), "comment_count", 1)
+
+
+@receiver(post_delete, sender=Comment)
+def rollup_comment_deleted(sender, instance: Comment, **kwargs):
+    if instance.author_id:
+        from . import rollups
+        group_id = Post.objects.filter(pk=instance.post_id).values_list("group_id", flat=True).first()
+        if group_id is not None:
+            rollups.bump(instance.author_id, group_id, timezone.localdate(instance.created_at), "comment_count", -1)
+
+
+@receiver(post_save, sender=Post)
+def changelog_post_saved(sender, instance: Post, **kwargs):
+    from . import changelog
+    changelog.record("post", "upsert", instance.id, group_id=instance.group_id)
+
+
+@receiver(post_delete, sender=Post)
+def changelog_post_deleted(sender, instance: Post, **kwargs):
+    from . import changelog
+    changelog.record("post", "delete", instance.id, group_id=instance.group_id)
+
+
+@receiver(post_save, sender=Comment)
+def changelog_comment_saved(sender, instance: Comment, **kwargs):
+    from . import changelog
+    changelog.record("comment", "upsert", instance.id, group_id=changelog.post_group_id(instance))
+
+
+@receiver(post_delete, sender=Comment)
+def changelog_comment_deleted(sender, instance: Comment, **kwargs):
+    from . import changelog
+    changelog.record("comment", "delete", instance.id, group_id=changelog.post_group_id(instance))
+
+
+@receiver(post_save, sender=Group)
+def changelog_group_saved(sender, instance: Group, **kwargs):
+    from . import changelog
+    changelog.record("group", "upsert", instance.id, group_id=instance.id, user_id=instance.owner_id)
+
+
+@receiver(post_delete, sender=Group)
+def changelog_group_deleted(sender, instance: Group, **kwargs):
+    from . import changelog
+    # Memberships are gone by now; the owner is told directly, members through their membership deletes.
+    changelog.record("group", "delete", instance.id, group_id=instance.id, user_id=instance.owner_id)
+
+
+@receiver(post_save, sender=GroupMembership)
+def changelog_membership_saved(sender, instance: GroupMembership, **kwargs):
+    from . import changelog
+    changelog.record("membership", "upsert", instance.id, group_id=instance.group_id, user_id=instance.user_id)
+
+
+@receiver(post_delete, sender=GroupMembership)
+def changelog_membership_deleted(sender, instance: GroupMembership, **kwargs):
+    from . import changelog
+    changelog.record("membership", "delete", instance.id, group_id=instance.group_id, user_id=instance.user_id)
+
+
+@receiver(post_save, sender=Post)
+def realtime_post_created(sender, instance: Post, created: bool, **kwargs):
+    if created:
+        from . import realtime
+        realtime.broadcaster.publish_on_commit(lambda: realtime.post_event(instance))
+
+
+@receiver(post_save, sender=Comment)
+def realtime_comment_created(sender, instance: Comment, created: bool, **kwargs):
+    from . import changelog, realtime
+    if created and realtime.broadcaster.listening:
+        group_id = changelog.post_group_id(instance)
+        realtime.broadcaster.publish_on_commit(lambda: realtime.comment_event(instance, group_id))
+
+
+@receiver(post_save, sender=Post)
+def version_post_saved(sender, instance: Post, created: bool, **kwargs):
+    from . import counters
+    if not created:
+        counters.bump(Post, instance.id, "version", 1)
+    counters.bump(Group, instance.group_id, "version", 1)
+
+
+@receiver(post_delete, sender=Post)
+def version_post_deleted(sender, instance: Post, **kwargs):
+    from . import counters
+    counters.bump(Group, instance.group_id, "version", 1)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def version_comment_changed(sender, instance: Comment, **kwargs):
+    from . import changelog, counters
+    counters.bump(Post, instance.post_id, "version", 1)
+    group_id = changelog.post_group_id(instance)
+    if group_id is not None:
+        counters.bump(Group, group_id, "version", 1)
+
+
+@receiver(post_save, sender=Group)
+def version_group_saved(sender, instance: Group, created: bool, **kwargs):
+    if not created:
+        from . import counters
+        counters.bump(Group, instance.id, "version", 1)
+
+
+@receiver(post_save, sender=GroupMembership)
+@receiver(post_delete, sender=GroupMembership)
+def version_membership_changed(sender, instance: GroupMembership, **kwargs):
+    from . import counters
+    counters.bump(Group, instance.group_id, "version", 1)
+
+
+@receiver(post_save, sender=GroupMembership)
+@receiver(post_delete, sender=GroupMembership)
+def authz_membership_changed(sender, instance: GroupMembership, **kwargs):
+    from . import authz
+    authz.invalidate(instance.user_id)
+
+
+@receiver(pre_save, sender=Group)
+def authz_remember_owner(sender, instance: Group, update_fields=None, **kwargs):
+    previous = None
+    if instance.pk and (update_fields is None or "owner" in update_fields):
+        previous = Group.objects.filter(pk=instance.pk).values_list("owner_id", flat=True).first()
+    # Reset on every save, so a reused instance doesn't report an old transfer again.
+    instance._authz_previous_owner_id = previous
+
+
+@receiver(post_save, sender=Group)
+def authz_group_saved(sender, instance: Group, created: bool, **kwargs):
+    previous = getattr(instance, "_authz_previous_owner_id", None)
+    if created or (previous is not None and previous != instance.owner_id):
+        from . import authz
+        authz.invalidate(instance.owner_id, previous)
+
+
+@receiver(post_delete, sender=Group)
+def authz_group_deleted(sender, instance: Group, **kwargs):
+    from . import authz
+    authz.invalidate(instance.owner_id)
+
+
+@receiver(user_logged_out)
+def authz_logged_out(sender, request, user, **kwargs):
+    if user is not None:
+        from . import authz
+        authz.forget(user)
+
+
+@receiver(post_delete, sender=User)
+def authz_user_deleted(sender, instance: User, **kwargs):
+    from . import authz
+    authz.forget(instance)
+    authz.invalidate(instance.pk)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=Group)
+def variants_file_saved(sender, instance, **kwargs):
+    from . import variants
+    if not variants.is_current(instance):
+        variants.schedule(instance)
+
+
+@receiver(pre_save, sender=Post)
+@receiver(pre_save, sender=Group)
+def blobs_remember_files(sender, instance, update_fields=None, **kwargs):
+    from . import blobs
+    blobs.remember(instance, update_fields)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=Group)
+def blobs_file_saved(sender, instance, **kwargs):
+    from . import blobs
+    blobs.saved(instance)
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=Group)
+def blobs_file_deleted(sender, instance, **kwargs):
+    from . import blobs
+    blobs.swap(blobs.references(instance), [])
@@ -0,0 +1,154 @@
+"""
+Batch loaders for list endpoints.
+
+Each helper answers a per-object question ("latest comments of this post",
+"members of this group") for a whole page of objects with a single query, so
+list responses cost a fixed number of queries regardless of page size.
+"""
+from collections import defaultdict
+
+from django.db.models import F, Q, Window
+from django.db.models.functions import RowNumber
+
+from . import threads
+from .models import Comment, GroupMembership, Streak
+
+# Members listed inline with a group; the full list is paged from /api/groups/<id>/members/.
+MEMBER_PREVIEW = 50
+
+
+def latest_comments_queryset(post_ids, limit: int = 20):
+    return (
+        Comment.objects.filter(post_id__in=post_ids)
+        .select_related("author")
+        .annotate(rank=Window(
+            expression=RowNumber(),
+            partition_by=[F("post_id")],
+            order_by=[F("created_at").desc(), F("id").desc()],
+        ))
+        .filter(rank__lte=limit)
+        .order_by("post_id", "rank")
+    )
+
+
+def latest_comments_by_post(post_ids, limit: int = 20) -> dict[int, list[Comment]]:
+    """Newest `limit` comments per post, fetched with one ROW_NUMBER() query."""
+    result: dict[int, list[Comment]] = defaultdict(list)
+    post_ids = list(post_ids)
+    if not post_ids:
+        return result
+    for comment in latest_comments_queryset(post_ids, limit):
+        result[comment.post_id].append(comment)
+    return result
+
+
+def attach_reply_previews(comments, limit: int = 50) -> None:
+    """
+    Set `_reply_preview` on every comment in the trees: the oldest `limit`
+    replies of each comment, nested. All levels come from one query over
+    the subtrees' Comment.path ranges, however deep the threads go.
+    """
+    pending = [c for c in comments if not hasattr(c, "_reply_preview")]
+    if not pending:
+        return
+    ranges = Q()
+    for comment in pending:
+        comment._reply_preview = []
+        if comment.path:
+            ranges |= Q(post_id=comment.post_id, path__gt=comment.path, path__lt=threads.subtree_end(comment.path))
+    if not ranges:
+        return
+    loaded = {c.id: c for c in pending}
+    for reply in subtree_replies_queryset(ranges, limit):
+        node = loaded.setdefault(reply.id, reply)
+        if node is reply:
+            reply._reply_preview = []
+        # Path order visits a parent before its replies; replies of a cut-off parent are dropped.
+        parent = loaded.get(reply.parent_id)
+        if parent is not None:
+            parent._reply_preview.append(node)
+
+
+def subtree_replies_queryset(ranges, limit: int = 50):
+    return (
+        Comment.objects.filter(ranges)
+        .select_related("author")
+        .annotate(rank=Window(
+            expression=RowNumber(),
+            partition_by=[F("parent_id")],
+            order_by=[F("created_at").asc(), F("id").asc()],
+        ))
+        .filter(rank__lte=limit)
+        .order_by("path")
+    )
+
+
+def attach_comment_previews(posts, limit: int = 20) -> None:
+    """Set `_comment_preview` (newest comments with their reply trees) on each post."""
+    pending = [p for p in posts if not hasattr(p, "_comment_preview")]
+    if not pending:
+        return
+    by_post = latest_comments_by_post([p.id for p in pending], limit)
+    comments = []
+    for post in pending:
+        post._comment_preview = by_post.get(post.id, [])
+        comments.extend(post._comment_preview)
+    attach_reply_previews(comments)
+
+
+def attach_group_members(groups, limit: int = MEMBER_PREVIEW) -> None:
+    """Set `_member_rows` (the first `limit` members) on each group from one query."""
+    pending = [g for g in groups if not hasattr(g, "_member_rows")]
+    if not pending:
+        return
+    by_group = members_by_group([g.id for g in pending], limit)
+    for group in pending:
+        group._member_rows = by_group.get(group.id, [])
+
+
+def member_row(user_id: int, username: str, first_name: str, last_name: str) -> dict:
+    full_name = f"{first_name} {last_name}".strip()
+    return {"id": user_id, "name": full_name or username, "username": username}
+
+
+MEMBER_FIELDS = ("group_id", "user_id", "user__username", "user__first_name", "user__last_name")
+
+
+def members_queryset(group_ids, limit: int = MEMBER_PREVIEW):
+    return (
+        GroupMembership.objects.filter(group_id__in=group_ids)
+        .annotate(rank=Window(
+            expression=RowNumber(),
+            partition_by=[F("group_id")],
+            order_by=[F("id").asc()],
+        ))
+        .filter(rank__lte=limit)
+        .order_by("group_id", "id")
+        .values(*MEMBER_FIELDS)
+    )
+
+
+def members_by_group(group_ids, limit: int = MEMBER_PREVIEW) -> dict[int, list[dict]]:
+    """The first `limit` member rows (id, username, name) per group, in join order, from one query."""
+    result: dict[int, list[dict]] = defaultdict(list)
+    group_ids = list(group_ids)
+    if not group_ids:
+        return result
+    for row in members_queryset(group_ids, limit):
+        result[row["group_id"]].append(
+            member_row(row["user_id"], row["user__username"], row["user__first_name"], row["user__last_name"])
+        )
+    return result
+
+
+def attach_user_streaks(groups, user) -> None:
+    """Set `_user_streak` (the user's Streak in that group, or None) on each group."""
+    pending = [g for g in groups if not hasattr(g, "_user_streak")]
+    if not pending:
+        return
+    if user is None or not user.is_authenticated:
+        by_group = {}
+    else:
+        by_group = {s.group_id: s for s in Streak.objects.filter(user=user, group_id__in=[g.id for g in pending])}
+    for group in pending:
+        group._user_streak = by_group.get(group.id)
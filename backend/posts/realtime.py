@@ -0,0 +1,212 @@
+"""
+Realtime push of new posts and comments to group members.
+
+A process-wide Broadcaster hands events to subscribers (one asyncio queue per
+open /api/events/ stream) keyed by group. Where events come from is up to
+the backend named by REALTIME_BACKEND:
+
+- LocalBackend (default): post/comment receivers publish in-process after
+  the transaction commits. Enough for a single ASGI worker.
+- ChangeLogBackend: every worker tails the ChangeLogEntry table and
+  publishes what it finds, so writes made by any worker reach streams held
+  by every other worker. A stand-in for Redis/Postgres LISTEN fan-out. It
+  reads settled entries only (see posts.changelog), so events arrive
+  CHANGELOG_SYNC_LAG_SECONDS late.
+
+The streaming view is async, so an idle connection costs a coroutine rather
+than a thread; serve it with an ASGI server (see the Procfile). Membership
+is checked again before each delivery; a stream whose user has left one of
+its groups is closed, and the client reconnects with its current groups.
+"""
+import asyncio
+import threading
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from . import authz, changelog, threads
+from .models import Comment, Post
+
+QUEUE_SIZE = 100
+KEEPALIVE_SECONDS = 15
+RETRY_MS = 5000
+
+
+def post_event(post: Post, request=None) -> dict:
+    from .serializers import PostSerializer
+
+    return {"type": "post", "group_id": post.group_id, "data": PostSerializer(post, context={"request": request}).data}
+
+
+def comment_event(comment: Comment, group_id: int) -> dict:
+    return {"type": "comment", "group_id": group_id, "data": threads.node(comment)}
+
+
+class Subscription:
+    def __init__(self, group_ids, loop: asyncio.AbstractEventLoop):
+        self.group_ids = set(group_ids)
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        self.dropped = 0
+
+    def _put(self, event: dict) -> None:
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # A stalled client loses events; it can catch up through /api/sync/.
+            self.dropped += 1
+
+    def deliver(self, event: dict) -> None:
+        """Thread-safe: schedule `event` onto the subscriber's event loop."""
+        try:
+            self.loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            # The loop has closed; the subscription is being torn down.
+            pass
+
+
+class LocalBackend:
+    """In-process fan-out: events published in this process reach its subscribers."""
+
+    publishes_locally = True
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_group: dict[int, set[Subscription]] = defaultdict(set)
+
+    def subscribe(self, group_ids) -> Subscription:
+        sub = Subscription(group_ids, asyncio.get_running_loop())
+        with self._lock:
+            for group_id in sub.group_ids:
+                self._by_group[group_id].add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        with self._lock:
+            for group_id in sub.group_ids:
+                subs = self._by_group.get(group_id)
+                if subs is not None:
+                    subs.discard(sub)
+                    if not subs:
+                        del self._by_group[group_id]
+
+    def dispatch(self, event: dict) -> int:
+        with self._lock:
+            subs = list(self._by_group.get(event["group_id"], ()))
+        for sub in subs:
+            sub.deliver(event)
+        return len(subs)
+
+    def publish(self, event: dict) -> None:
+        self.dispatch(event)
+
+    @property
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len({sub for subs in self._by_group.values() for sub in subs})
+
+
+class ChangeLogBackend(LocalBackend):
+    """Cross-worker fan-out by tailing the change log; local publishes are ignored."""
+
+    publishes_locally = False
+
+    def __init__(self):
+        super().__init__()
+        self._poller: asyncio.Task | None = None
+        self.interval = float(getattr(settings, "REALTIME_POLL_SECONDS", 2))
+
+    def subscribe(self, group_ids) -> Subscription:
+        sub = super().subscribe(group_ids)
+        if self._poller is None or self._poller.done():
+            self._poller = asyncio.get_running_loop().create_task(self._poll())
+        return sub
+
+    def publish(self, event: dict) -> None:
+        # The change log entry written by the same save is what gets delivered.
+        return None
+
+    async def _poll(self) -> None:
+        last_id = await sync_to_async(_latest_entry_id)()
+        while self.subscriber_count:
+            await asyncio.sleep(self.interval)
+            last_id, events = await sync_to_async(_events_since)(last_id)
+            for event in events:
+                self.dispatch(event)
+
+
+def _latest_entry_id() -> int:
+    return changelog.settled().order_by("-id").values_list("id", flat=True).first() or 0
+
+
+def _events_since(last_id: int, limit: int = 500) -> tuple[int, list[dict]]:
+    entries = list(
+        changelog.settled().filter(id__gt=last_id, kind__in=("post", "comment"), action="upsert").order_by("id")[:limit]
+    )
+    if not entries:
+        return last_id, []
+    post_ids = [e.object_id for e in entries if e.kind == "post"]
+    comment_ids = [e.object_id for e in entries if e.kind == "comment"]
+    posts = {p.id: p for p in Post.objects.filter(pk__in=post_ids).select_related("author")} if post_ids else {}
+    comments = Comment.objects.in_bulk(comment_ids) if comment_ids else {}
+    events, seen = [], set()
+    for entry in entries:
+        key = (entry.kind, entry.object_id)
+        # One event per row per batch; it carries the row's current state.
+        if key in seen or entry.group_id is None:
+            continue
+        seen.add(key)
+        if entry.kind == "post" and entry.object_id in posts:
+            events.append(post_event(posts[entry.object_id]))
+        elif entry.kind == "comment" and entry.object_id in comments:
+            events.append(comment_event(comments[entry.object_id], entry.group_id))
+    return entries[-1].id, events
+
+
+class Broadcaster:
+    def __init__(self, backend=None):
+        self._backend = backend
+        self._lock = threading.Lock()
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            with self._lock:
+                if self._backend is None:
+                    path = getattr(settings, "REALTIME_BACKEND", "posts.realtime.LocalBackend")
+                    self._backend = import_string(path)()
+        return self._backend
+
+    def subscribe(self, group_ids) -> Subscription:
+        return self.backend.subscribe(group_ids)
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        self.backend.unsubscribe(sub)
+
+    def publish(self, event: dict) -> None:
+        self.backend.publish(event)
+
+    @property
+    def listening(self) -> bool:
+        """Whether an event published in this process could reach anyone."""
+        backend = self.backend
+        return backend.publishes_locally and bool(backend.subscriber_count)
+
+    def publish_on_commit(self, build) -> None:
+        """Build and publish an event once the current transaction commits."""
+        # Skip serialization when nobody in this process could receive the event.
+        if not self.listening:
+            return
+        transaction.on_commit(lambda: self.publish(build()))
+
+
+def may_receive(user, group_id: int) -> bool:
+    """Re-check membership from the shared authz cache, not the stream's memo of it."""
+    authz.forget(user)
+    return authz.is_member(user, group_id)
+
+
+broadcaster = Broadcaster()
@@ -0,0 +1,105 @@
+"""
+Posting-activity reports for the server-rendered Reports page.
+
+Per-day series come from the DailyActivity rollup in one GROUP BY query per
+report (plus one for the owner's per-group breakdown), with quiet days filled
+in Python. Results are cached per user under a version number kept in the
+database (posts.versions), which post create/delete signals, imports and
+retention bump for the author and the group owner, and group create/edit/delete
+signals bump for the owner, so every process stops serving the old report.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Sum
+from django.utils import timezone
+
+from . import rollups, versions
+from .models import DailyActivity, Group
+
+RANGE_DAYS = (7, 30, 90, 365)
+MAX_RANGE_DAYS = 366
+
+
+def cache_seconds() -> int:
+    return int(getattr(settings, "REPORTS_CACHE_SECONDS", 3600))
+
+
+def _version_name(user_id: int) -> str:
+    return f"reports:{user_id}"
+
+
+def cache_key(user_id: int, start, end) -> str:
+    return f"reports:{user_id}:{versions.get(_version_name(user_id))}:{start.isoformat()}:{end.isoformat()}"
+
+
+def invalidate(*user_ids: int) -> None:
+    """Retire every cached report of these users (old keys simply expire) when the transaction commits."""
+    versions.bump(*(_version_name(user_id) for user_id in user_ids if user_id))
+
+
+def _series(per_day: dict) -> dict:
+    counts = list(per_day.values())
+    return {
+        "labels": [d.isoformat() for d in per_day],
+        "counts": counts,
+        "total": sum(counts),
+        "active_days": sum(1 for c in counts if c),
+    }
+
+
+def group_breakdown(user, start, end) -> list[dict]:
+    """Posts per day for each group the user owns, from one rollup query."""
+    groups = list(Group.objects.filter(owner=user).order_by("name").values_list("id", "name", "color"))
+    if not groups:
+        return []
+    totals: dict[int, dict] = defaultdict(dict)
+    rows = (
+        DailyActivity.objects.filter(group_id__in=[g[0] for g in groups], date__gte=start, date__lte=end, post_count__gt=0)
+        .values("group_id", "date")
+        .annotate(n=Sum("post_count"))
+        .order_by()
+        .values_list("group_id", "date", "n")
+    )
+    for group_id, day, n in rows:
+        totals[group_id][day] = n
+    days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    breakdown = []
+    for group_id, name, color in groups:
+        series = _series({d: totals[group_id].get(d, 0) for d in days})
+        breakdown.append({"id": group_id, "name": name, "color": color, **series})
+    return breakdown
+
+
+def compute(user, start, end) -> dict:
+    return {
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        **_series(rollups.posts_per_day(start, end, user=user)),
+        "groups": group_breakdown(user, start, end),
+    }
+
+
+def report(user, start, end) -> dict:
+    key = cache_key(user.id, start, end)
+    data = cache.get(key)
+    if data is None:
+        data = compute(user, start, end)
+        cache.set(key, data, cache_seconds())
+    return data
+
+
+def resolve_range(days=None, start=None, end=None) -> tuple:
+    """(start, end) for a preset `days` window ending today or an explicit start/end pair."""
+    today = timezone.localdate()
+    if start is not None or end is not None:
+        end = min(end or today, today)
+        start = start or end - timedelta(days=RANGE_DAYS[0] - 1)
+        if start > end:
+            start, end = end, start
+        start = max(start, end - timedelta(days=MAX_RANGE_DAYS - 1))
+        return start, end
+    days = days if days in RANGE_DAYS else RANGE_DAYS[0]
+    return today - timedelta(days=days - 1), today
@@ -0,0 +1,191 @@
+"""
+Post retention: delete posts that have outlived their group's policy.
+
+Policies, per group:
+- RETENTION_DAYS (or `days` passed in) keeps that many days of posts,
+  today included; 0 keeps none. Unset means keep everything.
+- Group.retention_days replaces the global value for that group.
+- A group whose end_date is more than RETENTION_ENDED_GROUP_DAYS in the
+  past loses all its posts.
+
+Expired posts are deleted oldest first, in chunks of RETENTION_CHUNK_SIZE,
+one transaction per chunk. Rows are removed with plain DELETEs rather than
+through the post_delete receivers; the work those would do per post and per
+comment is done once per chunk instead: group counters and versions,
+activity rollups, change log, blob references and cache invalidation, plus
+a single AuditLog row listing the chunk's posts. After each chunk commits,
+the image files it released are deleted right away on a thread pool
+(posts.blobs.delete_released): blobs nothing else references, and legacy
+files outside the Blob table. `run()` then collects the other unreferenced
+blobs that are past BLOB_GRACE_HOURS.
+
+With `dry_run`, the same chunks are read and counted but nothing changes.
+"""
+import time
+from collections import Counter, defaultdict
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import blobs, changelog, counters, reports, rollups
+from .models import AuditLog, Comment, FeedEntry, Group, Post, UploadSession
+
+POST_FIELDS = ("id", "group_id", "author_id", "date", "image", "image_variants")
+
+
+def default_days() -> int | None:
+    days = getattr(settings, "RETENTION_DAYS", None)
+    return None if days is None else int(days)
+
+
+def chunk_size() -> int:
+    return max(1, int(getattr(settings, "RETENTION_CHUNK_SIZE", 500)))
+
+
+def ended_group_days() -> int:
+    return int(getattr(settings, "RETENTION_ENDED_GROUP_DAYS", 0))
+
+
+def cutoff(days: int, today) -> date:
+    """Posts dated before this are outside a `days`-day window ending today."""
+    return today + timedelta(days=1 - days)
+
+
+def plan(days: int | None = None, today=None) -> tuple:
+    """
+    (default cutoff or None, {group id: cutoff}). Posts dated before their
+    group's cutoff, or the default one for groups not listed, are expired.
+    """
+    today = today or timezone.localdate()
+    days = default_days() if days is None else days
+    default = cutoff(days, today) if days is not None else None
+    ended = today - timedelta(days=ended_group_days())
+    groups = {}
+    rows = Group.objects.filter(Q(retention_days__isnull=False) | Q(end_date__lt=ended)).values_list("id", "retention_days", "end_date")
+    for group_id, group_days, end_date in rows:
+        if end_date is not None and end_date < ended:
+            groups[group_id] = today + timedelta(days=1)
+        elif group_days is not None:
+            groups[group_id] = cutoff(group_days, today)
+    return default, groups
+
+
+def expired(default, groups: dict):
+    by_cutoff = defaultdict(list)
+    for group_id, day in groups.items():
+        by_cutoff[day].append(group_id)
+    condition = Q(pk__in=[])
+    for day, group_ids in by_cutoff.items():
+        condition |= Q(group_id__in=group_ids, date__lt=day)
+    if default is not None:
+        condition |= Q(date__lt=default) & ~Q(group_id__in=list(groups))
+    return Post.objects.filter(condition)
+
+
+def chunks(queryset, size: int):
+    """Lists of post rows, oldest first, each read past the last one (so deleting as we go is fine)."""
+    last = None
+    while True:
+        qs = queryset
+        if last is not None:
+            qs = qs.filter(Q(date__gt=last[0]) | Q(date=last[0], id__gt=last[1]))
+        batch = [dict(zip(POST_FIELDS, row)) for row in qs.order_by("date", "id").values_list(*POST_FIELDS)[:size]]
+        if not batch:
+            return
+        yield batch
+        last = (batch[-1]["date"], batch[-1]["id"])
+
+
+def _delete_chunk(batch: list[dict]) -> tuple[int, list[str]]:
+    """
+    Delete one chunk of posts and their comments; returns the number of
+    comments removed and the image files the posts used.
+    """
+    ids = [row["id"] for row in batch]
+    group_of = {row["id"]: row["group_id"] for row in batch}
+    by_group = Counter(row["group_id"] for row in batch)
+    with transaction.atomic(), counters.batched():
+        comments = list(Comment.objects.filter(post_id__in=ids).values_list("author_id", "post_id", "created_at"))
+        FeedEntry.objects.filter(post_id__in=ids).delete()
+        UploadSession.objects.filter(post_id__in=ids).update(post=None)
+        # Comments and posts go without loading them or firing post_delete; the receivers' work follows.
+        # _raw_delete() is private API, but it is the plain DELETE the collector itself uses for fast
+        # deletes. QuerySet.delete() would load every post and comment to collect cascades (comment
+        # replies, feed entries, upload sessions) even with the receivers disconnected, and
+        # disconnecting them is process-wide, so concurrent requests would lose their receivers too.
+        # The dependent rows are handled above, so there is nothing left to cascade.
+        Comment.objects.filter(post_id__in=ids)._raw_delete(Comment.objects.db)
+        Post.objects.filter(pk__in=ids)._raw_delete(Post.objects.db)
+        for group_id, n in by_group.items():
+            counters.bump(Group, group_id, "post_count", -n)
+            counters.bump(Group, group_id, "version", 1)
+        for (author_id, group_id, day), n in Counter((r["author_id"], r["group_id"], r["date"]) for r in batch).items():
+            rollups.bump(author_id, group_id, day, "post_count", -n)
+        commented = Counter(
+            (author_id, group_of[post_id], timezone.localdate(created_at))
+            for author_id, post_id, created_at in comments
+            if author_id
+        )
+        for (author_id, group_id, day), n in commented.items():
+            rollups.bump(author_id, group_id, day, "comment_count", -n)
+        changelog.record_many("post", "delete", [(row["id"], row["group_id"]) for row in batch])
+        released = [name for row in batch for name in blobs.referenced(row["image"] or "", row["image_variants"])]
+        blobs.swap(released, [])
+        AuditLog.objects.create(
+            action="delete",
+            model="Post",
+            object_id=f"{min(ids)}..{max(ids)}"[:64],
+            details=(
+                f"Retention: {len(ids)} posts dated {batch[0]['date']} to {batch[-1]['date']}, "
+                f"{len(comments)} comments. Posts: {', '.join(map(str, ids))}"
+            ),
+        )
+    owners = Group.objects.filter(pk__in=list(by_group)).values_list("owner_id", flat=True)
+    reports.invalidate(*{row["author_id"] for row in batch}, *owners)
+    return len(comments), released
+
+
+def run(days: int | None = None, dry_run: bool = False, size: int | None = None, today=None,
+        workers: int = 8, grace: float | None = None, progress=None, everything: bool = False) -> dict:
+    """
+    Apply the retention policies, or delete every post with `everything`.
+    Returns {"posts", "comments", "chunks", "first_date", "last_date",
+    "blobs", "bytes", "seconds", "posts_per_second"}, where "blobs" and
+    "bytes" count the media files deleted: those of the deleted posts, and
+    others unreferenced for longer than `grace` hours (BLOB_GRACE_HOURS).
+    `progress`, if given, is called with the running totals after each chunk.
+    """
+    started = time.perf_counter()
+    if everything:
+        # No date filter: posts dated in the future go too.
+        queryset = Post.objects.all()
+    else:
+        default, groups = plan(days, today)
+        queryset = expired(default, groups) if default is not None or groups else None
+    stats = {"posts": 0, "comments": 0, "chunks": 0, "first_date": None, "last_date": None, "blobs": 0, "bytes": 0}
+    if queryset is not None:
+        for batch in chunks(queryset, size or chunk_size()):
+            if dry_run:
+                stats["comments"] += Comment.objects.filter(post_id__in=[row["id"] for row in batch]).count()
+            else:
+                comments, released = _delete_chunk(batch)
+                deleted, freed = blobs.delete_released(released, workers=workers)
+                stats["comments"] += comments
+                stats["blobs"] += deleted
+                stats["bytes"] += freed
+            stats["posts"] += len(batch)
+            stats["chunks"] += 1
+            stats["first_date"] = stats["first_date"] or batch[0]["date"]
+            stats["last_date"] = batch[-1]["date"]
+            if progress:
+                progress(**stats, seconds=time.perf_counter() - started)
+    if not dry_run:
+        deleted, freed = blobs.collect(grace, workers=workers)
+        stats["blobs"] += deleted
+        stats["bytes"] += freed
+    stats["seconds"] = time.perf_counter() - started
+    stats["posts_per_second"] = stats["posts"] / stats["seconds"] if stats["seconds"] else 0.0
+    return stats
@@ -0,0 +1,86 @@
+"""
+Daily activity rollup: post and comment counts per (user, group, day).
+
+Signals keep the table current one row at a time; `backfill_activity`
+rebuilds it from history in date chunks. Analytics read "activity per day"
+from here instead of scanning Post.
+"""
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import Greatest, TruncDate
+from django.utils import timezone
+
+from .models import Comment, DailyActivity, Post
+
+
+def bump(user_id: int, group_id: int, day, field: str, delta: int) -> None:
+    """Add `delta` to one rollup counter, creating the row on first activity."""
+    if day is None or not delta:
+        return
+    rows = DailyActivity.objects.filter(user_id=user_id, group_id=group_id, date=day)
+    expr = F(field) + delta if delta > 0 else Greatest(F(field) + delta, 0)
+    if rows.update(**{field: expr}) or delta < 0:
+        return
+    try:
+        with transaction.atomic():
+            DailyActivity.objects.create(user_id=user_id, group_id=group_id, date=day, **{field: delta})
+    except IntegrityError:
+        # Created concurrently; apply the increment to that row.
+        rows.update(**{field: expr})
+
+
+def posts_per_day(start, end, user=None, group_ids=None) -> dict:
+    """{date: posts} for start..end (inclusive), filled with zeros for quiet days."""
+    qs = DailyActivity.objects.filter(date__gte=start, date__lte=end, post_count__gt=0)
+    if user is not None:
+        qs = qs.filter(user=user)
+    if group_ids is not None:
+        qs = qs.filter(group_id__in=group_ids)
+    totals = dict(qs.values("date").annotate(n=Sum("post_count")).order_by().values_list("date", "n"))
+    days = (end - start).days + 1
+    return {start + timedelta(days=i): totals.get(start + timedelta(days=i), 0) for i in range(days)}
+
+
+def backfill(start=None, end=None, chunk_days: int = 30, stdout=None) -> int:
+    """Recompute rollup rows from posts and comments, one date chunk per transaction."""
+    end = end or timezone.localdate()
+    if start is None:
+        first = Post.objects.order_by("date").values_list("date", flat=True).first()
+        start = first or end
+    written = 0
+    chunk_start = start
+    while chunk_start <= end:
+        chunk_end = min(end, chunk_start + timedelta(days=chunk_days - 1))
+        rows: dict[tuple, DailyActivity] = {}
+        post_rows = (
+            Post.objects.filter(date__gte=chunk_start, date__lte=chunk_end)
+            .values("author_id", "group_id", "date")
+            .annotate(n=Count("id"))
+            .order_by()
+        )
+        for r in post_rows:
+            key = (r["author_id"], r["group_id"], r["date"])
+            rows[key] = DailyActivity(user_id=key[0], group_id=key[1], date=key[2], post_count=r["n"])
+        comment_rows = (
+            Comment.objects.filter(author__isnull=False)
+            .annotate(day=TruncDate("created_at"))
+            .filter(day__gte=chunk_start, day__lte=chunk_end)
+            .values("author_id", "post__group_id", "day")
+            .annotate(n=Count("id"))
+            .order_by()
+        )
+        for r in comment_rows:
+            key = (r["author_id"], r["post__group_id"], r["day"])
+            if key not in rows:
+                rows[key] = DailyActivity(user_id=key[0], group_id=key[1], date=key[2])
+            rows[key].comment_count = r["n"]
+        with transaction.atomic():
+            DailyActivity.objects.filter(date__gte=chunk_start, date__lte=chunk_end).delete()
+            DailyActivity.objects.bulk_create(rows.values(), batch_size=1000)
+        written += len(rows)
+        if stdout is not None:
+            stdout.write(f"  {chunk_start}..{chunk_end}: {len(rows)} rows")
+        chunk_start = chunk_end + timedelta(days=1)
+    return written
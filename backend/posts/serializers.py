@@ -1,13 +1,23 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
-from .models import Group, Post, Profile, Comment
+from . import prefetch, streaks, variants
+from .models import Group, Post, Profile, Comment, Streak
+
+def _request_user(serializer):
+    request = serializer.context.get('request')
+    return getattr(request, 'user', None)
+
 
 class ProfileSerializer(serializers.ModelSerializer):
     username = serializers.CharField(source='user.username', read_only=True)
+    streak = serializers.SerializerMethodField(read_only=True)
 
     class Meta:
         model = Profile
-        fields = ('username', 'bio')
+        fields = ('username', 'bio', 'streak')
+
+    def get_streak(self, obj):
+        return streaks.as_dict(Streak.objects.filter(user_id=obj.user_id, group__isnull=True).first())
 
 class UserSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True)
@@ -25,12 +35,25 @@ class UserSerializer(serializers.ModelSerializer):
         )
         return user
 
+class GroupListSerializer(serializers.ListSerializer):
+    """Loads member rows for the whole list before serializing each group."""
+
+    def to_representation(self, data):
+        groups = list(data.all() if hasattr(data, "all") else data)
+        prefetch.attach_group_members(groups)
+        prefetch.attach_user_streaks(groups, _request_user(self))
+        return super().to_representation(groups)
+
+
 class GroupSerializer(serializers.ModelSerializer):
     owner = serializers.ReadOnlyField(source='owner.username')
+    members = serializers.SerializerMethodField(read_only=True)
     member_usernames = serializers.SerializerMethodField(read_only=True)
-    post_count = serializers.SerializerMethodField(read_only=True)
     member_details = serializers.SerializerMethodField(read_only=True)
     cover_url = serializers.SerializerMethodField(read_only=True)
+    cover_variants = serializers.SerializerMethodField(read_only=True)
+    cover_srcset = serializers.SerializerMethodField(read_only=True)
+    streak = serializers.SerializerMethodField(read_only=True)
 
     class Meta:
         model = Group
@@ -44,12 +67,19 @@ class GroupSerializer(serializers.ModelSerializer):
             'is_public',
             'cover',
             'cover_url',
+            'cover_variants',
+            'cover_srcset',
             'start_date',
             'end_date',
+            'retention_days',
             'member_usernames',
             'member_details',
+            'member_count',
             'post_count',
+            'streak',
         )
+        read_only_fields = ('member_count', 'post_count')
+        list_serializer_class = GroupListSerializer
 
     def validate(self, attrs):
         start = attrs.get("start_date")
@@ -58,26 +88,21 @@ class GroupSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("End date cannot be before start date.")
         return attrs
 
+    def _member_rows(self, obj):
+        # Batch-loaded by GroupListSerializer; single objects load their own
+        if not hasattr(obj, "_member_rows"):
+            prefetch.attach_group_members([obj])
+        return obj._member_rows
+
+    def get_members(self, obj):
+        # Ids of the first prefetch.MEMBER_PREVIEW members; member_count has the total.
+        return [m["id"] for m in self._member_rows(obj)]
+
     def get_member_usernames(self, obj):
-        try:
-            return list(obj.members.values_list('username', flat=True)[:12])
-        except Exception:
-            return []
+        return [m["username"] for m in self._member_rows(obj)[:12]]
 
     def get_member_details(self, obj):
-        try:
-            users = obj.members.values('id', 'username', 'first_name', 'last_name')[:50]
-            details = []
-            for u in users:
-                full_name = f"{u['first_name']} {u['last_name']}".strip()
-                details.append({
-                    "id": u["id"],
-                    "name": full_name or u["username"],
-                    "username": u["username"],
-                })
-            return details
-        except Exception:
-            return []
+        return self._member_rows(obj)
 
     def get_cover_url(self, obj):
         try:
@@ -89,11 +114,26 @@ class GroupSerializer(serializers.ModelSerializer):
             return request.build_absolute_uri(url)
         return url
 
-    def get_post_count(self, obj):
-        try:
-            return obj.posts.count()
-        except Exception:
-            return 0
+    def get_cover_variants(self, obj):
+        return variants.urls(obj, self.context.get('request'))
+
+    def get_cover_srcset(self, obj):
+        return variants.srcset(self.get_cover_variants(obj))
+
+    def get_streak(self, obj):
+        # The requesting user's streak in this group
+        if not hasattr(obj, "_user_streak"):
+            prefetch.attach_user_streaks([obj], _request_user(self))
+        return streaks.as_dict(obj._user_streak)
+
+
+class PostListSerializer(serializers.ListSerializer):
+    """Loads comment previews for the whole list before serializing each post."""
+
+    def to_representation(self, data):
+        posts = list(data.all() if hasattr(data, "all") else data)
+        prefetch.attach_comment_previews(posts)
+        return super().to_representation(posts)
 
 
 class PostSerializer(serializers.ModelSerializer):
@@ -101,7 +141,8 @@ class PostSerializer(serializers.ModelSerializer):
     author_id = serializers.ReadOnlyField(source='author.id')
     user_name = serializers.ReadOnlyField(source='author.username')
     image_url = serializers.SerializerMethodField(read_only=True)
-    comment_count = serializers.SerializerMethodField(read_only=True)
+    image_variants = serializers.SerializerMethodField(read_only=True)
+    image_srcset = serializers.SerializerMethodField(read_only=True)
     comments = serializers.SerializerMethodField(read_only=True)
 
     def get_image_url(self, obj):
@@ -114,20 +155,23 @@ class PostSerializer(serializers.ModelSerializer):
             return request.build_absolute_uri(url)
         return url
 
+    def get_image_variants(self, obj):
+        return variants.urls(obj, self.context.get('request'))
+
+    def get_image_srcset(self, obj):
+        return variants.srcset(self.get_image_variants(obj))
+
     class Meta:
         model = Post
-        fields = ('id', 'group', 'author', 'author_id', 'user_name', 'caption', 'image', 'image_url', 'date', 'comment_count', 'comments')
-
-    def get_comment_count(self, obj):
-        try:
-            return obj.comments.count()
-        except Exception:
-            return 0
+        fields = ('id', 'group', 'author', 'author_id', 'user_name', 'caption', 'image', 'image_url', 'image_variants', 'image_srcset', 'date', 'comment_count', 'comments')
+        read_only_fields = ('comment_count',)
+        list_serializer_class = PostListSerializer
 
     def get_comments(self, obj):
-        qs = obj.comments.select_related("author").all().order_by("-created_at")[:20]
+        if not hasattr(obj, "_comment_preview"):
+            prefetch.attach_comment_previews([obj])
         # Return as flat list here; tree is handled in dedicated comment endpoint
-        return CommentSerializer(qs, many=True).data
+        return CommentSerializer(obj._comment_preview, many=True).data
 
 
 class CommentSerializer(serializers.ModelSerializer):
@@ -141,5 +185,6 @@ class CommentSerializer(serializers.ModelSerializer):
         read_only_fields = ("id", "author", "user_name", "created_at", "post", "replies")
 
     def get_replies(self, obj):
-        qs = obj.replies.select_related("author").all().order_by("created_at")[:50]
-        return CommentSerializer(qs, many=True).data
+        if not hasattr(obj, "_reply_preview"):
+            prefetch.attach_reply_previews([obj])
+        return CommentSerializer(obj._reply_preview, many=True).data
@@ -0,0 +1,95 @@
+"""
+Incremental streak engine.
+
+A post moves the author's overall streak and their streak in the post's group
+forward in O(1): same day is a no-op, the day after the last active day
+extends the streak, anything later restarts it at 1. Deleting a post does not
+shorten a streak; `rollover_streaks --rebuild` recomputes from history.
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Post, Streak
+
+
+def effective_current(streak, today=None) -> int:
+    """The current streak as of `today`, even if the daily rollover has not run yet."""
+    if streak is None or streak.last_active_date is None:
+        return 0
+    today = today or timezone.localdate()
+    if streak.last_active_date < today - timedelta(days=1):
+        return 0
+    return streak.current
+
+
+def as_dict(streak, today=None) -> dict:
+    return {
+        "current": effective_current(streak, today),
+        "longest": streak.longest if streak else 0,
+        "last_active_date": streak.last_active_date.isoformat() if streak and streak.last_active_date else None,
+    }
+
+
+def _advance(user_id: int, group_id, day) -> None:
+    with transaction.atomic():
+        streak, _ = Streak.objects.select_for_update().get_or_create(user_id=user_id, group_id=group_id)
+        last = streak.last_active_date
+        if last is not None and day <= last:
+            # Same day, or a backdated post: nothing to extend.
+            return
+        if last is not None and day == last + timedelta(days=1):
+            streak.current += 1
+        else:
+            streak.current = 1
+        streak.longest = max(streak.longest, streak.current)
+        streak.last_active_date = day
+        streak.save(update_fields=["current", "longest", "last_active_date", "updated_at"])
+
+
+def record_post(post: Post) -> None:
+    day = post.date or timezone.localdate()
+    _advance(post.author_id, None, day)
+    _advance(post.author_id, post.group_id, day)
+
+
+def rollover(today=None) -> int:
+    """Zero every streak whose last active day is before yesterday. Returns rows reset."""
+    today = today or timezone.localdate()
+    return Streak.objects.filter(current__gt=0, last_active_date__lt=today - timedelta(days=1)).update(current=0)
+
+
+def _walk(days, today) -> tuple[int, int]:
+    """(current, longest) for an ascending list of distinct active days."""
+    longest = run = 0
+    prev = None
+    for day in days:
+        run = run + 1 if prev is not None and day == prev + timedelta(days=1) else 1
+        longest = max(longest, run)
+        prev = day
+    current = run if prev is not None and prev >= today - timedelta(days=1) else 0
+    return current, longest
+
+
+def rebuild(today=None, batch_size: int = 1000) -> int:
+    """Recompute every streak from post history. Returns the number of streak rows written."""
+    today = today or timezone.localdate()
+    overall: dict[int, set] = {}
+    per_group: dict[tuple[int, int], set] = {}
+    rows = Post.objects.values_list("author_id", "group_id", "date").distinct().order_by()
+    for author_id, group_id, day in rows.iterator(chunk_size=batch_size):
+        overall.setdefault(author_id, set()).add(day)
+        per_group.setdefault((author_id, group_id), set()).add(day)
+
+    records = []
+    for (user_id, group_id), days in [((uid, None), d) for uid, d in overall.items()] + list(per_group.items()):
+        ordered = sorted(days)
+        current, longest = _walk(ordered, today)
+        records.append(Streak(
+            user_id=user_id, group_id=group_id, current=current, longest=longest, last_active_date=ordered[-1],
+        ))
+    with transaction.atomic():
+        Streak.objects.all().delete()
+        Streak.objects.bulk_create(records, batch_size=batch_size)
+    return len(records)
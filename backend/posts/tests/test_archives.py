@@ -0,0 +1,86 @@
+import io
+import json
+import zipfile
+from datetime import timedelta
+
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.utils import timezone
+
+from posts import archives
+from posts.models import Comment, Job
+from posts.tests.utils import MediaTestCase, client_for, make_group, make_post, make_user, run_jobs
+
+
+class ArchiveTests(MediaTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_user("author")
+        cls.other = make_user("other")
+        cls.group = make_group(cls.user, cls.other, name="Mornings")
+
+    def setUp(self):
+        self.client = client_for(self.user)
+
+    def image(self, data: bytes) -> SimpleUploadedFile:
+        return SimpleUploadedFile("photo.jpg", data, content_type="image/jpeg")
+
+    def build(self) -> dict:
+        response = self.client.post("/api/exports/archives/")
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(run_jobs("default"), [Job.SUCCEEDED])
+        return self.client.get(f"/api/exports/archives/{response.json()['id']}/").json()
+
+    def test_zip_holds_the_manifest_and_each_image_once(self):
+        first = make_post(self.group, self.user, "first", image=self.image(b"shared"))
+        make_post(self.group, self.user, "second", image=self.image(b"shared"))
+        make_post(self.group, self.other, "not mine", image=self.image(b"theirs"))
+        Comment.objects.create(post=first, author=self.other, user_name="other", text="nice")
+
+        status = self.build()
+        self.assertEqual((status["status"], status["posts"], status["files"], status["available"]), ("succeeded", 2, 1, True))
+        response = self.client.get(status["download_url"])
+        self.assertEqual(response["Content-Type"], "application/zip")
+        with zipfile.ZipFile(io.BytesIO(b"".join(response.streaming_content))) as zf:
+            manifest = json.loads(zf.read("manifest.json"))
+            media = [name for name in zf.namelist() if name.startswith("media/")]
+            self.assertEqual(media, [archives.member_name(first.image.name)])
+            self.assertEqual(zf.read(media[0]), b"shared")
+        self.assertEqual(manifest["user"]["username"], "author")
+        self.assertEqual([g["name"] for g in manifest["groups"]], ["Mornings"])
+        self.assertEqual({p["caption"] for p in manifest["posts"]}, {"first", "second"})
+        self.assertEqual({p["file"] for p in manifest["posts"]}, {media[0]})
+        by_caption = {p["caption"]: p for p in manifest["posts"]}
+        self.assertEqual([c["text"] for c in by_caption["first"]["comments"]], ["nice"])
+
+    def test_missing_files_are_reported(self):
+        post = make_post(self.group, self.user, image=self.image(b"gone"))
+        default_storage.delete(post.image.name)
+        job = archives.build.enqueue(user_id=self.user.id)
+        with self.assertLogs("posts.archives", "WARNING"):
+            run_jobs("default")
+        job.refresh_from_db()
+        self.assertEqual((job.result["posts"], job.result["files"], job.result["missing"]), (1, 0, [post.image.name]))
+
+    def test_one_build_at_a_time(self):
+        first = self.client.post("/api/exports/archives/").json()
+        self.assertEqual(self.client.post("/api/exports/archives/").json()["id"], first["id"])
+        self.assertEqual(self.client.get(f"/api/exports/archives/{first['id']}/download/").status_code, 409)
+
+    def test_archives_are_private_and_expire(self):
+        status = self.build()
+        other = client_for(self.other)
+        self.assertEqual(other.get(f"/api/exports/archives/{status['id']}/").status_code, 404)
+        self.assertEqual(other.get(f"/api/exports/archives/{status['id']}/download/").status_code, 404)
+
+        job = Job.objects.get(pk=status["id"])
+        cleanup = Job.objects.get(task=archives.delete.name)
+        self.assertEqual(cleanup.payload, {"name": job.result["name"]})
+        self.assertGreater(cleanup.run_after, timezone.now() + timedelta(hours=archives.hours() - 1))
+        job.result["expires_at"] = (timezone.now() - timedelta(minutes=1)).isoformat()
+        job.save(update_fields=["result"])
+        self.assertEqual(self.client.get(f"/api/exports/archives/{job.pk}/download/").status_code, 410)
+
+        Job.objects.filter(pk=cleanup.pk).update(run_after=timezone.now())
+        run_jobs("default")
+        self.assertFalse(default_storage.exists(job.result["name"]))
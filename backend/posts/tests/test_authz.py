@@ -0,0 +1,101 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from posts import authz
+from posts.models import Group, GroupMembership
+from posts.tests.utils import make_group, make_user
+
+DATABASE_CACHE = {
+    "default": {"BACKEND": "django.core.cache.backends.db.DatabaseCache", "LOCATION": "posts_test_cache"},
+}
+
+
+def fresh(user: User) -> User:
+    """The user as the next request would load it, without this request's memo."""
+    return User.objects.get(pk=user.pk)
+
+
+class RolesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = make_user("owner")
+        cls.member = make_user("member")
+        cls.moderator = make_user("moderator")
+        cls.group = make_group(cls.owner, cls.member)
+        GroupMembership.objects.create(group=cls.group, user=cls.moderator, role=authz.MODERATOR)
+
+    def test_roles(self):
+        self.assertEqual(authz.role_in(self.owner, self.group.id), authz.OWNER)
+        self.assertEqual(authz.role_in(self.member, self.group.id), authz.MEMBER)
+        self.assertTrue(authz.can_moderate(self.moderator, self.group.id))
+        self.assertFalse(authz.can_moderate(self.member, self.group.id))
+        self.assertFalse(authz.is_member(make_user("outsider"), self.group.id))
+        self.assertIsNone(authz.role_in(self.member, "not-an-id"))
+
+    def test_memoized_per_user_object(self):
+        member = fresh(self.member)
+        authz.roles(member)
+        with self.assertNumQueries(0):
+            self.assertTrue(authz.is_member(member, self.group.id))
+        authz.forget(member)
+        with self.assertNumQueries(2):
+            authz.roles(member)
+
+    def test_locmem_is_not_shared(self):
+        # The default test settings use locmem: every request loads roles itself.
+        self.assertFalse(authz.shared_cache())
+        authz.roles(fresh(self.member))
+        self.assertIsNone(cache.get(authz.cache_key(self.member.id)))
+        GroupMembership.objects.filter(group=self.group, user=self.member).delete()
+        self.assertFalse(authz.is_member(fresh(self.member), self.group.id))
+
+
+@override_settings(CACHES=DATABASE_CACHE)
+class SharedCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # Before setUpTestData, whose writes already invalidate cached roles.
+        call_command("createcachetable", DATABASE_CACHE["default"]["LOCATION"], verbosity=0)
+        super().setUpClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = make_user("owner")
+        cls.member = make_user("member")
+        cls.group = make_group(cls.owner, cls.member)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_cached_across_requests(self):
+        self.assertTrue(authz.shared_cache())
+        authz.roles(fresh(self.member))
+        self.assertEqual(cache.get(authz.cache_key(self.member.id)), {self.group.id: authz.MEMBER})
+        member = fresh(self.member)
+        with self.assertNumQueries(1):  # the cache table read
+            self.assertTrue(authz.is_member(member, self.group.id))
+
+    def test_membership_changes_drop_the_entry(self):
+        authz.roles(fresh(self.member))
+        with self.captureOnCommitCallbacks(execute=True):
+            GroupMembership.objects.filter(group=self.group, user=self.member).delete()
+        self.assertIsNone(cache.get(authz.cache_key(self.member.id)))
+        self.assertFalse(authz.is_member(fresh(self.member), self.group.id))
+
+    def test_owner_change_drops_both_owners(self):
+        authz.roles(fresh(self.owner))
+        authz.roles(fresh(self.member))
+        with self.captureOnCommitCallbacks(execute=True):
+            group = Group.objects.get(pk=self.group.pk)
+            group.owner = self.member
+            group.save()
+        self.assertIsNone(cache.get(authz.cache_key(self.owner.id)))
+        self.assertEqual(authz.role_in(fresh(self.member), self.group.id), authz.OWNER)
+
+    @override_settings(AUTHZ_CACHE_SECONDS=0)
+    def test_disabled_with_zero_seconds(self):
+        self.assertFalse(authz.shared_cache())
+        authz.roles(fresh(self.member))
+        self.assertIsNone(cache.get(authz.cache_key(self.member.id)))
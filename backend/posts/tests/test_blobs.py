@@ -0,0 +1,82 @@
+import hashlib
+from datetime import timedelta
+from io import StringIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.utils import timezone
+
+from posts import blobs
+from posts.models import Blob, Post
+from posts.tests.utils import MediaTestCase, make_group, make_post, make_user
+
+
+class BlobTests(MediaTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = make_user("owner")
+        cls.group = make_group(cls.owner)
+
+    def post(self, data: bytes, filename="photo.JPEG") -> Post:
+        return make_post(self.group, self.owner, image=SimpleUploadedFile(filename, data, content_type="image/jpeg"))
+
+    def test_identical_uploads_share_one_blob(self):
+        first, second = self.post(b"same bytes"), self.post(b"same bytes", "other.jpg")
+        third = self.post(b"other bytes")
+        sha = hashlib.sha256(b"same bytes").hexdigest()
+        self.assertEqual(first.image.name, f"blobs/{sha[:2]}/{sha[2:4]}/{sha}.jpg")
+        self.assertEqual(second.image.name, first.image.name)
+        self.assertNotEqual(third.image.name, first.image.name)
+        self.assertEqual(Blob.objects.get(pk=first.image.name).refs, 2)
+        self.assertEqual(Blob.objects.count(), 2)
+
+    def test_references_follow_replacements_and_deletes(self):
+        post = self.post(b"before")
+        before = post.image.name
+        post.image = SimpleUploadedFile("after.jpg", b"after")
+        post.save()
+        self.assertEqual(Blob.objects.get(pk=before).refs, 0)
+        self.assertEqual(Blob.objects.get(pk=post.image.name).refs, 1)
+        post.delete()
+        self.assertEqual(Blob.objects.get(pk=post.image.name).refs, 0)
+
+    def test_collect_waits_for_the_grace_period(self):
+        post = self.post(b"bytes")
+        name = post.image.name
+        post.delete()
+        self.assertEqual(blobs.collect(grace=24), (0, 0))
+        self.assertIsNotNone(Blob.objects.get(pk=name).orphaned_at)
+        Blob.objects.filter(pk=name).update(orphaned_at=timezone.now() - timedelta(hours=25))
+        self.assertEqual(blobs.collect(grace=24), (1, len(b"bytes")))
+        self.assertFalse(default_storage.exists(name))
+
+    def test_a_reupload_revives_an_orphaned_blob(self):
+        post = self.post(b"bytes")
+        post.delete()
+        blobs.collect(grace=24)
+        again = self.post(b"bytes")
+        blob = Blob.objects.get(pk=again.image.name)
+        self.assertEqual((blob.refs, blob.orphaned_at), (1, None))
+
+    def test_recount_repairs_drift(self):
+        post = self.post(b"bytes")
+        Blob.objects.filter(pk=post.image.name).update(refs=7)
+        out = StringIO()
+        call_command("prune_blobs", "--recount", stdout=out)
+        self.assertIn("Corrected 1 reference counts.", out.getvalue())
+        self.assertEqual(Blob.objects.get(pk=post.image.name).refs, 1)
+
+    def test_dedupe_media_adopts_legacy_files(self):
+        first = default_storage.save("posts/a.jpg", ContentFile(b"legacy"))
+        copy = default_storage.save("posts/b.jpg", ContentFile(b"legacy"))
+        posts = [make_post(self.group, self.owner) for _ in range(2)]
+        Post.objects.filter(pk=posts[0].pk).update(image=first)
+        Post.objects.filter(pk=posts[1].pk).update(image=copy)
+        out = StringIO()
+        call_command("dedupe_media", stdout=out)
+        self.assertIn("deleted 1 duplicates", out.getvalue())
+        self.assertEqual(set(Post.objects.values_list("image", flat=True)), {first})
+        self.assertEqual(Blob.objects.get(pk=first).refs, 2)
+        self.assertFalse(default_storage.exists(copy))
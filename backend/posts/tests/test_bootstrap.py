@@ -0,0 +1,51 @@
+from datetime import timedelta
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from posts.tests.utils import client_for, make_group, make_post, make_user
+
+
+class BootstrapTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = make_user("owner")
+        cls.member = make_user("member")
+        cls.group = make_group(cls.owner, cls.member, name="Mornings")
+
+    def bootstrap(self, user):
+        response = client_for(user).get("/api/bootstrap/")
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_user_groups_and_todays_posts(self):
+        today_post = make_post(self.group, self.owner, "today")
+        make_post(self.group, self.owner, "yesterday", date=timezone.localdate() - timedelta(days=1))
+        make_group(make_user("stranger"), name="Elsewhere")
+        data = self.bootstrap(self.member)
+        self.assertEqual(data["user"]["username"], "member")
+        self.assertEqual(data["date"], timezone.localdate().isoformat())
+        self.assertTrue(data["sync_token"])
+        [group] = data["groups"]
+        self.assertEqual((group["name"], group["is_creator"], group["is_member"]), ("Mornings", False, True))
+        self.assertEqual([p["id"] for p in group["posts"]], [today_post.id])
+        self.assertTrue(self.bootstrap(self.owner)["groups"][0]["is_creator"])
+
+    def test_query_count_does_not_grow_with_groups(self):
+        make_post(self.group, self.owner)
+        client = client_for(self.member)
+        with CaptureQueriesContext(connection) as one_group:
+            client.get("/api/bootstrap/")
+        for i in range(3):
+            group = make_group(self.owner, self.member, name=f"Group {i}")
+            make_post(group, self.owner)
+            make_post(group, self.member)
+        with CaptureQueriesContext(connection) as four_groups:
+            response = client.get("/api/bootstrap/")
+        self.assertEqual(len(response.json()["groups"]), 4)
+        self.assertEqual(len(four_groups), len(one_group))
+
+    def test_requires_authentication(self):
+        self.assertEqual(self.client.get("/api/bootstrap/").status_code, 403)
@@ -0,0 +1,53 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from posts.models import Comment, Post
+from posts.serializers import PostSerializer
+from posts.tests.utils import client_for, make_group, make_post, make_user
+
+
+class CommentPreviewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = make_user("owner")
+        cls.member = make_user("member")
+        cls.group = make_group(cls.owner, cls.member)
+
+    def comment(self, post, text, parent=None, author=None):
+        author = author or self.member
+        return Comment.objects.create(post=post, author=author, user_name=author.username, text=text, parent=parent)
+
+    def test_newest_comments_with_nested_replies(self):
+        post = make_post(self.group, self.owner)
+        comments = [self.comment(post, f"c{i}") for i in range(22)]
+        reply = self.comment(post, "reply", parent=comments[-1], author=self.owner)
+        self.comment(post, "nested", parent=reply)
+        data = PostSerializer(Post.objects.get(pk=post.pk)).data
+        # Replies are comments too: the preview holds the newest 20 rows of the post.
+        texts = [c["text"] for c in data["comments"]]
+        self.assertEqual(len(texts), 20)
+        self.assertEqual(texts[:3], ["nested", "reply", "c21"])
+        c21 = data["comments"][2]
+        self.assertEqual([r["text"] for r in c21["replies"]], ["reply"])
+        self.assertEqual([r["text"] for r in c21["replies"][0]["replies"]], ["nested"])
+        self.assertEqual(data["comment_count"], 24)
+
+    def test_query_count_does_not_grow_with_posts(self):
+        client = client_for(self.member)
+        url = f"/api/posts/?group_id={self.group.id}"
+
+        def add_post():
+            post = make_post(self.group, self.owner)
+            parent = self.comment(post, "top")
+            self.comment(post, "reply", parent=parent, author=self.owner)
+
+        add_post()
+        with CaptureQueriesContext(connection) as one_post:
+            client.get(url)
+        for _ in range(5):
+            add_post()
+        with CaptureQueriesContext(connection) as six_posts:
+            response = client.get(url)
+        self.assertEqual(response.json()["count"], 6)
+        self.assertEqual(len(six_posts), len(one_post))
@@ -0,0 +1,71 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from posts import counters
+from posts.models import Comment, Group, GroupMembership, Post
+from posts.tests.utils import client_for, make_group, make_post, make_user
+
+
+class CounterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = make_user("owner")
+        cls.member = make_user("member")
+        cls.group = make_group(cls.owner, cls.member)
+
+    def group_counts(self):
+        return Group.objects.values_list("post_count", "member_count").get(pk=self.group.pk)
+
+    def test_posts_and_members_are_counted(self):
+        self.assertEqual(self.group_counts(), (0, 1))
+        posts = [make_post(self.group, self.member) for _ in range(3)]
+        newcomer = GroupMembership.objects.create(group=self.group, user=make_user("newcomer"))
+        self.assertEqual(self.group_counts(), (3, 2))
+        posts[0].delete()
+        newcomer.delete()
+        self.assertEqual(self.group_counts(), (2, 1))
+
+    def test_comments_and_replies_are_counted(self):
+        post = make_post(self.group, self.member)
+        client = client_for(self.member)
+        top = client.post(f"/api/posts/{post.id}/comments/", {"text": "top"}, content_type="application/json").json()
+        client.post(f"/api/posts/{post.id}/comments/", {"text": "reply", "parent_id": top["id"]}, content_type="application/json")
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, 2)
+        self.assertEqual(Comment.objects.get(pk=top["id"]).reply_count, 1)
+        # Deleting the parent cascades to the reply.
+        Comment.objects.get(pk=top["id"]).delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, 0)
+
+    def test_bulk_delete_batches_counter_updates(self):
+        ids = [make_post(self.group, self.member).id for _ in range(5)]
+        response = client_for(self.member).post("/api/posts/bulk_delete/", {"post_ids": ids}, content_type="application/json")
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.group_counts(), (0, 1))
+
+    def test_batched_collapses_updates_per_delta(self):
+        other = make_group(self.owner, name="other")
+        with self.assertNumQueries(1), counters.batched():
+            for group in (self.group, other):
+                counters.bump(Group, group.pk, "post_count", 2)
+        self.assertEqual(Group.objects.get(pk=other.pk).post_count, 2)
+
+    def test_counters_never_go_negative(self):
+        counters.bump(Group, self.group.pk, "post_count", -5)
+        self.assertEqual(self.group_counts()[0], 0)
+
+    def test_reconcile_fixes_drift(self):
+        post = make_post(self.group, self.member)
+        Comment.objects.create(post=post, author=self.member, user_name="member", text="hi")
+        Group.objects.filter(pk=self.group.pk).update(post_count=9, member_count=0)
+        Post.objects.filter(pk=post.pk).update(comment_count=4)
+        out = StringIO()
+        call_command("reconcile_counters", "--dry-run", stdout=out)
+        self.assertIn("Found 1 groups, 1 posts", out.getvalue())
+        self.assertEqual(self.group_counts(), (9, 0))
+        call_command("reconcile_counters", stdout=StringIO())
+        self.assertEqual(self.group_counts(), (1, 1))
+        self.assertEqual(Post.objects.get(pk=post.pk).comment_count, 1)
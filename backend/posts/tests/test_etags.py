@@ -0,0 +1,87 @@
+from django.test import TestCase
+
+from posts import etags
+from posts.models import CacheVersion, Comment, Group
+from posts.tests.utils import client_for, make_group, make_post, make_user
+
+
+class ETagTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = make_user("owner")
+        cls.member = make_user("member")
+        cls.group = make_group(cls.owner, cls.member)
+        cls.post = make_post(cls.group, cls.owner, "hello")
+
+    def setUp(self):
+        self.client = client_for(self.member)
+
+    def get(self, url, etag=None):
+        headers = {"if-none-match": etag} if etag else {}
+        return self.client.get(url, headers=headers)
+
+    def assertRevalidates(self, url):
+        """The response's tag gets a 304 and is returned; a stale tag gets a 200."""
+        response = self.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Cache-Control"], "private, no-cache")
+        etag = response["ETag"]
+        repeat = self.get(url, etag)
+        self.assertEqual(repeat.status_code, 304)
+        self.assertEqual(repeat["ETag"], etag)
+        return etag
+
+    def test_group_feed_changes_with_new_posts(self):
+        url = f"/api/posts/?group_id={self.group.id}"
+        etag = self.assertRevalidates(url)
+        make_post(self.group, self.owner, "another")
+        self.assertEqual(self.get(url, etag).status_code, 200)
+
+    def test_comments_change_with_new_comments(self):
+        url = f"/api/posts/{self.post.id}/comments/"
+        etag = self.assertRevalidates(url)
+        Comment.objects.create(post=self.post, author=self.owner, user_name="owner", text="hi")
+        self.assertEqual(self.get(url, etag).status_code, 200)
+
+    def test_groups_list_changes_with_group_edits(self):
+        etag = self.assertRevalidates("/api/groups/")
+        group = Group.objects.get(pk=self.group.pk)
+        group.name = "Renamed"
+        group.save()
+        self.assertEqual(self.get("/api/groups/", etag).status_code, 200)
+
+    def test_renaming_a_user_retires_every_tag(self):
+        url = f"/api/posts/?group_id={self.group.id}"
+        etag = self.assertRevalidates(url)
+        before = etags.accounts_version()
+        self.owner.first_name = "Olive"
+        self.owner.save(update_fields=["first_name"])
+        # Kept in the database, so every process sees the new version.
+        self.assertEqual(CacheVersion.objects.get(key=etags.ACCOUNTS_VERSION).value, before + 1)
+        self.assertEqual(self.get(url, etag).status_code, 200)
+
+    def test_unrelated_user_fields_keep_tags(self):
+        url = f"/api/posts/?group_id={self.group.id}"
+        etag = self.assertRevalidates(url)
+        self.owner.set_password("new")
+        self.owner.save(update_fields=["password"])
+        self.assertEqual(self.get(url, etag).status_code, 304)
+
+    def test_profile_bio_retires_tags(self):
+        url = f"/api/posts/?group_id={self.group.id}"
+        etag = self.assertRevalidates(url)
+        profile = self.owner.profile
+        profile.bio = "Morning runner"
+        profile.save()
+        self.assertEqual(self.get(url, etag).status_code, 200)
+
+    def test_tags_are_per_user(self):
+        url = f"/api/posts/?group_id={self.group.id}"
+        etag = self.get(url)["ETag"]
+        self.assertEqual(client_for(self.owner).get(url, headers={"if-none-match": etag}).status_code, 200)
+
+    def test_weak_and_wildcard_match(self):
+        url = f"/api/posts/{self.post.id}/comments/"
+        etag = self.get(url)["ETag"]
+        self.assertEqual(self.get(url, f"W/{etag}").status_code, 304)
+        self.assertEqual(self.get(url, "*").status_code, 304)
@@ -0,0 +1,69 @@
+import csv
+import io
+import json
+from datetime import timedelta
+
+from django.utils import timezone
+
+from posts import imports
+from posts.models import Comment, Post
+from posts.tests.utils import MediaTestCase, client_for, make_group, make_post, make_user
+
+
+class ExportTests(MediaTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_user("author")
+        cls.other = make_user("other")
+        cls.group = make_group(cls.user, cls.other, name="Mornings")
+        cls.second = make_group(cls.user, name="Evenings")
+        today = timezone.localdate()
+        cls.old = make_post(cls.group, cls.user, "old", date=today - timedelta(days=10))
+        cls.new = make_post(cls.second, cls.user, "new, with a comma")
+        make_post(cls.group, cls.other, "not mine")
+        Comment.objects.create(post=cls.old, author=cls.other, user_name="other", text="nice")
+
+    def export(self, query=""):
+        response = client_for(self.user).get(f"/api/exports/posts/{query}")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, b"".join(response.streaming_content).decode()
+
+    def test_csv_of_own_posts_newest_first(self):
+        response, body = self.export()
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertIn('filename="my_posts.csv"', response["Content-Disposition"])
+        exported = list(csv.DictReader(io.StringIO(body)))
+        self.assertEqual([r["caption"] for r in exported], ["new, with a comma", "old"])
+        self.assertEqual(exported[1]["group_name"], "Mornings")
+        self.assertEqual(exported[1]["comment_count"], "1")
+
+    def test_csv_reimports(self):
+        _, body = self.export()
+        Post.objects.filter(author=self.user).delete()
+        result = imports.run(self.user, io.StringIO(body).readlines())
+        self.assertEqual((result["created"], result["failed"]), (2, 0))
+        self.assertEqual(set(Post.objects.filter(author=self.user).values_list("caption", flat=True)), {"old", "new, with a comma"})
+
+    def test_ndjson_with_comments_and_filters(self):
+        start = (timezone.localdate() - timedelta(days=11)).isoformat()
+        end = (timezone.localdate() - timedelta(days=1)).isoformat()
+        _, body = self.export(f"?format=ndjson&start={start}&end={end}")
+        lines = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual([line["id"] for line in lines], [self.old.id])
+        self.assertNotIn("image", lines[0])
+        self.assertEqual([c["text"] for c in lines[0]["comments"]], ["nice"])
+        _, body = self.export(f"?format=ndjson&group={self.second.id}")
+        self.assertEqual([json.loads(line)["id"] for line in body.splitlines()], [self.new.id])
+
+    def test_bad_parameters(self):
+        client = client_for(self.user)
+        for query in ("?format=xml", "?start=yesterday", "?group=abc"):
+            self.assertEqual(client.get(f"/api/exports/posts/{query}").status_code, 400, query)
+        self.assertEqual(self.client.get("/api/exports/posts/").status_code, 401)
+
+    def test_api_json_array(self):
+        response = client_for(self.user).get("/api/posts/export_my_posts/")
+        data = json.loads(b"".join(response.streaming_content))
+        self.assertEqual([p["id"] for p in data], [self.new.id, self.old.id])
+        self.assertEqual([c["text"] for c in data[1]["comments"]], ["nice"])
@@ -0,0 +1,93 @@
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from posts import feed, jobs
+from posts.models import FeedEntry, GroupMembership, Job
+from posts.tests.utils import client_for, make_group, make_post, make_user, run_jobs
+
+
+class FeedFanOutTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = make_user("owner")
+        cls.member = make_user("member")
+        cls.group = make_group(cls.owner, cls.member)
+
+    def readers(self, post):
+        return set(FeedEntry.objects.filter(post=post).values_list("user__username", flat=True))
+
+    def feed_ids(self, user):
+        return [post["id"] for post in client_for(user).get("/api/posts/?cursor=").json()["results"]]
+
+    def test_new_post_reaches_every_member_and_the_owner(self):
+        post = make_post(self.group, self.member, "hello")
+        self.assertEqual(self.readers(post), {"owner", "member"})
+        self.assertEqual(self.feed_ids(self.owner), [post.id])
+
+    def test_joining_backfills_today_and_leaving_prunes(self):
+        post = make_post(self.group, self.owner, "hello")
+        newcomer = make_user("newcomer")
+        membership = GroupMembership.objects.create(group=self.group, user=newcomer)
+        self.assertEqual(self.feed_ids(newcomer), [post.id])
+        own = make_post(self.group, newcomer, "mine")
+        membership.delete()
+        # Their own post stays in their feed.
+        self.assertEqual(self.feed_ids(newcomer), [own.id])
+
+    def test_owner_transfer_moves_the_feed(self):
+        post = make_post(self.group, self.member, "hello")
+        heir = make_user("heir")
+        self.group.owner = heir
+        self.group.save()
+        self.assertEqual(self.readers(post), {"heir", "member"})
+        self.assertEqual(self.feed_ids(self.owner), [])
+
+    def test_owner_transfer_to_a_member_keeps_the_old_owner_if_they_stay(self):
+        post = make_post(self.group, self.member, "hello")
+        GroupMembership.objects.create(group=self.group, user=self.owner)
+        self.group.owner = self.member
+        self.group.save()
+        self.assertEqual(self.readers(post), {"owner", "member"})
+
+    @override_settings(FEED_FANOUT_MAX_MEMBERS=1)
+    def test_large_groups_fall_back_to_the_join_query(self):
+        post = make_post(self.group, self.member, "hello")
+        self.group.refresh_from_db()
+        self.assertFalse(self.group.feed_fanout)
+        self.assertFalse(FeedEntry.objects.filter(group=self.group).exists())
+        self.assertEqual(self.feed_ids(self.owner), [post.id])
+
+
+class FeedPruneTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = make_user("owner")
+        cls.group = make_group(cls.owner)
+
+    def make_entries(self, *days_ago):
+        today = timezone.localdate()
+        for days in days_ago:
+            post = make_post(self.group, self.owner, date=today - timedelta(days=days))
+            FeedEntry.objects.filter(post=post).update(date=post.date)
+
+    @override_settings(FEED_KEEP_DAYS=2)
+    def test_prune_keeps_today_and_yesterday(self):
+        self.make_entries(0, 1, 2, 30)
+        self.assertEqual(feed.prune(None), 2)
+        today = timezone.localdate()
+        self.assertEqual(set(FeedEntry.objects.values_list("date", flat=True)), {today, today - timedelta(days=1)})
+
+    @override_settings(JOB_SCHEDULE={"posts.feed.prune": 3600})
+    def test_prune_is_queued_once_and_runs_on_the_worker(self):
+        self.make_entries(0, 5)
+        self.assertEqual(jobs.enqueue_periodic(), 1)
+        self.assertEqual(jobs.enqueue_periodic(), 0)
+        job = Job.objects.get(task="posts.feed.prune")
+        self.assertGreater(job.run_after, timezone.now() + timedelta(minutes=59))
+        Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+        self.assertEqual(run_jobs("default"), [Job.SUCCEEDED])
+        self.assertEqual(FeedEntry.objects.count(), 1)
+        # The next run is queued once this one has finished.
+        self.assertEqual(jobs.enqueue_periodic(), 1)
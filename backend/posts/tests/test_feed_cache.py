@@ -0,0 +1,54 @@
+from django.test import TestCase
+
+from posts import feed_cache
+from posts.models import Comment, GroupMembership
+from posts.tests.utils import client_for, make_group, make_post, make_user
+
+
+class FeedCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = make_user("owner")
+        cls.member = make_user("member")
+        cls.group = make_group(cls.owner, cls.member)
+        cls.post = make_post(cls.group, cls.owner, "hello")
+
+    def setUp(self):
+        feed_cache.cache().clear()
+        self.url = f"/api/posts/?group_id={self.group.id}"
+
+    def get(self, user=None):
+        response = client_for(user or self.member).get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_members_share_one_cached_page(self):
+        first = self.get(self.member)
+        self.assertEqual(self.get(self.owner), first)
+        self.assertEqual(feed_cache.stats(), {"hits": 1, "misses": 1, "hit_rate": 0.5})
+
+    def test_writes_retire_the_cached_page(self):
+        self.get()
+        make_post(self.group, self.member, "new")
+        self.assertEqual(self.get()["count"], 2)
+        Comment.objects.create(post=self.post, author=self.member, user_name="member", text="hi")
+        data = self.get()
+        self.assertEqual([c["text"] for p in data["results"] for c in p["comments"]], ["hi"])
+        self.assertEqual(feed_cache.stats()["hits"], 0)
+
+    def test_queries_are_cached_separately(self):
+        self.get()
+        response = client_for(self.member).get(self.url + "&search=nothing")
+        self.assertEqual(response.json()["count"], 0)
+
+    def test_non_members_are_not_served_the_cache(self):
+        self.get()
+        outsider = make_user("outsider")
+        self.assertEqual(self.get(outsider)["count"], 0)
+        GroupMembership.objects.filter(group=self.group, user=self.member).delete()
+        self.assertEqual(self.get(self.member)["count"], 0)
+
+    def test_stats_are_for_admins(self):
+        self.assertEqual(client_for(self.member).get("/api/feed-cache/stats/").status_code, 403)
+        admin = make_user("admin", is_staff=True)
+        self.assertEqual(client_for(admin).get("/api/feed-cache/stats/").json()["hits"], 0)
@@ -0,0 +1,51 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from posts import prefetch
+from posts.models import GroupMembership
+from posts.tests.utils import client_for, make_group, make_post, make_user
+
+
+class GroupSerializerTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = make_user("owner")
+        cls.member = make_user("member", first_name="Mia", last_name="Park")
+        cls.group = make_group(cls.owner, cls.member, name="Mornings")
+        make_post(cls.group, cls.member)
+
+    def test_member_fields_and_counters(self):
+        response = client_for(self.member).get("/api/groups/")
+        [group] = response.json()["results"]
+        self.assertEqual(group["members"], [self.member.id])
+        self.assertEqual(group["member_usernames"], ["member"])
+        self.assertEqual(group["member_details"], [{"id": self.member.id, "name": "Mia Park", "username": "member"}])
+        self.assertEqual((group["member_count"], group["post_count"]), (1, 1))
+
+    def test_query_count_does_not_grow_with_groups(self):
+        client = client_for(self.member)
+        with CaptureQueriesContext(connection) as one_group:
+            client.get("/api/groups/")
+        for i in range(3):
+            group = make_group(self.owner, self.member, make_user(f"user{i}"), name=f"Group {i}")
+            make_post(group, self.member)
+        with CaptureQueriesContext(connection) as four_groups:
+            response = client.get("/api/groups/")
+        self.assertEqual(len(response.json()["results"]), 4)
+        self.assertEqual(len(four_groups), len(one_group))
+
+    def test_previews_are_capped_and_members_paged(self):
+        users = User.objects.bulk_create([User(username=f"user{i}") for i in range(prefetch.MEMBER_PREVIEW + 5)])
+        for user in users:
+            GroupMembership.objects.create(group=self.group, user=user)
+        client = client_for(self.member)
+        group = client.get(f"/api/groups/{self.group.id}/").json()
+        self.assertEqual(len(group["members"]), prefetch.MEMBER_PREVIEW)
+        self.assertEqual(len(group["member_usernames"]), 12)
+        self.assertEqual(group["member_count"], prefetch.MEMBER_PREVIEW + 6)
+        page = client.get(f"/api/groups/{self.group.id}/members/?page=2").json()
+        self.assertEqual(page["count"], prefetch.MEMBER_PREVIEW + 6)
+        self.assertEqual(len(page["results"]), 6)
+        self.assertEqual(page["results"][-1]["role"], "member")
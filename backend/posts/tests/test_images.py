@@ -0,0 +1,109 @@
+import io
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase
+from PIL import Image, PngImagePlugin
+
+from posts import imaging, variants
+from posts.models import Post
+from posts.tests.utils import MediaTestCase, make_group, make_post, make_user, run_jobs
+
+
+def jpeg(size=(400, 300), orientation=1) -> bytes:
+    exif = Image.Exif()
+    exif[imaging.ORIENTATION] = orientation
+    exif[0x010F] = "Camera maker"
+    buf = io.BytesIO()
+    Image.new("RGB", size, (200, 40, 40)).save(buf, "JPEG", exif=exif, comment=b"taken at home")
+    return buf.getvalue()
+
+
+def png(size=(64, 48)) -> bytes:
+    info = PngImagePlugin.PngInfo()
+    info.add_text("Comment", "taken at home")
+    buf = io.BytesIO()
+    Image.new("RGBA", size, (0, 120, 0, 128)).save(buf, "PNG", pnginfo=info)
+    return buf.getvalue()
+
+
+def scan_data(data: bytes) -> bytes:
+    """The entropy-coded part of a JPEG, from its start-of-scan marker."""
+    return data[data.index(b"\xff\xda"):]
+
+
+class RenderTests(SimpleTestCase):
+    def test_upright_jpeg_keeps_its_image_data(self):
+        data = jpeg()
+        original = imaging.render(data, 2560)["original"]
+        self.assertEqual(scan_data(original["data"]), scan_data(data))
+        self.assertEqual((original["width"], original["height"], original["ext"]), (400, 300, "jpg"))
+        with Image.open(io.BytesIO(original["data"])) as img:
+            self.assertEqual(dict(img.getexif()), {})
+            self.assertNotIn("comment", img.info)
+
+    def test_rotated_jpeg_is_reencoded_upright(self):
+        original = imaging.render(jpeg(orientation=6), 2560)["original"]
+        self.assertEqual((original["width"], original["height"]), (300, 400))
+        with Image.open(io.BytesIO(original["data"])) as img:
+            self.assertEqual(img.size, (300, 400))
+            self.assertEqual(dict(img.getexif()), {})
+            self.assertNotIn("comment", img.info)
+
+    def test_large_originals_are_downscaled(self):
+        original = imaging.render(jpeg(size=(1200, 600)), 1000)["original"]
+        self.assertEqual((original["width"], original["height"]), (1000, 500))
+
+    def test_png_keeps_its_pixels_without_text(self):
+        data = png()
+        original = imaging.render(data, 2560)["original"]
+        self.assertEqual(original["ext"], "png")
+        self.assertLess(len(original["data"]), len(data))
+        self.assertNotIn(b"tEXt", original["data"])
+        with Image.open(io.BytesIO(original["data"])) as kept, Image.open(io.BytesIO(data)) as uploaded:
+            self.assertEqual(kept.tobytes(), uploaded.tobytes())
+
+    def test_without_normalize_only_variants_are_rendered(self):
+        rendered = imaging.render(jpeg(size=(2400, 1200)), 2560, normalize=False)
+        self.assertIsNone(rendered["original"]["data"])
+        for name, edge in imaging.VARIANTS:
+            self.assertEqual(max(rendered[name]["width"], rendered[name]["height"]), edge)
+            self.assertEqual(set(rendered[name]["formats"]), set(imaging.FORMATS))
+
+    def test_unparseable_markers_are_not_kept(self):
+        self.assertIsNone(imaging._strip_jpeg(b"\xff\xd8\x00\x00garbage"))
+        self.assertIsNone(imaging._strip_png(imaging.PNG_SIGNATURE + b"\x00\x00"))
+
+
+class BuildTests(MediaTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = make_user("owner")
+        cls.group = make_group(cls.owner)
+
+    def upload(self, data: bytes) -> Post:
+        post = make_post(self.group, self.owner, image=SimpleUploadedFile("photo.jpg", data, content_type="image/jpeg"))
+        self.assertEqual(run_jobs("images"), ["succeeded"])
+        post.refresh_from_db()
+        return post
+
+    def test_build_stores_the_stripped_original_and_variants(self):
+        data = jpeg(orientation=6)
+        post = self.upload(data)
+        self.assertEqual(post.image_variants["source"], post.image.name)
+        with post.image.open("rb") as fh, Image.open(fh) as img:
+            self.assertEqual(img.size, (300, 400))
+            self.assertEqual(dict(img.getexif()), {})
+        urls = variants.urls(post)
+        self.assertEqual(set(urls), {name for name, _ in imaging.VARIANTS})
+        self.assertEqual(post.version, 2)
+
+    def test_forced_rebuild_keeps_the_original(self):
+        post = self.upload(jpeg())
+        with post.image.open("rb") as fh:
+            before = fh.read()
+        self.assertFalse(variants.build(Post, post.pk))
+        self.assertTrue(variants.build(Post, post.pk, force=True))
+        post.refresh_from_db()
+        self.assertEqual(post.image_variants["source"], post.image.name)
+        with post.image.open("rb") as fh:
+            self.assertEqual(fh.read(), before)
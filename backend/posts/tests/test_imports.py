@@ -0,0 +1,73 @@
+import io
+
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from PIL import Image
+
+from posts import imports
+from posts.models import Blob, DailyActivity, FeedEntry, Group, Job, Post
+from posts.tests.utils import MediaTestCase, client_for, make_group, make_user, plain_static_files, run_jobs
+
+
+def rows(text: str) -> list[str]:
+    return io.StringIO(text).readlines()
+
+
+class ImportTests(MediaTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_user("importer")
+        cls.member = make_user("member")
+        cls.group = make_group(cls.user, cls.member, name="Mornings")
+
+    def test_placeholder_is_a_valid_png(self):
+        with Image.open(io.BytesIO(imports.placeholder_png())) as img:
+            img.verify()
+            self.assertEqual((img.format, img.size), ("PNG", (1, 1)))
+
+    @override_settings(IMPORT_BATCH_SIZE=2)
+    def test_rows_are_inserted_in_batches_with_side_effects(self):
+        progress = []
+        result = imports.run(
+            self.user,
+            rows("group_name,caption\nMornings,one\nMornings,two\nEvenings,three\n,four\n"),
+            progress=lambda **counts: progress.append(counts),
+        )
+        self.assertEqual((result["rows"], result["created"], result["failed"]), (4, 4, 0))
+        self.assertEqual(progress[-1], {"rows": 4, "created": 4, "failed": 0})
+        self.assertEqual(len(progress), 3)
+        counts = dict(Group.objects.values_list("name", "post_count"))
+        self.assertEqual(counts, {"Mornings": 2, "Evenings": 1, imports.DEFAULT_GROUP: 1})
+        self.assertEqual(FeedEntry.objects.filter(user=self.member).count(), 2)
+        self.assertEqual(DailyActivity.objects.get(user=self.user, group=self.group).post_count, 2)
+        # One placeholder image, shared by every post, with its variants rendered once.
+        images = set(Post.objects.values_list("image", flat=True))
+        self.assertEqual(len(images), 1)
+        post = Post.objects.first()
+        self.assertEqual(Blob.objects.get(pk=post.image.name).refs, 4)
+        self.assertEqual(post.image_variants["source"], post.image.name)
+        self.assertFalse(Job.objects.filter(task="posts.variants.build_job").exists())
+
+    def test_bad_rows_are_reported(self):
+        long_name = "x" * 201
+        result = imports.run(self.user, rows(f"group_name,caption\n{long_name},too long\nMornings,fine\n"))
+        self.assertEqual((result["created"], result["failed"]), (1, 1))
+        self.assertEqual(result["errors"], [{"line": 2, "error": "group_name is longer than 200 characters."}])
+        result = imports.run(self.user, rows("name,text\na,b\n"))
+        self.assertEqual((result["created"], result["errors"][0]["line"]), (0, 1))
+
+    @plain_static_files
+    @override_settings(IMPORT_INLINE_MAX_BYTES=10)
+    def test_large_files_import_in_the_background(self):
+        upload = SimpleUploadedFile("posts.csv", b"group_name,caption\nMornings,later\n", content_type="text/csv")
+        client = client_for(self.user)
+        response = client.post("/posts/import/csv/", {"file": upload})
+        job = Job.objects.get(task=imports.import_csv.name)
+        self.assertRedirects(response, f"/posts/import/{job.pk}/", fetch_redirect_response=False)
+        staged = job.payload["name"]
+        self.assertTrue(default_storage.exists(staged))
+        self.assertEqual(run_jobs("default"), [Job.SUCCEEDED])
+        self.assertEqual(Post.objects.get().caption, "later")
+        self.assertFalse(default_storage.exists(staged))
+        self.assertEqual(client_for(self.member).get(f"/posts/import/{job.pk}/").status_code, 404)
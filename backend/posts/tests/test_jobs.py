@@ -0,0 +1,116 @@
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from posts import jobs
+from posts.models import Job
+from posts.tests.utils import run_jobs
+
+calls = []
+
+
+@jobs.task()
+def record(ctx, value=None):
+    calls.append((ctx.attempt, value))
+    ctx.progress(step=len(calls))
+    return {"value": value}
+
+
+@jobs.task(max_attempts=2)
+def fail(ctx):
+    raise RuntimeError("boom")
+
+
+@jobs.task()
+def unserializable(ctx):
+    return object()
+
+
+@override_settings(JOB_BACKOFF_SECONDS=10, JOB_BACKOFF_MAX_SECONDS=60)
+class JobTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_run_and_record_the_result(self):
+        job = record.enqueue(value=3)
+        self.assertEqual(run_jobs("default"), [Job.SUCCEEDED])
+        job.refresh_from_db()
+        self.assertEqual(calls, [(1, 3)])
+        self.assertEqual(job.result, {"value": 3})
+        self.assertEqual(job.progress, {"step": 1})
+        self.assertEqual((job.attempts, job.locked_by), (1, ""))
+        self.assertIsNotNone(job.duration_ms)
+
+    def test_a_job_is_claimed_once(self):
+        job = record.enqueue()
+        self.assertEqual([j.pk for j in jobs.claim("default", 10, "one")], [job.pk])
+        self.assertEqual(jobs.claim("default", 10, "two"), [])
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.locked_by, job.attempts), (Job.RUNNING, "one", 1))
+
+    def test_claim_respects_limit_delay_and_queue(self):
+        first, second = record.enqueue(), record.enqueue()
+        record.enqueue(delay=60)
+        jobs.enqueue(record, queue="images")
+        self.assertEqual([j.pk for j in jobs.claim("default", 1, "w")], [first.pk])
+        self.assertEqual([j.pk for j in jobs.claim("default", 5, "w")], [second.pk])
+        self.assertEqual(jobs.claim("default", 0, "w"), [])
+
+    def test_failures_back_off_then_fail(self):
+        job = fail.enqueue()
+        self.assertEqual(run_jobs("default"), [Job.QUEUED])
+        job.refresh_from_db()
+        self.assertIn("RuntimeError: boom", job.last_error)
+        delay = (job.run_after - job.finished_at).total_seconds()
+        self.assertTrue(8 <= delay <= 12, delay)
+        # Not runnable again until the backoff has passed.
+        self.assertEqual(run_jobs("default"), [])
+        Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+        self.assertEqual(run_jobs("default"), [Job.FAILED])
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+
+    def test_backoff_doubles_up_to_the_cap(self):
+        for attempt, expected in ((1, 10), (2, 20), (3, 40), (4, 60), (9, 60)):
+            self.assertTrue(0.8 * expected <= jobs.backoff_seconds(attempt) <= 1.2 * expected)
+
+    def test_unserializable_results_fail_the_job(self):
+        job = unserializable.enqueue()
+        run_jobs("default")
+        job.refresh_from_db()
+        self.assertIn("TypeError", job.last_error)
+
+    def test_stale_jobs_are_released(self):
+        retried, exhausted = record.enqueue(), fail.enqueue()
+        jobs.claim("default", 10, "dead")
+        Job.objects.filter(pk=exhausted.pk).update(attempts=2)
+        Job.objects.update(locked_at=timezone.now() - timedelta(seconds=jobs.stale_seconds() + 1))
+        self.assertEqual(jobs.reap_stale(), 2)
+        retried.refresh_from_db()
+        exhausted.refresh_from_db()
+        self.assertEqual((retried.status, retried.locked_by), (Job.QUEUED, ""))
+        self.assertEqual(exhausted.status, Job.FAILED)
+
+    def test_finish_ignores_jobs_taken_back(self):
+        record.enqueue()
+        job = jobs.claim("default", 1, "slow")[0]
+        Job.objects.filter(pk=job.pk).update(locked_at=timezone.now() - timedelta(days=1))
+        jobs.reap_stale()
+        jobs.finish(job, {"ok": True, "result": None}, "slow")
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.QUEUED)
+
+    @override_settings(JOB_SCHEDULE={"posts.tests.test_jobs.record": 600})
+    def test_periodic_tasks_are_queued_once(self):
+        self.assertEqual(jobs.enqueue_periodic(), 1)
+        self.assertEqual(jobs.enqueue_periodic(), 0)
+        job = Job.objects.get(task="posts.tests.test_jobs.record")
+        self.assertGreater(job.run_after, timezone.now() + timedelta(seconds=590))
+
+    def test_prune_keeps_recent_and_unfinished_jobs(self):
+        old, recent, queued = record.enqueue(), record.enqueue(), record.enqueue()
+        Job.objects.filter(pk=old.pk).update(status=Job.SUCCEEDED, finished_at=timezone.now() - timedelta(days=30))
+        Job.objects.filter(pk=recent.pk).update(status=Job.FAILED, finished_at=timezone.now())
+        self.assertEqual(jobs.prune(), 1)
+        self.assertEqual(set(Job.objects.values_list("pk", flat=True)), {recent.pk, queued.pk})
@@ -0,0 +1,59 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+
+from posts import leaderboard, retention
+from posts.models import DailyActivity, Group
+from posts.tests.utils import client_for, make_group, make_post, make_user
+
+
+class LeaderboardTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = make_user("owner")
+        cls.alice = make_user("alice", first_name="Alice")
+        cls.bob = make_user("bob")
+        cls.group = make_group(cls.owner, cls.alice, cls.bob)
+
+    def setUp(self):
+        cache.clear()
+
+    def board(self, period="weekly", user=None):
+        response = client_for(user or self.alice).get(f"/api/groups/{self.group.id}/leaderboard/?period={period}")
+        self.assertEqual(response.status_code, 200)
+        return response.json()["results"]
+
+    def test_ranks_by_active_days_then_posts(self):
+        today = timezone.localdate()
+        for days_ago in (1, 2):
+            DailyActivity.objects.create(user=self.bob, group=self.group, date=today - timedelta(days=days_ago), post_count=1)
+        for _ in range(3):
+            make_post(self.group, self.alice)
+        rows = self.board("weekly")
+        self.assertEqual([(r["username"], r["active_days"], r["total_posts"], r["rank"]) for r in rows], [
+            ("bob", 2, 2, 1),
+            ("alice", 1, 3, 2),
+            ("owner", 0, 0, 3),
+        ])
+        self.assertEqual(rows[1]["name"], "Alice")
+        self.assertEqual([r["username"] for r in self.board("daily")][:1], ["alice"])
+
+    def test_cached_board_is_served_without_queries(self):
+        group = Group.objects.select_related("owner").get(pk=self.group.pk)
+        leaderboard.leaderboard(group, "weekly")
+        with self.assertNumQueries(0):
+            leaderboard.leaderboard(group, "weekly")
+
+    def test_changes_made_elsewhere_retire_the_cached_board(self):
+        post = make_post(self.group, self.bob)
+        self.assertEqual(self.board("daily")[0]["total_posts"], 1)
+        # Retention (a separate process in production) only bumps the group version in the database.
+        retention.run(everything=True, grace=0)
+        self.assertFalse(type(post).objects.filter(pk=post.pk).exists())
+        self.assertTrue(all(r["total_posts"] == 0 for r in self.board("daily")))
+
+    def test_members_only_and_valid_periods(self):
+        self.assertEqual(client_for(make_user("outsider")).get(f"/api/groups/{self.group.id}/leaderboard/").status_code, 403)
+        self.assertEqual(client_for(self.alice).get(f"/api/groups/{self.group.id}/leaderboard/?period=yearly").status_code, 400)
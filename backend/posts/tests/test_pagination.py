@@ -0,0 +1,68 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from posts.tests.utils import client_for, make_group, make_post, make_user
+
+
+class FeedCursorPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = make_user("owner")
+        cls.member = make_user("member")
+        cls.group = make_group(cls.owner, cls.member)
+        now = timezone.now()
+        cls.posts = [make_post(cls.group, cls.owner, f"post {i}", created_at=now - timedelta(seconds=i // 3)) for i in range(25)]
+
+    def setUp(self):
+        self.client = client_for(self.member)
+
+    def pages(self, url):
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            yield response.json()
+            url = response.json()["next"]
+
+    def expected_ids(self):
+        return [post.id for post in sorted(self.posts, key=lambda p: (p.created_at, p.id), reverse=True)]
+
+    def test_pages_cover_the_feed_once_newest_first(self):
+        pages = list(self.pages("/api/posts/?cursor=&page_size=10"))
+        self.assertEqual([len(page["results"]) for page in pages], [10, 10, 5])
+        ids = [post["id"] for page in pages for post in page["results"]]
+        # Posts sharing a created_at are ordered by id, so none is skipped or repeated across pages.
+        self.assertEqual(ids, self.expected_ids())
+        self.assertIsNone(pages[-1]["next_cursor"])
+        self.assertNotIn("count", pages[0])
+
+    def test_group_feed_pages_the_same_way(self):
+        pages = list(self.pages(f"/api/posts/?group_id={self.group.id}&cursor=&page_size=7"))
+        self.assertEqual([post["id"] for page in pages for post in page["results"]], self.expected_ids())
+
+    def test_cursor_skips_rows_inserted_before_it(self):
+        first = self.client.get("/api/posts/?cursor=&page_size=10").json()
+        make_post(self.group, self.owner, "newer")
+        second = self.client.get(f"/api/posts/?cursor={first['next_cursor']}&page_size=10").json()
+        self.assertEqual([post["id"] for post in second["results"]], self.expected_ids()[10:20])
+
+    def test_page_size_is_capped(self):
+        response = self.client.get("/api/posts/?cursor=&page_size=1000")
+        self.assertEqual(len(response.json()["results"]), 25)
+        response = self.client.get("/api/posts/?cursor=&page_size=0")
+        self.assertEqual(len(response.json()["results"]), 1)
+
+    def test_invalid_cursor_is_404(self):
+        for token in ("nope", "eyJ0IjogMX0", "!!"):
+            with self.subTest(token=token):
+                self.assertEqual(self.client.get(f"/api/posts/?cursor={token}").status_code, 404)
+
+    def test_without_cursor_keeps_page_numbers(self):
+        data = self.client.get("/api/posts/").json()
+        self.assertEqual(data["count"], 25)
+        self.assertEqual(len(data["results"]), 10)
+
+    def test_outsiders_get_an_empty_group_feed(self):
+        response = client_for(make_user("outsider")).get(f"/api/posts/?group_id={self.group.id}&cursor=")
+        self.assertEqual(response.json()["results"], [])
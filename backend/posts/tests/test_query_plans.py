@@ -0,0 +1,23 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+
+from posts.management.commands import explain_queries
+from posts.models import Post
+
+
+class QueryPlanTests(TestCase):
+    def test_hot_queries_use_an_index(self):
+        out = StringIO()
+        call_command("explain_queries", posts=2000, stdout=out)
+        self.assertIn("All hot queries use an index.", out.getvalue())
+        self.assertNotIn("FULL SCAN", out.getvalue())
+        # The seeded data is rolled back.
+        self.assertFalse(Post.objects.exists())
+
+    def test_full_scans_are_detected(self):
+        plan = explain_queries.explain(Post.objects.filter(caption="hello"))
+        scanned = explain_queries.FULL_SCAN_PATTERNS[connection.vendor].findall(plan)
+        self.assertIn(Post._meta.db_table, scanned)
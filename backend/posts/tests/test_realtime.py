@@ -0,0 +1,124 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.test import AsyncClient, TestCase, override_settings
+
+from posts import realtime
+from posts.models import Comment, GroupMembership
+from posts.tests.utils import client_for, make_group, make_post, make_user
+
+
+class EventsViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = make_user("owner")
+        cls.group = make_group(cls.owner)
+        cls.other = make_group(make_user("stranger"))
+
+    def test_refused_under_wsgi(self):
+        response = client_for(self.owner).get("/api/events/")
+        self.assertEqual(response.status_code, 501)
+
+    async def test_requires_authentication(self):
+        response = await AsyncClient().get("/api/events/")
+        self.assertEqual(response.status_code, 401)
+
+    async def test_refuses_a_group_the_user_is_not_in(self):
+        client = AsyncClient()
+        await client.aforce_login(self.owner)
+        response = await client.get(f"/api/events/?group_id={self.other.id}")
+        self.assertEqual(response.status_code, 403)
+
+    async def test_only_get(self):
+        client = AsyncClient()
+        await client.aforce_login(self.owner)
+        response = await client.post("/api/events/")
+        self.assertEqual(response.status_code, 405)
+
+
+class LocalBackendTests(TestCase):
+    async def test_events_reach_subscribers_of_their_group_only(self):
+        backend = realtime.LocalBackend()
+        first, second = backend.subscribe([1]), backend.subscribe([1, 2])
+        self.assertEqual(backend.subscriber_count, 2)
+        self.assertEqual(backend.dispatch({"type": "post", "group_id": 2}), 1)
+        event = await asyncio.wait_for(second.queue.get(), 1)
+        self.assertEqual(event["group_id"], 2)
+        await asyncio.sleep(0)
+        self.assertTrue(first.queue.empty())
+        backend.unsubscribe(second)
+        self.assertEqual(backend.dispatch({"type": "post", "group_id": 2}), 0)
+        backend.unsubscribe(first)
+        self.assertEqual(backend.subscriber_count, 0)
+
+    async def test_a_full_queue_drops_events(self):
+        backend = realtime.LocalBackend()
+        sub = backend.subscribe([1])
+        for _ in range(realtime.QUEUE_SIZE + 3):
+            backend.dispatch({"type": "post", "group_id": 1})
+        await asyncio.sleep(0)
+        self.assertEqual(sub.queue.qsize(), realtime.QUEUE_SIZE)
+        self.assertEqual(sub.dropped, 3)
+
+
+class BroadcastTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = make_user("owner")
+        cls.group = make_group(cls.owner)
+
+    def test_nothing_is_built_without_listeners(self):
+        broadcaster = realtime.Broadcaster(realtime.LocalBackend())
+        built = []
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            broadcaster.publish_on_commit(lambda: built.append(1))
+        self.assertEqual(callbacks, [])
+        self.assertEqual(built, [])
+
+    async def test_new_posts_and_comments_are_published_after_commit(self):
+        broadcaster = realtime.Broadcaster(realtime.LocalBackend())
+        sub = broadcaster.subscribe([self.group.id])
+
+        def write():
+            with self.captureOnCommitCallbacks(execute=True):
+                post = make_post(self.group, self.owner, "hello")
+                Comment.objects.create(post=post, author=self.owner, user_name="owner", text="hi")
+            return post
+
+        previous, realtime.broadcaster = realtime.broadcaster, broadcaster
+        try:
+            post = await sync_to_async(write)()
+        finally:
+            realtime.broadcaster = previous
+        post_event = await asyncio.wait_for(sub.queue.get(), 1)
+        comment_event = await asyncio.wait_for(sub.queue.get(), 1)
+        self.assertEqual((post_event["type"], post_event["data"]["id"]), ("post", post.id))
+        self.assertEqual((comment_event["type"], comment_event["data"]["text"]), ("comment", "hi"))
+        broadcaster.unsubscribe(sub)
+
+    def test_may_receive_rechecks_membership(self):
+        member = make_user("member")
+        group = make_group(self.owner, member)
+        self.assertTrue(realtime.may_receive(member, group.id))
+        GroupMembership.objects.filter(group=group, user=member).delete()
+        self.assertFalse(realtime.may_receive(member, group.id))
+
+
+@override_settings(CHANGELOG_SYNC_LAG_SECONDS=0)
+class ChangeLogBackendTests(TestCase):
+    def test_events_since_one_per_row(self):
+        owner = make_user("owner")
+        group = make_group(owner)
+        last_id = realtime._latest_entry_id()
+        post = make_post(group, owner, "first")
+        post.caption = "edited"
+        post.save()
+        Comment.objects.create(post=post, author=owner, user_name="owner", text="hi")
+        new_last, events = realtime._events_since(last_id)
+        self.assertGreater(new_last, last_id)
+        self.assertEqual([e["type"] for e in events], ["post", "comment"])
+        self.assertEqual(events[0]["data"]["caption"], "edited")
+        self.assertEqual(realtime._events_since(new_last), (new_last, []))
+
+    def test_local_publishes_are_ignored(self):
+        self.assertFalse(realtime.Broadcaster(realtime.ChangeLogBackend()).listening)
@@ -0,0 +1,62 @@
+from datetime import date, timedelta
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from posts import imports, reports, retention
+from posts.tests.utils import MediaTestCase, client_for, make_group, make_post, make_user, plain_static_files
+
+
+class ReportTests(MediaTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = make_user("owner")
+        cls.member = make_user("member")
+        cls.group = make_group(cls.owner, cls.member, name="Walks")
+
+    def setUp(self):
+        cache.clear()
+        self.today = timezone.localdate()
+
+    def report(self, user):
+        return reports.report(user, self.today - timedelta(days=6), self.today)
+
+    def test_member_series_and_owner_breakdown(self):
+        make_post(self.group, self.member)
+        data = self.report(self.member)
+        self.assertEqual((data["total"], data["active_days"], data["counts"][-1]), (1, 1, 1))
+        self.assertEqual(data["groups"], [])
+        owner = self.report(self.owner)
+        self.assertEqual(owner["total"], 0)
+        self.assertEqual([(g["name"], g["total"]) for g in owner["groups"]], [("Walks", 1)])
+
+    def test_cached_report_costs_one_version_read(self):
+        self.report(self.member)
+        with self.assertNumQueries(1):
+            self.report(self.member)
+
+    def test_posts_retire_the_author_and_owner_reports(self):
+        self.report(self.member), self.report(self.owner)
+        make_post(self.group, self.member)
+        self.assertEqual(self.report(self.member)["total"], 1)
+        self.assertEqual(self.report(self.owner)["groups"][0]["total"], 1)
+
+    def test_imports_and_retention_retire_cached_reports(self):
+        self.assertEqual(self.report(self.member)["total"], 0)
+        imports.run(self.member, iter(["group_name,caption\n", "Walks,one\n", "Walks,two\n"]))
+        self.assertEqual(self.report(self.member)["total"], 2)
+        retention.run(everything=True, grace=0)
+        self.assertEqual(self.report(self.member)["total"], 0)
+
+    def test_range_resolution(self):
+        self.assertEqual(reports.resolve_range(30), (self.today - timedelta(days=29), self.today))
+        self.assertEqual(reports.resolve_range(12), (self.today - timedelta(days=6), self.today))
+        start, end = reports.resolve_range(start=date(2000, 1, 1), end=date(2010, 1, 1))
+        self.assertEqual((end - start).days + 1, reports.MAX_RANGE_DAYS)
+
+    @plain_static_files
+    def test_page_renders(self):
+        make_post(self.group, self.member)
+        response = client_for(self.owner).get("/reports/?days=30")
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Walks")
@@ -0,0 +1,146 @@
+import io
+from datetime import timedelta
+from io import StringIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+
+from posts import blobs, reports, retention, rollups, versions
+from posts.models import AuditLog, Blob, ChangeLogEntry, Comment, DailyActivity, FeedEntry, Group, Post
+from posts.tests.utils import MediaTestCase, make_group, make_post, make_user, run_jobs
+
+
+def jpeg() -> bytes:
+    buf = io.BytesIO()
+    Image.new("RGB", (40, 30), (200, 40, 40)).save(buf, "JPEG", comment=b"taken at home")
+    return buf.getvalue()
+
+
+class PlanTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = make_user("owner")
+        cls.today = timezone.localdate()
+        cls.default = make_group(cls.owner)
+        cls.own = make_group(cls.owner, retention_days=3)
+        cls.ended = make_group(cls.owner, end_date=cls.today - timedelta(days=1))
+
+    def test_policies(self):
+        default, groups = retention.plan(days=7, today=self.today)
+        self.assertEqual(default, self.today - timedelta(days=6))
+        self.assertEqual(groups, {self.own.id: self.today - timedelta(days=2), self.ended.id: self.today + timedelta(days=1)})
+
+    @override_settings(RETENTION_DAYS=None, RETENTION_ENDED_GROUP_DAYS=5)
+    def test_unset_keeps_everything_but_group_policies(self):
+        default, groups = retention.plan(today=self.today)
+        self.assertIsNone(default)
+        self.assertEqual(set(groups), {self.own.id})
+
+
+class RunTests(MediaTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = make_user("owner")
+        cls.member = make_user("member")
+        cls.group = make_group(cls.owner, cls.member)
+        cls.today = timezone.localdate()
+
+    def post(self, days_ago: int, **fields) -> Post:
+        return make_post(self.group, self.member, date=self.today - timedelta(days=days_ago), **fields)
+
+    def test_deletes_expired_posts_and_their_traces(self):
+        old, kept = self.post(10), self.post(0)
+        comment = Comment.objects.create(post=old, author=self.owner, user_name="owner", text="hi")
+        Comment.objects.create(post=old, author=self.member, user_name="member", text="reply", parent=comment)
+        DailyActivity.objects.all().delete()
+        rollups.backfill()
+        group_version = Group.objects.get(pk=self.group.pk).version
+        reports_version = versions.get(reports._version_name(self.member.id))
+
+        stats = retention.run(days=7)
+
+        self.assertEqual((stats["posts"], stats["comments"], stats["chunks"]), (1, 2, 1))
+        self.assertEqual(list(Post.objects.values_list("id", flat=True)), [kept.id])
+        self.assertFalse(Comment.objects.exists())
+        self.assertFalse(FeedEntry.objects.filter(post_id=old.id).exists())
+        group = Group.objects.get(pk=self.group.pk)
+        self.assertEqual(group.post_count, 1)
+        self.assertGreater(group.version, group_version)
+        self.assertEqual(
+            DailyActivity.objects.get(user=self.member, date=self.today - timedelta(days=10)).post_count, 0
+        )
+        self.assertTrue(ChangeLogEntry.objects.filter(kind="post", action="delete", object_id=old.id).exists())
+        self.assertIn(str(old.id), AuditLog.objects.get(action="delete", model="Post").details)
+        self.assertEqual(versions.get(reports._version_name(self.member.id)), reports_version + 1)
+
+    def test_chunks_oldest_first(self):
+        for days_ago in (20, 12, 11, 10, 9):
+            self.post(days_ago)
+        stats = retention.run(days=7, size=2)
+        self.assertEqual((stats["posts"], stats["chunks"]), (5, 3))
+        self.assertEqual(stats["first_date"], self.today - timedelta(days=20))
+        self.assertEqual(stats["last_date"], self.today - timedelta(days=9))
+        self.assertEqual(AuditLog.objects.filter(action="delete", model="Post").count(), 3)
+
+    def test_dry_run_changes_nothing(self):
+        old = self.post(10)
+        Comment.objects.create(post=old, author=self.owner, user_name="owner", text="hi")
+        stats = retention.run(days=7, dry_run=True)
+        self.assertEqual((stats["posts"], stats["comments"]), (1, 1))
+        self.assertTrue(Post.objects.filter(pk=old.pk).exists())
+
+    def test_media_of_deleted_posts_goes_right_away(self):
+        old = self.post(10, image=SimpleUploadedFile("a.jpg", jpeg(), content_type="image/jpeg"))
+        run_jobs("images")
+        old.refresh_from_db()
+        names = blobs.references(old)
+        self.assertEqual(len(names), 1 + 2 * 3)
+        stats = retention.run(days=7)
+        # Well within BLOB_GRACE_HOURS, yet nothing else uses them.
+        self.assertEqual(stats["blobs"], len(set(names)))
+        self.assertFalse(Blob.objects.filter(pk__in=names).exists())
+        for name in names:
+            self.assertFalse(default_storage.exists(name), name)
+
+    def test_shared_media_is_kept(self):
+        upload = jpeg()
+        old = self.post(10, image=SimpleUploadedFile("a.jpg", upload, content_type="image/jpeg"))
+        kept = self.post(0, image=SimpleUploadedFile("b.jpg", upload, content_type="image/jpeg"))
+        self.assertEqual(old.image.name, kept.image.name)
+        self.assertEqual(retention.run(days=7)["blobs"], 0)
+        self.assertEqual(Blob.objects.get(pk=kept.image.name).refs, 1)
+        self.assertTrue(default_storage.exists(kept.image.name))
+
+    def test_legacy_files_are_deleted_unless_still_named(self):
+        legacy = default_storage.save("posts/legacy.jpg", ContentFile(b"legacy"))
+        shared = default_storage.save("posts/shared.jpg", ContentFile(b"shared"))
+        old, other_old = self.post(10), self.post(10)
+        kept = self.post(0)
+        Post.objects.filter(pk=old.pk).update(image=legacy)
+        Post.objects.filter(pk__in=[other_old.pk, kept.pk]).update(image=shared)
+        stats = retention.run(days=7)
+        self.assertEqual((stats["posts"], stats["blobs"], stats["bytes"]), (2, 1, len(b"legacy")))
+        self.assertFalse(default_storage.exists(legacy))
+        self.assertTrue(default_storage.exists(shared))
+
+    def test_everything(self):
+        self.post(0)
+        self.post(-1)
+        self.assertEqual(retention.run(everything=True)["posts"], 2)
+        self.assertFalse(Post.objects.exists())
+
+    def test_command(self):
+        self.post(10)
+        out = StringIO()
+        call_command("apply_retention", "--days", "7", stdout=out)
+        self.assertIn("Deleted 1 posts", out.getvalue())
+        self.assertIn("24 hours", out.getvalue())
+        self.post(0)
+        out = StringIO()
+        call_command("delete_daily_posts", stdout=out)
+        self.assertIn("Deleted 1 posts", out.getvalue())
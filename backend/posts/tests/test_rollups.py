@@ -0,0 +1,48 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from posts import rollups
+from posts.models import Comment, DailyActivity
+from posts.tests.utils import make_group, make_post, make_user
+
+
+class DailyActivityTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_user("user")
+        cls.group = make_group(cls.user)
+
+    def counts(self):
+        return set(DailyActivity.objects.values_list("user_id", "group_id", "date", "post_count", "comment_count"))
+
+    def test_signals_keep_today_current(self):
+        today = timezone.localdate()
+        posts = [make_post(self.group, self.user) for _ in range(2)]
+        comment = Comment.objects.create(post=posts[0], author=self.user, user_name="user", text="hi")
+        self.assertEqual(self.counts(), {(self.user.id, self.group.id, today, 2, 1)})
+        comment.delete()
+        posts[1].delete()
+        self.assertEqual(self.counts(), {(self.user.id, self.group.id, today, 1, 0)})
+
+    def test_bump_never_creates_negative_rows(self):
+        rollups.bump(self.user.id, self.group.id, timezone.localdate(), "post_count", -1)
+        self.assertFalse(DailyActivity.objects.exists())
+
+    def test_posts_per_day_fills_quiet_days(self):
+        today = timezone.localdate()
+        rollups.bump(self.user.id, self.group.id, today - timedelta(days=2), "post_count", 3)
+        series = rollups.posts_per_day(today - timedelta(days=3), today, user=self.user)
+        self.assertEqual(list(series.values()), [0, 3, 0, 0])
+
+    def test_backfill_rebuilds_from_history(self):
+        today = timezone.localdate()
+        for days_ago in (0, 40, 40):
+            make_post(self.group, self.user, date=today - timedelta(days=days_ago))
+        expected = {(self.user.id, self.group.id, today, 1, 0), (self.user.id, self.group.id, today - timedelta(days=40), 2, 0)}
+        DailyActivity.objects.all().delete()
+        call_command("backfill_activity", "--chunk-days", "7", stdout=StringIO())
+        self.assertEqual(self.counts(), expected)
@@ -0,0 +1,56 @@
+from datetime import date, timedelta
+
+from django.test import TestCase
+
+from posts import streaks
+from posts.models import Post, Streak
+from posts.tests.utils import make_group, make_post, make_user
+
+DAY = date(2026, 3, 10)
+
+
+class StreakTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_user("user")
+        cls.group = make_group(cls.user)
+
+    def post_on(self, day):
+        streaks.record_post(Post(author=self.user, group=self.group, date=day))
+
+    def streak(self, group=None):
+        return Streak.objects.get(user=self.user, group=group)
+
+    def test_consecutive_days_extend_and_gaps_restart(self):
+        for offset in (0, 0, 1, 2, 4):
+            self.post_on(DAY + timedelta(days=offset))
+        for group in (None, self.group):
+            streak = self.streak(group)
+            self.assertEqual((streak.current, streak.longest, streak.last_active_date), (1, 3, DAY + timedelta(days=4)))
+
+    def test_backdated_posts_do_not_move_the_streak(self):
+        self.post_on(DAY)
+        self.post_on(DAY - timedelta(days=1))
+        self.assertEqual((self.streak().current, self.streak().last_active_date), (1, DAY))
+
+    def test_current_streak_lapses_after_a_missed_day(self):
+        self.post_on(DAY)
+        self.post_on(DAY + timedelta(days=1))
+        streak = self.streak()
+        self.assertEqual(streaks.effective_current(streak, DAY + timedelta(days=2)), 2)
+        self.assertEqual(streaks.effective_current(streak, DAY + timedelta(days=3)), 0)
+        self.assertEqual(streaks.rollover(DAY + timedelta(days=3)), 2)
+        self.assertEqual(self.streak().longest, 2)
+
+    def test_rebuild_matches_incremental_updates(self):
+        today = DAY + timedelta(days=5)
+        posts = [make_post(self.group, self.user, date=DAY + timedelta(days=offset)) for offset in (0, 1, 2, 4, 5)]
+        # The posts were recorded as today's when created; replay them on their own days.
+        Streak.objects.all().delete()
+        for post in posts:
+            streaks.record_post(post)
+        incremental = {(s.group_id, s.current, s.longest) for s in Streak.objects.all()}
+        streaks.rebuild(today)
+        rebuilt = {(s.group_id, s.current, s.longest) for s in Streak.objects.all()}
+        self.assertEqual(rebuilt, {(None, 2, 3), (self.group.id, 2, 3)})
+        self.assertEqual(incremental, rebuilt)
@@ -0,0 +1,78 @@
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from posts import changelog
+from posts.models import ChangeLogEntry, Comment
+from posts.tests.utils import client_for, make_group, make_post, make_user
+
+
+@override_settings(CHANGELOG_SYNC_LAG_SECONDS=0)
+class SyncTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = make_user("owner")
+        cls.member = make_user("member")
+        cls.group = make_group(cls.owner, cls.member)
+
+    def sync(self, user, since=None):
+        query = "" if since is None else f"?since={since}"
+        response = client_for(user).get(f"/api/sync/{query}")
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_changes_after_a_token_latest_state_per_object(self):
+        token = self.sync(self.member)["token"]
+        post = make_post(self.group, self.owner, "first")
+        post.caption = "edited"
+        post.save()
+        comment = Comment.objects.create(post=post, author=self.owner, user_name="owner", text="hi")
+        comment_id = comment.id
+        comment.delete()
+        data = self.sync(self.member, token)
+        changes = {(c["kind"], c["id"]): c for c in data["changes"]}
+        self.assertEqual(changes[("post", post.id)]["action"], "upsert")
+        self.assertEqual(changes[("post", post.id)]["data"]["caption"], "edited")
+        self.assertEqual(changes[("comment", comment_id)]["action"], "delete")
+        # Nothing new since the returned token.
+        self.assertEqual(self.sync(self.member, data["token"])["changes"], [])
+
+    def test_only_visible_groups_are_synced(self):
+        outsider = make_user("outsider")
+        token = self.sync(outsider)["token"]
+        make_post(self.group, self.owner)
+        self.assertEqual(self.sync(outsider, token)["changes"], [])
+
+    def test_pages_with_has_more(self):
+        token = self.sync(self.member)["token"]
+        for _ in range(3):
+            make_post(self.group, self.owner)
+        data = changelog.changes(self.member, int(token), limit=2)
+        self.assertTrue(data["has_more"])
+        rest = changelog.changes(self.member, int(data["token"]), limit=2)
+        self.assertFalse(rest["has_more"])
+        self.assertEqual(len(data["changes"]) + len(rest["changes"]), 3)
+
+    def test_pruned_tokens_ask_for_a_reset(self):
+        make_post(self.group, self.owner)
+        ChangeLogEntry.objects.update(created_at=timezone.now() - timedelta(days=30))
+        make_post(self.group, self.owner)
+        kept = ChangeLogEntry.objects.filter(created_at__gte=timezone.now() - timedelta(days=7)).count()
+        changelog.prune(7)
+        self.assertEqual(ChangeLogEntry.objects.count(), kept)
+        self.assertTrue(self.sync(self.member, 0)["reset"])
+
+    def test_invalid_token_is_rejected(self):
+        response = client_for(self.member).get("/api/sync/?since=abc")
+        self.assertEqual(response.status_code, 400)
+
+    @override_settings(CHANGELOG_SYNC_LAG_SECONDS=60)
+    def test_recent_entries_wait_for_the_sync_lag(self):
+        ChangeLogEntry.objects.update(created_at=timezone.now() - timedelta(seconds=61))
+        token = self.sync(self.member)["token"]
+        make_post(self.group, self.owner)
+        data = self.sync(self.member, token)
+        self.assertEqual((data["changes"], data["token"]), ([], token))
+        ChangeLogEntry.objects.update(created_at=timezone.now() - timedelta(seconds=61))
+        self.assertEqual(len(self.sync(self.member, token)["changes"]), 1)
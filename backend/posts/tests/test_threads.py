@@ -0,0 +1,115 @@
+from django.db import connection
+from django.test import TestCase
+
+from posts import threads
+from posts.models import COMMENT_MAX_DEPTH, Comment
+from posts.tests.utils import client_for, make_group, make_post, make_user
+
+
+class CommentPathTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_user("user")
+        cls.post = make_post(make_group(cls.user), cls.user)
+
+    def comment(self, parent=None, text="hi"):
+        return Comment.objects.create(post=self.post, author=self.user, user_name="user", text=text, parent=parent)
+
+    def test_path_is_ancestors_then_self(self):
+        top = self.comment()
+        reply = self.comment(top)
+        self.assertEqual((top.depth, reply.depth), (0, 1))
+        self.assertEqual(reply.path, top.path + Comment.path_segment(reply.pk))
+        self.assertEqual(Comment.objects.get(pk=reply.pk).path, reply.path)
+
+    def test_bulk_create_fills_paths(self):
+        top = self.comment()
+        replies = Comment.objects.bulk_create([
+            Comment(post=self.post, author=self.user, user_name="user", text=str(i), parent=top) for i in range(3)
+        ])
+        for reply in Comment.objects.filter(pk__in=[r.pk for r in replies]):
+            self.assertEqual((reply.path, reply.depth), (top.path + Comment.path_segment(reply.pk), 1))
+
+    def test_subtree_range_compares_bytewise(self):
+        # "/" must sort below the digits, or the next sibling's subtree would leak into this one.
+        first = self.comment()
+        second = self.comment()
+        child = self.comment(first)
+        in_range = Comment.objects.filter(post=self.post, path__gt=first.path, path__lt=threads.subtree_end(first.path))
+        self.assertEqual(list(in_range), [child])
+        self.assertEqual(list(Comment.objects.filter(post=self.post).order_by("path")), [first, child, second])
+        collation = Comment._meta.get_field("path").db_parameters(connection)["collation"]
+        self.assertEqual(collation, "C" if connection.vendor == "postgresql" else None)
+
+    def test_paths_of_deep_chains_are_not_truncated(self):
+        parent = None
+        for _ in range(COMMENT_MAX_DEPTH + 10):
+            parent = self.comment(parent)
+        stored = Comment.objects.get(pk=parent.pk)
+        self.assertEqual((stored.depth, len(stored.path)), (COMMENT_MAX_DEPTH + 9, (COMMENT_MAX_DEPTH + 10) * 11))
+
+
+class CommentThreadApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_user("user")
+        cls.post = make_post(make_group(cls.user), cls.user)
+        # Three top-level comments; the first has 3 replies, the first reply has a reply of its own.
+        cls.tops = [cls.add(None, f"top {i}") for i in range(3)]
+        cls.replies = [cls.add(cls.tops[0], f"reply {i}") for i in range(3)]
+        cls.nested = cls.add(cls.replies[0], "nested")
+
+    @classmethod
+    def add(cls, parent, text):
+        return Comment.objects.create(post=cls.post, author=cls.user, user_name="user", text=text, parent=parent)
+
+    def get(self, query=""):
+        response = client_for(self.user).get(f"/api/posts/{self.post.id}/comments/{query}")
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_page_nests_replies(self):
+        data = self.get()
+        self.assertEqual(data["comment_count"], 7)
+        first = data["results"][0]
+        self.assertEqual([r["text"] for r in first["replies"]], ["reply 0", "reply 1", "reply 2"])
+        self.assertEqual(first["replies"][0]["replies"][0]["text"], "nested")
+        self.assertFalse(first["has_more_replies"])
+
+    def test_page_costs_two_queries(self):
+        with self.assertNumQueries(2):
+            threads.page(self.post)
+
+    def test_siblings_and_replies_are_paged(self):
+        data = self.get("?page_size=2&replies=2")
+        self.assertEqual([c["text"] for c in data["results"]], ["top 0", "top 1"])
+        self.assertTrue(data["has_more"])
+        first = data["results"][0]
+        # Two rows of the subtree, in path order: the first reply and its own reply.
+        self.assertEqual([r["text"] for r in first["replies"]], ["reply 0"])
+        self.assertTrue(first["has_more_replies"])
+        rest = self.get(f"?parent={self.tops[0].id}&after={first['replies_after']}")
+        self.assertEqual([c["text"] for c in rest["results"]], ["reply 1", "reply 2"])
+        last = self.get(f"?page_size=2&after={data['next_after']}")
+        self.assertEqual([c["text"] for c in last["results"]], ["top 2"])
+
+    def test_depth_limits_the_preview(self):
+        first = self.get("?depth=1")["results"][0]
+        self.assertEqual(len(first["replies"]), 3)
+        self.assertEqual(first["replies"][0]["replies"], [])
+        self.assertTrue(first["replies"][0]["has_more_replies"])
+
+    def test_replies_past_the_maximum_depth_are_rejected(self):
+        parent = self.replies[0]
+        for _ in range(COMMENT_MAX_DEPTH):
+            parent = self.add(parent, "deeper")
+        response = client_for(self.user).post(
+            f"/api/posts/{self.post.id}/comments/", {"text": "too deep", "parent_id": parent.id}, content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_unknown_parent_is_404(self):
+        other = make_post(make_group(self.user, name="other"), self.user)
+        stranger = Comment.objects.create(post=other, author=self.user, user_name="user", text="elsewhere")
+        response = client_for(self.user).get(f"/api/posts/{self.post.id}/comments/?parent={stranger.id}")
+        self.assertEqual(response.status_code, 404)
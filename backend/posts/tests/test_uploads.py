@@ -0,0 +1,177 @@
+import io
+import tempfile
+from datetime import timedelta
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from django.utils import timezone
+from PIL import Image
+
+from posts import uploads
+from posts.models import IdempotencyKey, Post, UploadSession
+from posts.tests.utils import MediaTestCase, client_for, make_group, make_user
+
+
+def jpeg() -> bytes:
+    buf = io.BytesIO()
+    Image.new("RGB", (40, 30), (10, 20, 200)).save(buf, "JPEG")
+    return buf.getvalue()
+
+
+class UploadTestCase(MediaTestCase):
+    @classmethod
+    def setUpClass(cls):
+        staging = cls.enterClassContext(tempfile.TemporaryDirectory(prefix="posts-uploads-"))
+        cls.enterClassContext(override_settings(UPLOAD_STAGING_DIR=staging))
+        super().setUpClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = make_user("owner")
+        cls.group = make_group(cls.owner)
+
+    def setUp(self):
+        self.client = client_for(self.owner)
+
+
+class IdempotencyKeyTests(UploadTestCase):
+    def upload(self, key=None, caption="hello", client=None, **fields):
+        data = {"image": SimpleUploadedFile("a.jpg", jpeg(), content_type="image/jpeg"), "caption": caption, **fields}
+        data.setdefault("group_id", self.group.id)
+        headers = {"idempotency-key": key} if key else {}
+        return (client or self.client).post("/api/posts/upload/", data, headers=headers)
+
+    def test_retries_replay_the_first_response(self):
+        first = self.upload("k1")
+        self.assertEqual(first.status_code, 201)
+        again = self.upload("k1")
+        self.assertEqual(again.status_code, 201)
+        self.assertEqual(again["Idempotent-Replayed"], "true")
+        self.assertEqual(again.json(), first.json())
+        self.assertEqual(Post.objects.count(), 1)
+
+    def test_without_a_key_every_request_runs(self):
+        self.upload()
+        self.upload()
+        self.assertEqual(Post.objects.count(), 2)
+
+    def test_a_key_reused_for_other_content(self):
+        self.upload("k1")
+        self.assertEqual(self.upload("k1", caption="different").status_code, 422)
+        self.assertEqual(Post.objects.count(), 1)
+
+    def test_errors_are_not_stored(self):
+        self.assertEqual(self.upload("k1", group_id="").status_code, 400)
+        self.assertFalse(IdempotencyKey.objects.exists())
+        self.assertEqual(self.upload("k1").status_code, 201)
+
+    def test_keys_belong_to_one_user(self):
+        member = make_user("member")
+        self.group.members.add(member)
+        self.upload("k1")
+        self.assertNotIn("Idempotent-Replayed", self.upload("k1", client=client_for(member)))
+        self.assertEqual(Post.objects.count(), 2)
+
+    def test_in_progress_and_abandoned_requests(self):
+        record = IdempotencyKey.objects.create(user=self.owner, key="k1", request="x")
+        self.assertEqual(self.upload("k1").status_code, 409)
+        IdempotencyKey.objects.filter(pk=record.pk).update(created_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(self.upload("k1").status_code, 201)
+
+    def test_long_keys_are_refused(self):
+        self.assertEqual(self.upload("k" * 300).status_code, 400)
+
+
+class ResumableUploadTests(UploadTestCase):
+    def open(self, data: bytes, **fields) -> str:
+        payload = {"group_id": self.group.id, "filename": "photo.jpg", "size": len(data), "content_type": "image/jpeg", **fields}
+        response = self.client.post("/api/uploads/", payload, content_type="application/json")
+        self.assertEqual(response.status_code, 201, response.content)
+        return response.json()["id"]
+
+    def put(self, upload_id: str, data: bytes, start: int, end: int):
+        return self.client.put(
+            f"/api/uploads/{upload_id}/",
+            data[start:end + 1],
+            content_type="application/octet-stream",
+            headers={"content-range": f"bytes {start}-{end}/{len(data)}"},
+        )
+
+    def finalize(self, upload_id: str, key=None):
+        headers = {"idempotency-key": key} if key else {}
+        return self.client.post(f"/api/uploads/{upload_id}/finalize/", headers=headers)
+
+    def test_chunks_resume_and_finalize_once(self):
+        data = jpeg()
+        upload_id = self.open(data, caption="chunked")
+        middle = len(data) // 2
+        self.assertEqual(self.put(upload_id, data, 0, middle - 1).json()["received"], middle)
+        # A resent chunk overlapping what was received is fine.
+        self.assertEqual(self.put(upload_id, data, 0, middle - 1).json()["received"], middle)
+        self.assertEqual(self.client.get(f"/api/uploads/{upload_id}/").json()["received"], middle)
+        self.assertEqual(self.put(upload_id, data, middle, len(data) - 1).json()["received"], len(data))
+
+        created = self.finalize(upload_id, key="f1")
+        self.assertEqual(created.status_code, 201)
+        post = Post.objects.get()
+        self.assertEqual((post.id, post.caption), (created.json()["id"], "chunked"))
+        with post.image.open("rb") as fh:
+            self.assertEqual(fh.read(), data)
+        self.assertFalse(uploads.staging_path(UploadSession.objects.get()).exists())
+
+        replayed = self.finalize(upload_id, key="f1")
+        self.assertEqual((replayed.status_code, replayed["Idempotent-Replayed"]), (201, "true"))
+        repeat = self.finalize(upload_id)
+        self.assertEqual((repeat.status_code, repeat.json()["id"]), (200, post.id))
+        self.assertEqual(Post.objects.count(), 1)
+
+    def test_chunks_must_be_contiguous(self):
+        data = jpeg()
+        upload_id = self.open(data)
+        response = self.put(upload_id, data, 10, 19)
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response.json()["received"], 0)
+
+    def test_bad_ranges(self):
+        data = jpeg()
+        upload_id = self.open(data)
+        response = self.client.put(
+            f"/api/uploads/{upload_id}/", data[:10], content_type="application/octet-stream",
+            headers={"content-range": f"bytes 0-9/{len(data) + 1}"},
+        )
+        self.assertEqual(response.status_code, 416)
+        response = self.client.put(f"/api/uploads/{upload_id}/", data[:10], content_type="application/octet-stream")
+        self.assertEqual(response.status_code, 400)
+
+    def test_incomplete_and_invalid_uploads_are_refused(self):
+        data = b"not an image at all"
+        upload_id = self.open(data)
+        self.assertEqual(self.finalize(upload_id).status_code, 409)
+        self.put(upload_id, data, 0, len(data) - 1)
+        self.assertEqual(self.finalize(upload_id).status_code, 415)
+        self.assertFalse(Post.objects.exists())
+
+    def test_size_and_type_limits(self):
+        with override_settings(UPLOAD_MAX_BYTES=100):
+            response = self.client.post(
+                "/api/uploads/", {"group_id": self.group.id, "size": 101}, content_type="application/json"
+            )
+        self.assertEqual(response.status_code, 413)
+        response = self.client.post(
+            "/api/uploads/", {"group_id": self.group.id, "size": 10, "content_type": "text/plain"},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 415)
+
+    def test_only_members_upload(self):
+        outsider = client_for(make_user("outsider"))
+        response = outsider.post("/api/uploads/", {"group_id": self.group.id, "size": 10}, content_type="application/json")
+        self.assertEqual(response.status_code, 403)
+
+    def test_prune_removes_expired_sessions(self):
+        upload_id = self.open(jpeg())
+        session = UploadSession.objects.get(pk=upload_id)
+        UploadSession.objects.filter(pk=upload_id).update(expires_at=timezone.now() - timedelta(minutes=1))
+        self.assertEqual(uploads.prune(), 1)
+        self.assertFalse(UploadSession.objects.exists())
+        self.assertFalse(uploads.staging_path(session).exists())
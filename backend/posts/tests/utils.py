@@ -0,0 +1,62 @@
+"""Fixtures shared by the posts tests."""
+import tempfile
+
+from django.contrib.auth.models import User
+from django.test import Client, TestCase, override_settings
+
+from posts import jobs
+from posts.models import Group, GroupMembership, Post
+
+# Templates link static files by name; the manifest storage would need collectstatic first.
+plain_static_files = override_settings(STORAGES={
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+})
+
+
+class MediaTestCase(TestCase):
+    """A TestCase whose media files go to a temporary MEDIA_ROOT, removed afterwards."""
+
+    @classmethod
+    def setUpClass(cls):
+        media_root = cls.enterClassContext(tempfile.TemporaryDirectory(prefix="posts-tests-"))
+        cls.enterClassContext(override_settings(MEDIA_ROOT=media_root))
+        super().setUpClass()
+
+
+def make_user(username: str, **fields) -> User:
+    """A user without a usable password (hashing one is slow); tests log in with client_for."""
+    return User.objects.create_user(username, **fields)
+
+
+def make_group(owner: User, *members: User, **fields) -> Group:
+    group = Group.objects.create(name=fields.pop("name", f"{owner.username}'s group"), owner=owner, **fields)
+    for member in members:
+        GroupMembership.objects.create(group=group, user=member)
+    group.refresh_from_db()
+    return group
+
+
+def make_post(group: Group, author: User, caption: str = "", **fields) -> Post:
+    """A post without an image; `date` and `created_at` are written after the insert (both are auto_now_add)."""
+    backdated = {key: fields.pop(key) for key in ("date", "created_at") if key in fields}
+    post = Post.objects.create(group=group, author=author, caption=caption, **fields)
+    if backdated:
+        Post.objects.filter(pk=post.pk).update(**backdated)
+        post.refresh_from_db()
+    return post
+
+
+def client_for(user: User) -> Client:
+    client = Client()
+    client.force_login(user)
+    return client
+
+
+def run_jobs(*queues: str, worker_id: str = "test") -> list[str]:
+    """Run the runnable jobs of `queues` (all by default) in this thread, as a worker would; returns their new statuses."""
+    statuses = []
+    for queue in queues or jobs.queues():
+        for job in jobs.claim(queue, 100, worker_id):
+            statuses.append(jobs.finish(job, jobs.execute(job.pk, job.task, job.payload, job.attempts), worker_id))
+    return statuses
@@ -0,0 +1,117 @@
+"""
+Paginated comment threads over the materialized Comment.path.
+
+A page is a keyset slice of sibling comments (top-level comments of a post,
+or the direct replies of one comment) plus a bounded preview of each
+sibling's subtree. Every subtree is a range on (post, path), so the whole
+page costs two indexed queries however large the post's discussion is.
+Nodes whose replies were not all loaded carry a `replies_after` cursor for
+fetching the rest with `?parent=<id>&after=<cursor>`.
+"""
+from django.db.models import F, Q, Window
+from django.db.models.functions import RowNumber, Substr
+
+from .models import Comment
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+DEFAULT_DEPTH = 3
+MAX_DEPTH = 10
+DEFAULT_REPLIES = 50
+MAX_REPLIES = 200
+
+
+def clamp(raw, default: int, low: int, high: int) -> int:
+    try:
+        value = int(raw)
+    except (TypeError, ValueError):
+        return default
+    return max(low, min(high, value))
+
+
+def parse_id(raw) -> int | None:
+    try:
+        value = int(raw)
+    except (TypeError, ValueError):
+        return None
+    return value if 0 < value < 2**63 else None
+
+
+def subtree_end(path: str) -> str:
+    # Descendant paths extend `path`; "/" sorts just below "0", so bumping the
+    # trailing separator gives an exclusive upper bound for the subtree.
+    return path[:-1] + "0"
+
+
+def siblings(post, parent=None, after=None, limit: int = DEFAULT_PAGE_SIZE) -> tuple[list[Comment], bool]:
+    """Top-level comments (or direct replies of `parent`) after the `after` id, oldest first."""
+    qs = Comment.objects.filter(post=post).select_related("author")
+    qs = qs.filter(parent=parent) if parent is not None else qs.filter(depth=0)
+    if after is not None:
+        qs = qs.filter(id__gt=after)
+    rows = list(qs.order_by("id")[: limit + 1])
+    return rows[:limit], len(rows) > limit
+
+
+def descendants_queryset(tops, depth: int, per_thread: int):
+    ranges = Q()
+    for top in tops:
+        ranges |= Q(path__gt=top.path, path__lt=subtree_end(top.path))
+    # Siblings share a depth, hence a path length; that prefix names the thread.
+    prefix = len(tops[0].path)
+    return (
+        Comment.objects.filter(post_id=tops[0].post_id, depth__lte=tops[0].depth + depth)
+        .filter(ranges)
+        .select_related("author")
+        .annotate(rank=Window(
+            expression=RowNumber(),
+            partition_by=[Substr("path", 1, prefix)],
+            order_by=[F("path").asc()],
+        ))
+        .filter(rank__lte=per_thread)
+        .order_by("path")
+    )
+
+
+def node(comment: Comment) -> dict:
+    return {
+        "id": comment.id,
+        "post_id": comment.post_id,
+        "user_id": comment.author_id,
+        "user_name": comment.user_name,
+        "text": comment.text,
+        "created_at": comment.created_at.isoformat(),
+        "parent": comment.parent_id,
+        "depth": comment.depth,
+        "reply_count": comment.reply_count,
+        "replies": [],
+        "has_more_replies": comment.reply_count > 0,
+        "replies_after": None,
+    }
+
+
+def build(tops, descendants) -> list[dict]:
+    """Nest `descendants` (in path order) under `tops` and mark truncated reply lists."""
+    nodes = {c.id: node(c) for c in tops}
+    for comment in descendants:
+        nodes[comment.id] = node(comment)
+        # Path order visits a parent before any of its replies.
+        nodes[comment.parent_id]["replies"].append(nodes[comment.id])
+    for item in nodes.values():
+        replies = item["replies"]
+        item["has_more_replies"] = len(replies) < item["reply_count"]
+        if replies:
+            item["replies_after"] = replies[-1]["id"]
+    return [nodes[c.id] for c in tops]
+
+
+def page(post, parent=None, after=None, page_size: int = DEFAULT_PAGE_SIZE,
+         depth: int = DEFAULT_DEPTH, replies: int = DEFAULT_REPLIES) -> dict:
+    tops, has_more = siblings(post, parent, after, page_size)
+    below = list(descendants_queryset(tops, depth, replies)) if tops and depth > 0 else []
+    return {
+        "parent": parent.id if parent is not None else None,
+        "results": build(tops, below),
+        "has_more": has_more,
+        "next_after": tops[-1].id if has_more else None,
+    }
@@ -0,0 +1,200 @@
+"""
+Resumable chunked uploads of post images.
+
+1. POST /api/uploads/ opens an UploadSession for a file of known size.
+2. PUT /api/uploads/<id>/ with `Content-Range: bytes <start>-<end>/<size>`
+   writes one chunk. The body is copied from the request stream straight
+   into a staging file on local disk, a block at a time. GET on the same
+   URL returns `received`, the offset to resume from.
+3. POST /api/uploads/<id>/finalize/ checks the file is a complete image and
+   creates the post (through the regular storage, so S3 when configured).
+   Finalize is idempotent per session and also honours `Idempotency-Key`.
+
+Staging files live under UPLOAD_STAGING_DIR; with several web servers,
+that directory must be shared or uploads routed to one instance.
+"""
+import re
+import tempfile
+import uuid
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from django.utils.text import get_valid_filename
+from PIL import Image, UnidentifiedImageError
+
+from .models import Post, UploadSession
+
+CHUNK_SIZE = 1024 * 1024
+COPY_BUFFER = 64 * 1024
+CONTENT_RANGE = re.compile(r"^bytes (\d+)-(\d+)/(\d+)$")
+
+
+class UploadError(Exception):
+    def __init__(self, detail: str, status: int = 400, **extra):
+        super().__init__(detail)
+        self.detail = detail
+        self.status = status
+        self.extra = extra
+
+
+def max_bytes() -> int:
+    return int(getattr(settings, "UPLOAD_MAX_BYTES", 25 * 1024 * 1024))
+
+
+def max_chunk_bytes() -> int:
+    return int(getattr(settings, "UPLOAD_MAX_CHUNK_BYTES", 8 * 1024 * 1024))
+
+
+def session_hours() -> int:
+    return int(getattr(settings, "UPLOAD_SESSION_HOURS", 24))
+
+
+def staging_dir() -> Path:
+    path = Path(getattr(settings, "UPLOAD_STAGING_DIR", None) or Path(tempfile.gettempdir()) / "daily-groups-uploads")
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def staging_path(session: UploadSession) -> Path:
+    return staging_dir() / f"{session.pk}.part"
+
+
+def as_dict(session: UploadSession) -> dict:
+    return {
+        "id": str(session.pk),
+        "size": session.size,
+        "received": session.received,
+        "status": session.status,
+        "chunk_size": CHUNK_SIZE,
+        "post_id": session.post_id,
+        "expires_at": session.expires_at.isoformat(),
+    }
+
+
+def create(user, group, filename: str, size, content_type: str = "", caption: str = "") -> UploadSession:
+    try:
+        size = int(size)
+    except (TypeError, ValueError):
+        raise UploadError("size must be the file size in bytes.")
+    if not 0 < size <= max_bytes():
+        raise UploadError(f"size must be between 1 and {max_bytes()} bytes.", status=413 if size > 0 else 400)
+    if content_type and not content_type.startswith("image/"):
+        raise UploadError("Only images can be uploaded.", status=415)
+    name = get_valid_filename(Path(filename or "").name) or "upload.jpg"
+    session = UploadSession.objects.create(
+        user=user,
+        group=group,
+        caption=caption,
+        filename=name[:255],
+        content_type=content_type,
+        size=size,
+        expires_at=timezone.now() + timedelta(hours=session_hours()),
+    )
+    staging_path(session).touch()
+    return session
+
+
+def parse_content_range(header: str, size: int) -> tuple[int, int]:
+    """(start, length) from `bytes start-end/size`."""
+    match = CONTENT_RANGE.match((header or "").strip())
+    if not match:
+        raise UploadError("Content-Range must be 'bytes <start>-<end>/<size>'.")
+    start, end, total = (int(g) for g in match.groups())
+    if total != size or end < start or end >= size:
+        raise UploadError("Content-Range does not fit the upload.", status=416)
+    return start, end - start + 1
+
+
+def write_chunk(session: UploadSession, stream, content_range: str, content_length) -> int:
+    """Copy one chunk from `stream` into the staging file; returns the new `received`."""
+    if session.status != UploadSession.OPEN:
+        raise UploadError("This upload is already finalized.", status=409)
+    start, length = parse_content_range(content_range, session.size)
+    if length > max_chunk_bytes():
+        raise UploadError(f"Chunks are limited to {max_chunk_bytes()} bytes.", status=413)
+    if str(length) != str(content_length):
+        raise UploadError("Content-Length does not match Content-Range.")
+    if start > session.received:
+        # Chunks must extend the contiguous prefix; overlapping resends are fine.
+        raise UploadError("Chunk starts past the received bytes.", status=416, received=session.received)
+    path = staging_path(session)
+    if not path.exists():
+        raise UploadError("The staged data for this upload is gone; start a new upload.", status=410)
+    remaining = length
+    with open(path, "r+b") as fh:
+        fh.seek(start)
+        while remaining:
+            block = stream.read(min(COPY_BUFFER, remaining))
+            if not block:
+                break
+            fh.write(block)
+            remaining -= len(block)
+    if remaining:
+        raise UploadError("The chunk body ended early.", received=session.received)
+    UploadSession.objects.filter(pk=session.pk, received__gte=start).update(
+        received=Greatest(F("received"), start + length)
+    )
+    return UploadSession.objects.values_list("received", flat=True).get(pk=session.pk)
+
+
+def finalize(session: UploadSession) -> Post:
+    """Create the post from a fully received upload. Finalizing twice returns the same post."""
+    if session.status == UploadSession.COMPLETE and session.post_id:
+        return session.post
+    if session.received < session.size:
+        raise UploadError("The upload is incomplete.", status=409, received=session.received)
+    path = staging_path(session)
+    with transaction.atomic():
+        # The status check makes one request the finalizer; a concurrent one waits on the row, then replays.
+        if not UploadSession.objects.filter(pk=session.pk, status=UploadSession.OPEN).update(status=UploadSession.COMPLETE):
+            current = UploadSession.objects.select_related("post").filter(pk=session.pk).first()
+            if current is not None and current.post_id:
+                return current.post
+            raise UploadError("The upload was abandoned.", status=410)
+        with open(path, "rb") as fh:
+            try:
+                with Image.open(fh) as img:
+                    img.verify()
+            except (UnidentifiedImageError, OSError, SyntaxError, ValueError):
+                raise UploadError("The uploaded file is not a valid image.", status=415)
+            fh.seek(0)
+            post = Post.objects.create(
+                group=session.group,
+                author=session.user,
+                caption=session.caption,
+                image=File(fh, name=session.filename),
+                date=timezone.now().date(),
+            )
+        UploadSession.objects.filter(pk=session.pk).update(post=post)
+    session.status, session.post = UploadSession.COMPLETE, post
+    path.unlink(missing_ok=True)
+    return post
+
+
+def abort(session: UploadSession) -> None:
+    staging_path(session).unlink(missing_ok=True)
+    session.delete()
+
+
+def prune() -> int:
+    """Delete expired sessions and their staging files, plus staging files without a session."""
+    now = timezone.now()
+    expired = UploadSession.objects.filter(expires_at__lt=now)
+    for pk in expired.exclude(status=UploadSession.COMPLETE).values_list("pk", flat=True):
+        (staging_dir() / f"{pk}.part").unlink(missing_ok=True)
+    deleted, _ = expired.delete()
+    cutoff = (now - timedelta(hours=session_hours())).timestamp()
+    for path in staging_dir().glob("*.part"):
+        try:
+            pk = uuid.UUID(path.stem)
+        except ValueError:
+            continue
+        if path.stat().st_mtime < cutoff and not UploadSession.objects.filter(pk=pk).exists():
+            path.unlink(missing_ok=True)
+    return deleted
@@ -7,6 +7,17 @@ from .views import (
     PostViewSet,
     ProfileViewSet,
     upload_post,
+    upload_sessions,
+    upload_session,
+    finalize_upload,
+    export_posts,
+    archive_exports,
+    archive_export,
+    download_archive,
+    bootstrap,
+    sync,
+    events,
+    feed_cache_stats,
     group_detail,
     start_photo_upload,
     create_post_from_s3,
@@ -23,6 +34,17 @@ urlpatterns = [
     # Function-based endpoints
     #path("groups/<int:group_id>/", group_detail, name="group_detail"),
     path("posts/upload/", upload_post, name="upload_post"),
+    path("uploads/", upload_sessions, name="upload_sessions"),
+    path("uploads/<uuid:pk>/", upload_session, name="upload_session"),
+    path("uploads/<uuid:pk>/finalize/", finalize_upload, name="finalize_upload"),
+    path("exports/posts/", export_posts, name="export_posts"),
+    path("exports/archives/", archive_exports, name="archive_exports"),
+    path("exports/archives/<int:pk>/", archive_export, name="archive_export"),
+    path("exports/archives/<int:pk>/download/", download_archive, name="download_archive"),
+    path("bootstrap/", bootstrap, name="bootstrap"),
+    path("sync/", sync, name="sync"),
+    path("events/", events, name="events"),
+    path("feed-cache/stats/", feed_cache_stats, name="feed_cache_stats"),
     path("api/upload-url/", start_photo_upload),
     path("api/confirm-upload/", create_post_from_s3, name="confirm_upload"),
 
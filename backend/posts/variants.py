@@ -0,0 +1,213 @@
+"""
+Resized variants of Post.image and Group.cover.
+
+When a post or group is saved with a new file, `schedule` enqueues a
+`build_job` on the "images" job queue (posts.jobs) in the same transaction, so the
+build survives a restart and is retried if it fails. The worker does the
+storage and database I/O and hands the Pillow work (posts.imaging.render)
+to a process pool, so resizing never runs in the request thread or holds a
+GIL the worker's other jobs need. A build:
+
+- stores the original again, upright, at most IMAGE_MAX_EDGE px and without
+  metadata (keeping the uploaded image data when it already is), and points
+  the row at it; a forced rebuild of a normalized original only redoes the
+  variants,
+- stores thumb/feed/full in WebP and JPEG,
+- records their names and sizes in `image_variants` / `cover_variants`,
+- bumps the version counters and appends a change log entry, so cached
+  feeds, ETags and syncing clients pick up the new URLs.
+
+Every file is a content-addressed blob (posts.blobs): rows with the same
+image share their normalized original and variants, and the build moves the
+row's references from the uploaded blob to the new ones.
+
+Until a build lands, `urls()` returns {} and clients fall back to the
+original URL.
+"""
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+
+from . import blobs, changelog, counters, imaging, jobs
+from .models import Group, Post
+
+logger = logging.getLogger(__name__)
+
+FIELDS = {Post: "image", Group: "cover"}
+MODELS = {model._meta.model_name: model for model in FIELDS}
+# Passed to mark_changed: the group of a post, the owner of a group.
+RELATED = {Post: "group_id", Group: "owner_id"}
+
+_lock = threading.Lock()
+_processes: ProcessPoolExecutor | None = None
+_threads: ThreadPoolExecutor | None = None
+
+
+def max_edge() -> int:
+    return int(getattr(settings, "IMAGE_MAX_EDGE", 2560))
+
+
+def workers() -> int:
+    return max(1, int(getattr(settings, "IMAGE_WORKERS", 2)))
+
+
+def _process_pool() -> ProcessPoolExecutor:
+    global _processes
+    with _lock:
+        if _processes is None:
+            # spawn rather than fork: the server process is threaded, and workers only need Pillow.
+            _processes = ProcessPoolExecutor(max_workers=workers(), mp_context=multiprocessing.get_context("spawn"))
+        return _processes
+
+
+def _thread_pool() -> ThreadPoolExecutor:
+    global _threads
+    with _lock:
+        if _threads is None:
+            _threads = ThreadPoolExecutor(max_workers=workers(), thread_name_prefix="image-variants")
+        return _threads
+
+
+def _reset_process_pool(broken: ProcessPoolExecutor) -> None:
+    global _processes
+    with _lock:
+        if _processes is broken:
+            _processes = None
+
+
+def _render(data: bytes, normalize: bool = True) -> dict:
+    pool = _process_pool()
+    try:
+        return pool.submit(imaging.render, data, max_edge(), normalize).result()
+    except BrokenProcessPool:
+        # A worker died (e.g. killed while decoding a huge image); start fresh next time.
+        _reset_process_pool(pool)
+        raise
+
+
+def is_current(instance) -> bool:
+    field = FIELDS[type(instance)]
+    name = getattr(instance, field).name or ""
+    return (getattr(instance, f"{field}_variants") or {}).get("source", "") == name
+
+
+def schedule(instance) -> None:
+    """Enqueue a variant build for `instance`; the job exists only if the save commits."""
+    build_job.enqueue(model=instance._meta.model_name, pk=instance.pk)
+
+
+def render_blobs(storage, source: str, normalize: bool = True) -> tuple[str, dict]:
+    """
+    Normalize the file `source` and store it and its variants as blobs; returns
+    (name, variants). With `normalize=False` the file is kept as it is.
+    """
+    with storage.open(source, "rb") as fh:
+        rendered = _render(fh.read(), normalize)
+    original = rendered.pop("original")
+    if original["data"] is None:
+        name = source
+    else:
+        name = blobs.store(ContentFile(original["data"]), f"original.{original['ext']}", storage).name
+    variants = {"source": name, "width": original["width"], "height": original["height"]}
+    for variant, _ in imaging.VARIANTS:
+        out = rendered[variant]
+        entry = {"width": out["width"], "height": out["height"]}
+        for fmt, encoded in out["formats"].items():
+            entry[fmt] = blobs.store(ContentFile(encoded["data"]), f"{variant}.{encoded['ext']}", storage).name
+        variants[variant] = entry
+    return name, variants
+
+
+def mark_changed(model, pk, related_id) -> None:
+    """Bump versions and log the change after a row's file names were rewritten with .update()."""
+    if model is Post:
+        counters.bump(Post, pk, "version", 1)
+        counters.bump(Group, related_id, "version", 1)
+        changelog.record("post", "upsert", pk, group_id=related_id)
+    else:
+        counters.bump(Group, pk, "version", 1)
+        changelog.record("group", "upsert", pk, group_id=pk, user_id=related_id)
+
+
+def build(model, pk, force: bool = False) -> bool:
+    """Normalize the file of one row and write its variants. Returns False if there was nothing to do."""
+    field = FIELDS[model]
+    storage = model._meta.get_field(field).storage
+    row = model.objects.filter(pk=pk).values_list(field, f"{field}_variants", RELATED[model]).first()
+    if row is None:
+        return False
+    source, previous, related_id = row[0] or "", row[1] or {}, row[2]
+    # The file is the original a previous build stored: it is never encoded again.
+    normalized = previous.get("source", "") == source
+    if normalized and not force:
+        return False
+
+    name, variants = render_blobs(storage, source, normalize=not normalized) if source else ("", {})
+
+    with transaction.atomic():
+        updated = model.objects.filter(pk=pk, **{field: source}).update(**{field: name, f"{field}_variants": variants})
+        if updated:
+            # The uploaded blob is released here and collected after the grace period, so its URL keeps working.
+            blobs.swap(blobs.referenced(source, previous), blobs.referenced(name, variants))
+            mark_changed(model, pk, related_id)
+    # If not updated, the file was replaced or the row deleted meanwhile and that change
+    # schedules its own build; the blobs stored here stay unreferenced until collected.
+    return bool(updated)
+
+
+@jobs.task(queue="images", max_attempts=3)
+def build_job(ctx, model: str, pk: int) -> bool:
+    return build(MODELS[model], pk)
+
+
+def build_many(model, pks, force: bool = False) -> tuple[int, int]:
+    """Build variants for many rows in parallel; returns (built, failed)."""
+    futures = [_thread_pool().submit(build, model, pk, force) for pk in pks]
+    built = failed = 0
+    for future in futures:
+        try:
+            built += bool(future.result())
+        except Exception:
+            failed += 1
+            logger.exception("Building image variants failed")
+    return built, failed
+
+
+def urls(instance, request=None) -> dict:
+    """{variant: {"width", "height", "webp", "jpeg"}} with URLs, or {} if the variants are not built yet."""
+    field = FIELDS[type(instance)]
+    file = getattr(instance, field)
+    if not file or not is_current(instance):
+        return {}
+    variants = getattr(instance, f"{field}_variants")
+    result = {}
+    for variant, _ in imaging.VARIANTS:
+        entry = variants.get(variant)
+        if not entry:
+            continue
+        result[variant] = {"width": entry["width"], "height": entry["height"]}
+        for fmt in imaging.FORMATS:
+            url = file.storage.url(entry[fmt])
+            result[variant][fmt] = request.build_absolute_uri(url) if request else url
+    return result
+
+
+def srcset(variant_urls: dict) -> dict:
+    """{"webp": "<url> 320w, ...", "jpeg": ...} from `urls()`; sizes that repeat (small originals) are listed once."""
+    if not variant_urls:
+        return {}
+    result = {}
+    for fmt in imaging.FORMATS:
+        seen, parts = set(), []
+        for entry in variant_urls.values():
+            if entry["width"] not in seen:
+                seen.add(entry["width"])
+                parts.append(f"{entry[fmt]} {entry['width']}w")
+        result[fmt] = ", ".join(parts)
+    return result
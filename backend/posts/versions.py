@@ -0,0 +1,24 @@
+"""
+Cache versions stored in the database.
+
+A cache entry whose key embeds `get(name)` is retired by `bump(name)` in every
+process at once, whatever the cache backend: the new number is read from the
+CacheVersion table, and entries under the old one simply expire. Bumps are
+plain UPDATEs in the caller's transaction, so readers switch to the new
+version exactly when the change commits. Names that were never bumped are at 1.
+"""
+from django.db.models import F
+
+from .models import CacheVersion
+
+
+def get(name: str) -> int:
+    return CacheVersion.objects.filter(key=name).values_list("value", flat=True).first() or 1
+
+
+def bump(*names: str) -> None:
+    names = sorted(set(names))
+    if not names:
+        return
+    CacheVersion.objects.bulk_create([CacheVersion(key=name) for name in names], ignore_conflicts=True)
+    CacheVersion.objects.filter(key__in=names).update(value=F("value") + 1)
@@ -1,5 +1,5 @@
 from rest_framework import generics, viewsets, status, mixins
-from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.permissions import IsAdminUser, IsAuthenticated, AllowAny
 from rest_framework.filters import SearchFilter
 from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
@@ -7,7 +7,9 @@ from rest_framework.authentication import SessionAuthentication
 
 from django.contrib.auth.models import User
 from django.views.decorators.csrf import csrf_exempt
-from django.http import JsonResponse, HttpResponseBadRequest
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, HttpResponseBadRequest, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from django.db import transaction
@@ -16,9 +18,13 @@ from django.forms.models import model_to_dict  # if used elsewhere; otherwise sa
 from django.utils.dateparse import parse_date   # same note
 from django.contrib.auth.decorators import login_required
 
+from config.auth_urls import user_payload
 from storage.s3_utils import build_key, presign_upload, presign_download
 
-from .models import Group, Post, Profile, Comment, GroupMembership
+from . import archives, authz, changelog, counters, etags, exports, feed, feed_cache, leaderboard, prefetch, realtime, streaks, threads, uploads
+from .models import COMMENT_MAX_DEPTH, Group, Job, Post, Profile, Comment, GroupMembership, Streak, UploadSession
+from .idempotency import idempotent
+from .pagination import FeedCursorPagination, LeaderboardPagination, MemberPagination
 from .permissions import IsAuthorOrReadOnly
 from .serializers import (
     UserSerializer,
@@ -28,6 +34,9 @@ from .serializers import (
     CommentSerializer,
 )
 
+from asgiref.sync import sync_to_async
+from collections import defaultdict
+import asyncio
 import json
 import mimetypes
 
@@ -66,12 +75,18 @@ class GroupViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         user = self.request.user
-        return Group.objects.filter(Q(owner=user) | Q(members=user)).distinct().order_by("-created_at")
+        return Group.objects.filter(Q(owner=user) | Q(members=user)).distinct().select_related("owner").order_by("-created_at")
 
     def perform_create(self, serializer):
         group = serializer.save(owner=self.request.user)
         GroupMembership.objects.get_or_create(user=self.request.user, group=group, defaults={"role": "member"})
 
+    def perform_destroy(self, instance):
+        instance._actor = self.request.user
+        # Cascaded deletes fire receivers per row; batch their counter updates.
+        with transaction.atomic(), counters.batched():
+            instance.delete()
+
     @action(detail=True, methods=["post"], permission_classes=[IsAuthenticated])
     def cover(self, request, pk=None):
         group = get_object_or_404(Group, pk=pk)
@@ -101,6 +116,37 @@ class GroupViewSet(viewsets.ModelViewSet):
         GroupMembership.objects.filter(user=request.user, group=group).delete()
         return Response({"ok": True})
 
+    @action(detail=True, methods=["get"], permission_classes=[IsAuthenticated])
+    def members(self, request, pk=None):
+        """All members of the group, paged in join order (group payloads only carry a preview)."""
+        group = get_object_or_404(Group, pk=pk)
+        if not group.is_public and not authz.is_member(request.user, group.id):
+            return Response({"detail": "Join the group to view its members."}, status=status.HTTP_403_FORBIDDEN)
+        rows = (
+            GroupMembership.objects.filter(group=group)
+            .order_by("id")
+            .values_list("user_id", "user__username", "user__first_name", "user__last_name", "role")
+        )
+        paginator = MemberPagination()
+        page = paginator.paginate_queryset(rows, request, view=self)
+        return paginator.get_paginated_response([
+            {**prefetch.member_row(user_id, username, first, last), "role": role}
+            for user_id, username, first, last, role in page
+        ])
+
+    @action(detail=True, methods=["get"], permission_classes=[IsAuthenticated])
+    def leaderboard(self, request, pk=None):
+        group = get_object_or_404(Group.objects.select_related("owner"), pk=pk)
+        if not authz.is_member(request.user, group.id):
+            return Response({"detail": "Join the group to view its leaderboard."}, status=status.HTTP_403_FORBIDDEN)
+        period = (request.query_params.get("period") or "weekly").lower()
+        if period not in leaderboard.PERIOD_DAYS:
+            return Response({"detail": "period must be daily, weekly or monthly."}, status=status.HTTP_400_BAD_REQUEST)
+        rows = leaderboard.leaderboard(group, period)
+        paginator = LeaderboardPagination()
+        page = paginator.paginate_queryset(rows, request, view=self)
+        return paginator.get_paginated_response(page)
+
     def list(self, request, *args, **kwargs):
         discover = (request.query_params.get("discover") or "").lower() in {"1", "true", "yes"}
         if discover:
@@ -108,44 +154,84 @@ class GroupViewSet(viewsets.ModelViewSet):
             q = (request.query_params.get("q") or "").strip()
             if q:
                 qs = qs.filter(Q(name__icontains=q) | Q(description__icontains=q))
+            qs = qs.select_related("owner")
         else:
             qs = self.get_queryset()
+        etag = etags.make(request, etags.versions(qs))
+        if etags.matches(request, etag):
+            return etags.not_modified(etag)
         serializer = self.get_serializer(qs, many=True)
-        return Response({"results": serializer.data})
+        return Response({"results": serializer.data}, headers=etags.headers(etag))
 
 
 class PostViewSet(viewsets.ModelViewSet):
-    queryset = Post.objects.all().order_by("-created_at")
+    queryset = Post.objects.all().order_by("-created_at", "-id")
     serializer_class = PostSerializer
     permission_classes = [IsAuthenticated, IsAuthorOrReadOnly]
     authentication_classes = [CsrfExemptSessionAuthentication]
     filter_backends = [SearchFilter]
     search_fields = ["caption"]
 
+    @property
+    def paginator(self):
+        # `?cursor=` (empty for the first page) opts into keyset pagination;
+        # otherwise keep the global page-number pagination.
+        if not hasattr(self, "_paginator"):
+            if self.request is not None and FeedCursorPagination.cursor_query_param in self.request.query_params:
+                self._paginator = FeedCursorPagination()
+            elif self.pagination_class is None:
+                self._paginator = None
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
+
     def get_queryset(self):
         user = self.request.user
         today = timezone.localdate()
-        queryset = super().get_queryset().filter(date=today)
         group_id = self.request.query_params.get("group_id")
         if group_id:
-            queryset = queryset.filter(group_id=group_id)
-            try:
-                group = Group.objects.get(id=group_id)
-            except Group.DoesNotExist:
-                return queryset.none()
-            if not (group.owner_id == user.id or group.members.filter(id=user.id).exists()):
+            queryset = super().get_queryset().filter(date=today, group_id=group_id)
+            if not authz.is_member(user, group_id):
                 return queryset.none()
         else:
-            queryset = queryset.filter(Q(author=user) | Q(group__members=user) | Q(group__owner=user)).distinct()
-        return queryset
+            queryset = feed.feed_queryset(user, today).order_by("-created_at", "-id")
+        return queryset.select_related("author")
+
+    def list(self, request, *args, **kwargs):
+        group_id = request.query_params.get("group_id")
+        if group_id:
+            groups = Group.objects.filter(pk=threads.parse_id(group_id))
+        else:
+            groups = Group.objects.filter(pk__in=authz.group_ids(request.user))
+        versions = etags.versions(groups)
+        etag = etags.make(request, versions)
+        if etags.matches(request, etag):
+            return etags.not_modified(etag)
+        # A group's feed is the same for all of its members: serve it from the shared cache.
+        cache_key = None
+        if group_id and versions and authz.is_member(request.user, versions[0][0]):
+            cache_key = feed_cache.cache_key(request, *versions[0])
+            data = feed_cache.get(cache_key)
+            if data is not None:
+                return Response(data, headers=etags.headers(etag))
+        response = super().list(request, *args, **kwargs)
+        if cache_key is not None and response.status_code == 200:
+            feed_cache.store(cache_key, response.data)
+        for header, value in etags.headers(etag).items():
+            response[header] = value
+        return response
 
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
 
+    def perform_destroy(self, instance):
+        instance._actor = self.request.user
+        # Cascaded deletes fire receivers per row; batch their counter updates.
+        with transaction.atomic(), counters.batched():
+            instance.delete()
+
     def _ensure_member(self, post, user):
-        if post.group.owner_id == user.id:
-            return True
-        return post.group.members.filter(id=user.id).exists()
+        return authz.is_member(user, post.group_id)
 
     @action(detail=False, methods=["post"], permission_classes=[IsAuthenticated, IsAuthorOrReadOnly])
     def bulk_delete(self, request):
@@ -153,14 +239,18 @@ class PostViewSet(viewsets.ModelViewSet):
         if not post_ids:
             return Response({"detail": "No post IDs provided."}, status=status.HTTP_400_BAD_REQUEST)
         posts_to_delete = Post.objects.filter(id__in=post_ids, author=request.user)
-        deleted_count, _ = posts_to_delete.delete()
+        with transaction.atomic(), counters.batched():
+            deleted_count, _ = posts_to_delete.delete()
         return Response({"detail": f"Successfully deleted {deleted_count} posts."}, status=status.HTTP_204_NO_CONTENT)
 
     @action(detail=False, methods=["get"], permission_classes=[IsAuthenticated])
     def export_my_posts(self, request):
-        user_posts = Post.objects.filter(author=request.user).order_by("-created_at")
-        serializer = self.get_serializer(user_posts, many=True)
-        return Response(serializer.data)
+        try:
+            filters = exports.parse_filters(request.query_params)
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        chunks = exports.json_chunks(request.user, filters, lambda posts: self.get_serializer(posts, many=True).data)
+        return exports.stream(request._request, chunks, "application/json")
 
     @csrf_exempt
     @action(detail=True, methods=["get", "post"], permission_classes=[IsAuthenticated])
@@ -170,36 +260,25 @@ class PostViewSet(viewsets.ModelViewSet):
             return Response({"detail": "Join the group to view comments."}, status=status.HTTP_403_FORBIDDEN)
 
         if request.method.lower() == "get":
-            comments = (
-                Comment.objects.filter(post=post)
-                .select_related("author")
-                .prefetch_related("replies")
-                .order_by("created_at")
+            etag = etags.make(request, post.id, post.version)
+            if etags.matches(request, etag):
+                return etags.not_modified(etag)
+            parent = None
+            if request.query_params.get("parent"):
+                parent_pk = threads.parse_id(request.query_params["parent"])
+                parent = Comment.objects.filter(pk=parent_pk, post=post).first() if parent_pk else None
+                if parent is None:
+                    return Response({"detail": "Parent comment not found."}, status=status.HTTP_404_NOT_FOUND)
+            data = threads.page(
+                post,
+                parent=parent,
+                after=threads.parse_id(request.query_params.get("after")),
+                page_size=threads.clamp(request.query_params.get("page_size"), threads.DEFAULT_PAGE_SIZE, 1, threads.MAX_PAGE_SIZE),
+                depth=threads.clamp(request.query_params.get("depth"), threads.DEFAULT_DEPTH, 0, threads.MAX_DEPTH),
+                replies=threads.clamp(request.query_params.get("replies"), threads.DEFAULT_REPLIES, 1, threads.MAX_REPLIES),
             )
-            comment_map = {}
-            roots = []
-
-            def to_dict(c):
-                return {
-                    "id": c.id,
-                    "post_id": c.post_id,
-                    "user_id": c.author_id,
-                    "user_name": c.user_name,
-                    "text": c.text,
-                    "created_at": c.created_at.isoformat(),
-                    "parent": c.parent_id,
-                    "replies": [],
-                }
-
-            for c in comments:
-                comment_map[c.id] = to_dict(c)
-            for c in comments:
-                node = comment_map[c.id]
-                if c.parent_id and c.parent_id in comment_map:
-                    comment_map[c.parent_id]["replies"].append(node)
-                else:
-                    roots.append(node)
-            return Response({"results": roots})
+            data["comment_count"] = post.comment_count
+            return Response(data, headers=etags.headers(etag))
 
         text = (request.data.get("text") or "").strip()
         if not text:
@@ -211,6 +290,8 @@ class PostViewSet(viewsets.ModelViewSet):
                 parent_obj = Comment.objects.get(pk=parent_id, post=post)
             except Comment.DoesNotExist:
                 return Response({"detail": "Parent comment not found."}, status=status.HTTP_404_NOT_FOUND)
+            if parent_obj.depth >= COMMENT_MAX_DEPTH:
+                return Response({"detail": "Replies are nested too deeply."}, status=status.HTTP_400_BAD_REQUEST)
         comment = Comment.objects.create(
             post=post,
             author=request.user,
@@ -218,20 +299,12 @@ class PostViewSet(viewsets.ModelViewSet):
             text=text,
             parent=parent_obj,
         )
-        data = {
-            "id": comment.id,
-            "post_id": comment.post_id,
-            "user_id": comment.author_id,
-            "user_name": comment.user_name,
-            "text": comment.text,
-            "created_at": comment.created_at.isoformat(),
-            "parent": comment.parent_id,
-            "replies": [],
-        }
+        data = threads.node(comment)
         return Response(data, status=status.HTTP_201_CREATED)
 
 
 @csrf_exempt
+@idempotent
 def upload_post(request):
     """Upload from SPA: multipart image, caption, group_id."""
     if request.method != "POST":
@@ -246,10 +319,7 @@ def upload_post(request):
         return JsonResponse({"detail": "image and group_id are required"}, status=400)
 
     group = get_object_or_404(Group, id=group_id)
-    if not (
-        group.owner_id == request.user.id
-        or group.members.filter(id=request.user.id).exists()
-    ):
+    if not authz.is_member(request.user, group.id):
         return JsonResponse({"detail": "Join the group to post."}, status=403)
 
     with transaction.atomic():
@@ -261,14 +331,270 @@ def upload_post(request):
             date=timezone.now().date(),
         )
 
-    data = {
+    return JsonResponse(_upload_payload(request, post), status=201)
+
+
+def _upload_payload(request, post: Post) -> dict:
+    return {
         "id": post.id,
-        "user_name": request.user.username,
+        "user_name": post.author.username,
         "caption": post.caption,
         "date": post.date.isoformat() if post.date else None,
         "image_url": request.build_absolute_uri(post.image.url) if post.image else None,
     }
-    return JsonResponse(data, status=201)
+
+
+def _upload_error(error: uploads.UploadError) -> JsonResponse:
+    return JsonResponse({"detail": error.detail, **error.extra}, status=error.status)
+
+
+@csrf_exempt
+def upload_sessions(request):
+    """
+    Open a resumable upload. JSON body: group_id, filename, size (bytes),
+    content_type and caption. Chunks then go to PUT /api/uploads/<id>/.
+    """
+    if request.method != "POST":
+        return JsonResponse({"detail": "Method not allowed"}, status=405)
+    if not request.user.is_authenticated:
+        return JsonResponse({"detail": "Authentication required"}, status=401)
+    try:
+        payload = json.loads(request.body.decode("utf-8") or "{}")
+    except Exception:
+        return HttpResponseBadRequest("Invalid JSON")
+    group = get_object_or_404(Group, id=threads.parse_id(payload.get("group_id")))
+    if not authz.is_member(request.user, group.id):
+        return JsonResponse({"detail": "Join the group to post."}, status=403)
+    try:
+        session = uploads.create(
+            request.user,
+            group,
+            filename=payload.get("filename") or "",
+            size=payload.get("size"),
+            content_type=(payload.get("content_type") or "").strip(),
+            caption=(payload.get("caption") or "").strip(),
+        )
+    except uploads.UploadError as e:
+        return _upload_error(e)
+    return JsonResponse(uploads.as_dict(session), status=201)
+
+
+@csrf_exempt
+def upload_session(request, pk):
+    """
+    GET: progress (`received` is the offset to resume from).
+    PUT: one chunk, raw bytes with `Content-Range: bytes <start>-<end>/<size>`.
+    DELETE: abandon the upload.
+    """
+    if not request.user.is_authenticated:
+        return JsonResponse({"detail": "Authentication required"}, status=401)
+    session = get_object_or_404(UploadSession, pk=pk, user=request.user)
+    if request.method == "GET":
+        return JsonResponse(uploads.as_dict(session))
+    if request.method == "PUT":
+        try:
+            session.received = uploads.write_chunk(
+                session, request, request.headers.get("Content-Range"), request.META.get("CONTENT_LENGTH")
+            )
+        except uploads.UploadError as e:
+            return _upload_error(e)
+        return JsonResponse(uploads.as_dict(session))
+    if request.method == "DELETE":
+        uploads.abort(session)
+        return JsonResponse({"ok": True})
+    return JsonResponse({"detail": "Method not allowed"}, status=405)
+
+
+@csrf_exempt
+@idempotent
+def finalize_upload(request, pk):
+    """Turn a fully received upload into a post. Repeats return the same post."""
+    if request.method != "POST":
+        return JsonResponse({"detail": "Method not allowed"}, status=405)
+    if not request.user.is_authenticated:
+        return JsonResponse({"detail": "Authentication required"}, status=401)
+    session = get_object_or_404(UploadSession.objects.select_related("group", "user"), pk=pk, user=request.user)
+    if not authz.is_member(request.user, session.group_id):
+        return JsonResponse({"detail": "Join the group to post."}, status=403)
+    already_done = session.status == UploadSession.COMPLETE
+    try:
+        post = uploads.finalize(session)
+    except uploads.UploadError as e:
+        return _upload_error(e)
+    return JsonResponse(_upload_payload(request, post), status=200 if already_done else 201)
+
+
+def export_posts(request):
+    """
+    Stream the user's own posts. ?format=csv (default) or ndjson; optional
+    start/end (YYYY-MM-DD, inclusive) and repeated group=<id>.
+    """
+    if request.method != "GET":
+        return JsonResponse({"detail": "Method not allowed"}, status=405)
+    if not request.user.is_authenticated:
+        return JsonResponse({"detail": "Authentication required"}, status=401)
+    fmt = (request.GET.get("format") or "csv").lower()
+    if fmt not in exports.FORMATS:
+        return JsonResponse({"detail": f"format must be one of: {', '.join(exports.FORMATS)}."}, status=400)
+    try:
+        filters = exports.parse_filters(request.GET)
+    except ValueError as e:
+        return JsonResponse({"detail": str(e)}, status=400)
+    return exports.response(request, request.user, fmt, filters)
+
+
+def _archive_payload(request, job):
+    data = archives.as_dict(job)
+    data["status_url"] = request.build_absolute_uri(f"/api/exports/archives/{job.pk}/")
+    if data.get("available"):
+        data["download_url"] = request.build_absolute_uri(f"/api/exports/archives/{job.pk}/download/")
+    return data
+
+
+@csrf_exempt
+def archive_exports(request):
+    """
+    POST: start building a zip of all the user's posts, groups, comments and
+    images (or return the build already in progress). Poll `status_url`.
+    """
+    if request.method != "POST":
+        return JsonResponse({"detail": "Method not allowed"}, status=405)
+    if not request.user.is_authenticated:
+        return JsonResponse({"detail": "Authentication required"}, status=401)
+    job = archives.start(request.user)
+    return JsonResponse(_archive_payload(request, job), status=202)
+
+
+def archive_export(request, pk):
+    """Status and progress of an archive build; `download_url` once it is ready."""
+    if request.method != "GET":
+        return JsonResponse({"detail": "Method not allowed"}, status=405)
+    if not request.user.is_authenticated:
+        return JsonResponse({"detail": "Authentication required"}, status=401)
+    job = archives.job_for(request.user, pk)
+    if job is None:
+        return JsonResponse({"detail": "Not found"}, status=404)
+    return JsonResponse(_archive_payload(request, job))
+
+
+def download_archive(request, pk):
+    if not request.user.is_authenticated:
+        return JsonResponse({"detail": "Authentication required"}, status=401)
+    job = archives.job_for(request.user, pk)
+    if job is None:
+        return JsonResponse({"detail": "Not found"}, status=404)
+    if job.status != Job.SUCCEEDED:
+        return JsonResponse({"detail": "The archive is not ready yet."}, status=409)
+    if not archives.available(job):
+        return JsonResponse({"detail": "The archive has expired; request a new one."}, status=410)
+    return exports.stream(request, archives.file_chunks(job.result["name"]), "application/zip", "daily-groups-archive.zip")
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def bootstrap(request):
+    """
+    Page-load payload for the SPA: the current user, their groups and each
+    group's posts for today, in one response. Uses a fixed number of queries
+    regardless of how many groups the user belongs to.
+    """
+    user = request.user
+    today = timezone.localdate()
+    # Taken before reading so that changes made meanwhile are picked up by the next /sync/.
+    sync_token = changelog.latest_token()
+
+    groups = (
+        Group.objects.filter(Q(owner=user) | Q(members=user))
+        .distinct()
+        .select_related("owner")
+        .order_by("-created_at")
+    )
+    group_data = GroupSerializer(groups, many=True, context={"request": request}).data
+    group_ids = [g["id"] for g in group_data]
+
+    posts = (
+        Post.objects.filter(group_id__in=group_ids, date=today)
+        .select_related("author")
+        .order_by("-created_at", "-id")
+    )
+    posts_by_group = defaultdict(list)
+    for item in PostSerializer(posts, many=True, context={"request": request}).data:
+        posts_by_group[item["group"]].append(item)
+
+    for item in group_data:
+        item["is_creator"] = item["owner"] == user.username
+        item["is_member"] = True
+        item["posts"] = posts_by_group.get(item["id"], [])
+
+    me = user_payload(user)
+    me["streak"] = streaks.as_dict(Streak.objects.filter(user=user, group__isnull=True).first(), today)
+    return Response({"user": me, "date": today.isoformat(), "groups": group_data, "sync_token": sync_token})
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def sync(request):
+    """
+    Delta sync for the SPA. Without `since`, returns the current token only
+    (load everything once, then poll). With `since`, returns the changes
+    visible to the user after that token, latest state per object.
+    """
+    if "since" not in request.query_params:
+        return Response({"token": changelog.latest_token(), "reset": True, "has_more": False, "changes": []})
+    since = changelog.parse_token(request.query_params["since"])
+    if since is None:
+        return Response({"detail": "Invalid sync token."}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(changelog.changes(request.user, since, request=request))
+
+
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def feed_cache_stats(request):
+    """Hit/miss counters of the group feed cache (as seen by this worker's cache backend)."""
+    return Response(feed_cache.stats())
+
+
+async def _event_stream(user, group_ids):
+    sub = realtime.broadcaster.subscribe(group_ids)
+    try:
+        yield f"retry: {realtime.RETRY_MS}\n\n"
+        while True:
+            try:
+                event = await asyncio.wait_for(sub.queue.get(), timeout=realtime.KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            if not await sync_to_async(realtime.may_receive)(user, event["group_id"]):
+                # Left the group since the stream opened; the client reconnects with its current groups.
+                return
+            yield f"event: {event['type']}\ndata: {json.dumps(event, cls=DjangoJSONEncoder)}\n\n"
+    finally:
+        realtime.broadcaster.unsubscribe(sub)
+
+
+async def events(request):
+    """
+    Server-sent events: new posts and comments in the user's groups (or in
+    one group with ?group_id=). Needs the ASGI server; under WSGI a stream
+    would pin a worker thread for its whole life, so it is refused there.
+    """
+    if request.method != "GET":
+        return JsonResponse({"detail": "Method not allowed"}, status=405)
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({"detail": "Realtime events are only served by the ASGI app."}, status=501)
+    user = await request.auser()
+    if not user.is_authenticated:
+        return JsonResponse({"detail": "Authentication required"}, status=401)
+    group_ids = await sync_to_async(changelog.visible_group_ids)(user)
+    if request.GET.get("group_id"):
+        group_id = threads.parse_id(request.GET["group_id"])
+        if group_id not in group_ids:
+            return JsonResponse({"detail": "Join the group to follow it."}, status=403)
+        group_ids = [group_id]
+    response = StreamingHttpResponse(_event_stream(user, group_ids), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
 
 
 def _group_payload(g: Group) -> dict:
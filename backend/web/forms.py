@@ -31,7 +31,7 @@ class GroupForm(forms.ModelForm):
 
     class Meta:
         model = Group
-        fields = ("name", "color", "description", "cover", "is_public", "start_date", "end_date")
+        fields = ("name", "color", "description", "cover", "is_public", "start_date", "end_date", "retention_days")
 
 
 class ProfileForm(forms.ModelForm):
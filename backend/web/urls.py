@@ -21,7 +21,11 @@ urlpatterns = [
     path("posts/<int:pk>/delete/", views.PostDeleteView.as_view(), name="post_delete"),
     path("posts/bulk/", views.post_bulk_action, name="post_bulk"),
     path("posts/export/csv/", views.export_posts_csv, name="export_posts_csv"),
+    path("posts/export/archive/", views.export_archive, name="export_archive"),
+    path("posts/export/archive/<int:pk>/", views.archive_status, name="archive_status"),
+    path("posts/export/archive/<int:pk>/download/", views.archive_download, name="archive_download"),
     path("posts/import/csv/", views.import_posts_csv, name="import_posts_csv"),
+    path("posts/import/<int:pk>/", views.import_status, name="import_status"),
 
     path("profile/", views.profile_view, name="profile"),
     path("reports/", views.reports, name="reports"),
@@ -1,21 +1,23 @@
 from __future__ import annotations
 
 from django.shortcuts import render, redirect, get_object_or_404
-from django.http import HttpRequest, HttpResponse, JsonResponse, HttpResponseRedirect
+from django.http import HttpRequest, HttpResponse, JsonResponse, HttpResponseRedirect, HttpResponseNotModified
 from django.urls import reverse_lazy, reverse
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.views.decorators.http import require_http_methods
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
+from django.db import transaction
 from django.db.models import Count, Q
 from django.utils import timezone
+from django.utils.dateparse import parse_date
 from django.contrib.auth import login
 from django.contrib.auth.models import User
-import csv
-from io import StringIO
 
-from posts.models import Group, Post, GroupMembership, GroupInvite
+from posts import archives, authz, counters, etags, exports, feed, imports
+from posts import reports as post_reports
+from posts.models import Group, Post, GroupMembership, GroupInvite, Job
 from django.utils import timezone
 import secrets
 from .forms import RegisterForm, PostForm, GroupForm, ProfileForm, CSVImportForm
@@ -25,6 +27,31 @@ def home(request: HttpRequest) -> HttpResponse:
     return render(request, "web/home.html")
 
 
+class ConditionalGetMixin:
+    """
+    Answer a matching If-None-Match with 304 before any query or template work.
+    Views using it define get_etag_parts(), returning the versions the page is
+    built from; that is checked when the view class is defined.
+    """
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if not callable(getattr(cls, "get_etag_parts", None)):
+            raise TypeError(f"{cls.__name__} uses ConditionalGetMixin but defines no get_etag_parts()")
+
+    def get(self, request, *args, **kwargs):
+        # Pending flash messages are part of the page; always render them.
+        if messages.get_messages(request):
+            return super().get(request, *args, **kwargs)
+        etag = etags.make(request, self.get_etag_parts())
+        if etags.matches(request, etag):
+            return HttpResponseNotModified(headers=etags.headers(etag))
+        response = super().get(request, *args, **kwargs)
+        for header, value in etags.headers(etag).items():
+            response[header] = value
+        return response
+
+
 class OwnerRequiredMixin(UserPassesTestMixin):
     def test_func(self):
         obj = self.get_object()
@@ -56,10 +83,13 @@ class GroupListView(LoginRequiredMixin, ListView):
         return ctx
 
 
-class GroupDetailView(LoginRequiredMixin, DetailView):
+class GroupDetailView(LoginRequiredMixin, ConditionalGetMixin, DetailView):
     model = Group
     template_name = "web/group_detail.html"
 
+    def get_etag_parts(self):
+        return Group.objects.filter(pk=self.kwargs["pk"]).values_list("version", flat=True).first()
+
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
         group = self.object
@@ -108,10 +138,12 @@ class GroupDeleteView(LoginRequiredMixin, OwnerRequiredMixin, DeleteView):
     template_name = "web/confirm_delete.html"
     success_url = reverse_lazy("group_list")
 
-    def delete(self, request, *args, **kwargs):
-        obj = self.get_object()
-        obj._actor = request.user
-        return super().delete(request, *args, **kwargs)
+    def form_valid(self, form):
+        self.object._actor = self.request.user
+        # Cascaded comment/membership deletes fire receivers per row; batch their counter updates.
+        with transaction.atomic(), counters.batched():
+            self.object.delete()
+        return HttpResponseRedirect(self.get_success_url())
 
 
 @login_required
@@ -168,21 +200,22 @@ def manage_members(request: HttpRequest, pk: int) -> HttpResponse:
     return render(request, "web/members.html", {"group": group, "memberships": memberships})
 
 
-class PostListView(LoginRequiredMixin, ListView):
+class PostListView(LoginRequiredMixin, ConditionalGetMixin, ListView):
     model = Post
     template_name = "web/post_list.html"
     context_object_name = "posts"
     paginate_by = 12
 
+    def get_etag_parts(self):
+        return etags.versions(Group.objects.filter(pk__in=authz.group_ids(self.request.user)))
+
     def get_queryset(self):
         user = self.request.user
         today = timezone.localdate()
         qs = (
-            Post.objects.select_related("group", "author")
-            .filter(date=today)
-            .filter(Q(author=user) | Q(group__members=user) | Q(group__owner=user))
-            .order_by("-created_at")
-            .distinct()
+            feed.feed_queryset(user, today)
+            .select_related("group", "author")
+            .order_by("-created_at", "-id")
         )
         q = (self.request.GET.get("q") or "").strip()
         if q:
@@ -224,13 +257,8 @@ class PostUpdateView(LoginRequiredMixin, UserPassesTestMixin, UpdateView):
     form_class = PostForm
 
     def test_func(self):
-        obj = self.get_object()
-        if obj.author_id == self.request.user.id:
-            return True
-        # Allow group owner or moderators to edit
-        if obj.group.owner_id == self.request.user.id:
-            return True
-        return GroupMembership.objects.filter(group=obj.group, user=self.request.user, role='moderator').exists()
+        # Author, group owner or moderators may edit
+        return authz.can_edit_post(self.request.user, self.get_object())
 
     def get_success_url(self):
         messages.success(self.request, "Post updated.")
@@ -247,17 +275,14 @@ class PostDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
     success_url = reverse_lazy("post_list")
 
     def test_func(self):
-        obj = self.get_object()
-        if obj.author_id == self.request.user.id:
-            return True
-        if obj.group.owner_id == self.request.user.id:
-            return True
-        return GroupMembership.objects.filter(group=obj.group, user=self.request.user, role='moderator').exists()
+        return authz.can_edit_post(self.request.user, self.get_object())
 
-    def delete(self, request, *args, **kwargs):
-        obj = self.get_object()
-        obj._actor = request.user
-        return super().delete(request, *args, **kwargs)
+    def form_valid(self, form):
+        self.object._actor = self.request.user
+        # Cascaded comment/membership deletes fire receivers per row; batch their counter updates.
+        with transaction.atomic(), counters.batched():
+            self.object.delete()
+        return HttpResponseRedirect(self.get_success_url())
 
 
 @login_required
@@ -270,23 +295,53 @@ def post_bulk_action(request: HttpRequest) -> HttpResponse:
         return redirect("post_list")
     qs = Post.objects.filter(id__in=ids, author=request.user)
     if action == "delete":
-        count = qs.count()
-        qs.delete()
+        with transaction.atomic(), counters.batched():
+            count = qs.count()
+            qs.delete()
         messages.success(request, f"Deleted {count} posts.")
     return redirect("post_list")
 
 
 @login_required
 def export_posts_csv(request: HttpRequest) -> HttpResponse:
-    # Export current user's posts
-    posts = Post.objects.filter(author=request.user).select_related("group").order_by("-created_at")
-    resp = HttpResponse(content_type="text/csv")
-    resp["Content-Disposition"] = 'attachment; filename="my_posts.csv"'
-    writer = csv.writer(resp)
-    writer.writerow(["group_name", "caption", "date"])  # simple
-    for p in posts:
-        writer.writerow([p.group.name, p.caption, p.date.isoformat() if p.date else ""])
-    return resp
+    # Export current user's posts, streamed; ?start=&end=&group= narrow it down
+    try:
+        filters = exports.parse_filters(request.GET)
+    except ValueError as e:
+        messages.error(request, str(e))
+        return redirect("post_list")
+    return exports.response(request, request.user, "csv", filters)
+
+
+@login_required
+@require_http_methods(["POST"])
+def export_archive(request: HttpRequest) -> HttpResponse:
+    job = archives.start(request.user)
+    return redirect("archive_status", pk=job.pk)
+
+
+@login_required
+def archive_status(request: HttpRequest, pk: int) -> HttpResponse:
+    job = archives.job_for(request.user, pk)
+    if job is None:
+        return render(request, "web/404.html", status=404)
+    return render(request, "web/archive_status.html", {"job": job, "archive": archives.as_dict(job)})
+
+
+@login_required
+def archive_download(request: HttpRequest, pk: int) -> HttpResponse:
+    job = archives.job_for(request.user, pk)
+    if job is None or not archives.available(job):
+        return render(request, "web/404.html", status=404)
+    return exports.stream(request, archives.file_chunks(job.result["name"]), "application/zip", "daily-groups-archive.zip")
+
+
+def _import_messages(request: HttpRequest, result: dict) -> None:
+    messages.success(request, f"Imported {result['created']} of {result['rows']} posts.")
+    for e in result["errors"][:5]:
+        messages.warning(request, f"Line {e['line']}: {e['error']}")
+    if result["failed"] > 5:
+        messages.warning(request, f"{result['failed'] - 5} more rows could not be imported.")
 
 
 @login_required
@@ -295,27 +350,27 @@ def import_posts_csv(request: HttpRequest) -> HttpResponse:
         form = CSVImportForm(request.POST, request.FILES)
         if form.is_valid():
             f = form.cleaned_data["file"]
-            # Use a tiny placeholder image for imported posts
-            from django.core.files.base import File
-            from django.conf import settings
-            placeholder_path = settings.BASE_DIR / "testdata" / "dot.png"
-            reader = csv.DictReader(StringIO(f.read().decode("utf-8")))
-            created = 0
-            for row in reader:
-                gname = (row.get("group_name") or "").strip() or "Imported"
-                caption = (row.get("caption") or "").strip()
-                group, _ = Group.objects.get_or_create(name=gname, defaults={"owner": request.user})
-                p = Post(group=group, author=request.user, caption=caption, date=timezone.now().date())
-                with open(placeholder_path, "rb") as ph:
-                    p.image.save("placeholder.png", File(ph), save=True)
-                created += 1
-            messages.success(request, f"Imported {created} posts.")
+            if f.size > imports.inline_max_bytes():
+                job = imports.enqueue(request.user, f)
+                return redirect("import_status", pk=job.pk)
+            _import_messages(request, imports.run(request.user, imports.lines(f)))
             return redirect("post_list")
     else:
         form = CSVImportForm()
     return render(request, "web/import_posts.html", {"form": form})
 
 
+@login_required
+def import_status(request: HttpRequest, pk: int) -> HttpResponse:
+    job = get_object_or_404(Job, pk=pk, task=imports.import_csv.name)
+    if job.payload.get("user_id") != request.user.id:
+        return render(request, "web/404.html", status=404)
+    if job.status == Job.SUCCEEDED:
+        _import_messages(request, job.result)
+        return redirect("post_list")
+    return render(request, "web/import_status.html", {"job": job, "progress": job.progress or {}})
+
+
 @login_required
 def profile_view(request: HttpRequest) -> HttpResponse:
     if request.method == "POST":
@@ -335,18 +390,26 @@ def help_page(request: HttpRequest) -> HttpResponse:
 
 @login_required
 def reports(request: HttpRequest) -> HttpResponse:
-    # Simple data: posts per day (last 7 days) for current user
-    today = timezone.now().date()
-    days = [today - timezone.timedelta(days=i) for i in range(6, -1, -1)]
-    counts = []
-    for d in days:
-        counts.append(Post.objects.filter(author=request.user, date=d).count())
+    # Posts per day for the current user over a preset or custom range, read from the activity rollup
+    try:
+        days = int(request.GET.get("days", ""))
+    except ValueError:
+        days = None
+    try:
+        start = parse_date(request.GET.get("start") or "")
+        end = parse_date(request.GET.get("end") or "")
+    except ValueError:
+        start = end = None
+    start, end = post_reports.resolve_range(days, start, end)
+    data = post_reports.report(request.user, start, end)
     return render(
         request,
         "web/reports.html",
         {
-            "labels": [d.isoformat() for d in days],
-            "counts": counts,
+            **data,
+            "days": (end - start).days + 1,
+            "presets": post_reports.RANGE_DAYS,
+            "custom": bool(request.GET.get("start") or request.GET.get("end")),
         },
     )
 